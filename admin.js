@@ -4,6 +4,14 @@ const userRole = localStorage.getItem("user_role")
 
 if (!accessToken || userRole !== "client_admin") {
   window.location.href = "login.html"
+} else {
+  // An expired session is refreshed, or logged out, by the API client
+  window.apiClient
+    .verifyToken()
+    .then((session) => {
+      if (session.role !== "client_admin") window.apiClient.logout()
+    })
+    .catch((error) => console.error("[v0] Session check failed:", error))
 }
 
 // Navegação entre seções
@@ -260,7 +268,7 @@ async function loadTokens() {
         <div class="token-item">
             <div class="token-info">
                 <div class="token-name">${token.token_name || "Token"}</div>
-                <div class="token-value">${token.token}</div>
+                <div class="token-value">${token.token_prefix}…</div>
                 <div style="font-size:11px;color:var(--text-secondary);margin-top:4px;">
                   Status: ${token.is_active ? "✓ Ativo" : "✕ Inativo"} | 
                   Usos: ${token.usage_count} | 
@@ -268,7 +276,6 @@ async function loadTokens() {
                 </div>
             </div>
             <div class="token-actions">
-                <button class="btn-copy" onclick="copyToken('${token.token}')">Copiar</button>
                 <button class="btn-delete" onclick="deleteToken(${token.id})">Excluir</button>
             </div>
         </div>
@@ -291,22 +298,17 @@ document.getElementById("generateTokenBtn").addEventListener("click", async () =
   }
 
   try {
-    await window.apiClient.createClientToken({ token_name: name })
+    const created = await window.apiClient.createClientToken({ token_name: name })
     input.value = ""
     loadTokens()
-    alert("Token criado com sucesso!")
+    // The full token is only available now; the list shows its prefix
+    prompt("Token criado com sucesso! Guarde-o agora, ele não será exibido novamente:", created.token)
   } catch (error) {
     console.error("[v0] Error creating token:", error)
     alert(`Erro ao criar token: ${error.message}`)
   }
 })
 
-function copyToken(token) {
-  navigator.clipboard.writeText(token).then(() => {
-    alert("Token copiado para a área de transferência!")
-  })
-}
-
 async function deleteToken(tokenId) {
   if (!confirm("Tem certeza que deseja excluir este token?")) return
 
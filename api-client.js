@@ -93,8 +93,9 @@ class APIClient {
     return data
   }
 
-  async verifyToken() {
-    return await this.request("/auth/verify", { method: "GET" })
+  // Page-load checks use the claims-only path; pass fresh = true to reload the account from the database
+  async verifyToken(fresh = false) {
+    return await this.request(fresh ? "/auth/verify" : "/auth/verify?fresh=0", { method: "GET" })
   }
 
   async logout() {
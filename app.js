@@ -909,4 +909,7 @@
 const accessToken = localStorage.getItem("access_token")
 if (!accessToken) {
   window.location.href = "login.html"
+} else {
+  // An expired session is refreshed, or logged out, by the API client
+  window.apiClient.verifyToken().catch((error) => console.error("[v0] Session check failed:", error))
 }
@@ -8,6 +8,7 @@ from dotenv import load_dotenv
 load_dotenv()
 
 from config import config
+from db_client import round_trips
 
 def create_app(config_name='development'):
     """Application factory pattern"""
@@ -29,15 +30,32 @@ def create_app(config_name='development'):
     from routes.client import client_bp
     from routes.super_admin import super_admin_bp
     from routes.analytics import analytics_bp
+    from routes.signals import signals_bp
+    from routes.stream import stream_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(client_bp, url_prefix='/api/client')
     app.register_blueprint(super_admin_bp, url_prefix='/api/super-admin')
     app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    app.register_blueprint(signals_bp, url_prefix='/api/signals')
+    app.register_blueprint(stream_bp, url_prefix='/api/stream')
     
     from middleware.logging_middleware import log_request_middleware
     log_request_middleware(app)
     
+    # Query counts are internal; only debug and test runs expose them
+    if app.debug or app.testing:
+        @app.after_request
+        def add_round_trip_header(response):
+            """Expose the blocking database round trips of each request"""
+            response.headers['X-DB-Round-Trips'] = str(round_trips())
+            return response
+    
+    # With the debug reloader, only the serving child process precomputes
+    if app.config['SIGNAL_PRECOMPUTE'] and (not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true'):
+        from tasks.scheduler import start_signal_precompute
+        start_signal_precompute()
+    
     @app.route('/')
     def index():
         """Redireciona para a página de login"""
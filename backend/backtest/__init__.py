@@ -0,0 +1,6 @@
+"""
+Historical evaluation of the confluence strategy
+Entry points are backtest.engine and backtest.sweep (runnable with python -m).
+"""
+
+from backtest.strategy import score_series, compute_features, apply_rules, DEFAULT_PARAMS, CALL, PUT, NEUTRO
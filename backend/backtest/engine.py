@@ -0,0 +1,99 @@
+"""
+Backtest the confluence strategy over stored klines
+Each symbol is scored by a worker process that memory-maps its candles from
+the KlineStore, so no candle data is pickled between processes.
+
+Usage:
+    python -m backtest.engine BTCUSDT ETHUSDT --interval 1m --horizon 5 --workers 8
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from backtest.strategy import score_series, CALL, PUT
+from market_data.kline_store import KlineStore
+
+def evaluate_signals(close, signal, horizon=1, payout=0.8):
+    """
+    Score signals against the close `horizon` bars later
+    A CALL wins when price rises, a PUT when it falls; flat bars count as losses.
+    expectancy is per unit stake for a binary option paying `payout` on a win.
+    """
+    close = np.asarray(close, dtype=np.float64)
+    n = len(close)
+    forward = np.full(n, np.nan)
+    if n > horizon:
+        forward[:-horizon] = close[horizon:] / close[:-horizon] - 1
+
+    taken = (signal != 0) & ~np.isnan(forward)
+    direction = signal[taken].astype(np.float64)
+    returns = forward[taken] * direction
+    wins = returns > 0
+
+    count = int(taken.sum())
+    win_rate = float(wins.mean()) if count else 0.0
+    return {
+        'bars': n,
+        'signals': count,
+        'calls': int((signal[taken] == CALL).sum()),
+        'puts': int((signal[taken] == PUT).sum()),
+        'wins': int(wins.sum()),
+        'win_rate': round(win_rate, 4),
+        'signal_frequency': round(count / n, 6) if n else 0.0,
+        'avg_return': float(returns.mean()) if count else 0.0,
+        'expectancy': round(win_rate * payout - (1 - win_rate), 4) if count else 0.0
+    }
+
+def backtest_symbol(store_root, symbol, interval='1m', params=None, horizon=1, payout=0.8, start=None, end=None):
+    """Score one symbol; runs inside a worker process"""
+    columns = KlineStore(store_root).read(symbol, interval, start, end)
+    scored = score_series(columns, params)
+    result = evaluate_signals(columns['close'], scored['signal'], horizon, payout)
+    result['symbol'] = symbol
+    return result
+
+def combine_results(results, payout=0.8):
+    """Aggregate per-symbol results into overall statistics"""
+    totals = {key: sum(r[key] for r in results) for key in ('bars', 'signals', 'calls', 'puts', 'wins')}
+    signals = totals['signals']
+    win_rate = totals['wins'] / signals if signals else 0.0
+    totals.update({
+        'win_rate': round(win_rate, 4),
+        'signal_frequency': round(signals / totals['bars'], 6) if totals['bars'] else 0.0,
+        'avg_return': sum(r['avg_return'] * r['signals'] for r in results) / signals if signals else 0.0,
+        'expectancy': round(win_rate * payout - (1 - win_rate), 4) if signals else 0.0
+    })
+    return totals
+
+def run_backtest(symbols, interval='1m', params=None, horizon=1, payout=0.8,
+                 start=None, end=None, store_root=None, workers=None):
+    """
+    Backtest symbols in parallel, one task per symbol
+    Returns {'symbols': [...per-symbol results], 'total': {...}}
+    """
+    store_root = store_root or KlineStore().root
+    workers = workers or min(len(symbols), os.cpu_count() or 1)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(backtest_symbol, store_root, symbol, interval, params, horizon, payout, start, end)
+                   for symbol in symbols]
+        results = [f.result() for f in futures]
+
+    return {'symbols': results, 'total': combine_results(results, payout)}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Backtest the confluence strategy over stored klines')
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--horizon', type=int, default=1, help='bars until the signal is scored')
+    parser.add_argument('--payout', type=float, default=0.8)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--store')
+    args = parser.parse_args()
+
+    report = run_backtest(args.symbols, args.interval, horizon=args.horizon, payout=args.payout,
+                          store_root=args.store, workers=args.workers)
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,226 @@
+"""
+Vectorized confluence strategy
+Evaluates the generateRealSignal rules for every bar of a series at once and
+returns per-bar CALL/PUT/NEUTRO codes. Weights and thresholds are parameters
+so the same code serves backtests and parameter sweeps.
+
+Differences from the live engine, by design:
+- indicators run over the whole series instead of restarting on each 100-candle window
+- support/resistance uses the nearest confirmed pivot in the trailing window, without clustering
+- price action is read from the same series as the other indicators
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from indicators import (
+    rsi_series, macd, ema, scan_patterns, bollinger_series, fibonacci_series, volume_ratio_series
+)
+from indicators.technical import pivot_masks
+
+CALL = 1
+PUT = -1
+NEUTRO = 0
+
+DEFAULT_PARAMS = {
+    # Weights
+    'rsi_weight': 25,
+    'rsi_weak_weight': 8,
+    'macd_weight': 25,
+    'macd_weak_weight': 10,
+    'bb_weight': 20,
+    'trend_weight': 20,
+    'trend_weak_weight': 10,
+    'sr_weight': 20,
+    'fib_weight': 15,
+    'price_action_weight': 20,
+    'price_action_weak_weight': 10,
+    'volume_bonus': 10,
+    # Thresholds
+    'rsi_low': 30,
+    'rsi_high': 70,
+    'bb_low': 20,
+    'bb_high': 80,
+    'sr_distance': 0.01,
+    'fib_distance': 0.008,
+    'volume_high': 1.5,
+    'confluence_threshold': 3,
+    # client_customization flags
+    'rsi_enabled': True,
+    'macd_enabled': True,
+    'bb_enabled': True,
+    'ema_enabled': True,
+    'volume_enabled': True,
+}
+
+HISTORY = 100
+CHUNK = 50_000
+
+def _pad(values, n):
+    """Right-align a shorter series into a NaN-filled array of length n"""
+    out = np.full(n, np.nan)
+    if len(values):
+        out[n - len(values):] = values
+    return out
+
+def _nearest_levels(close, history=HISTORY):
+    """
+    Nearest pivot low below and pivot high above each close
+    Only pivots confirmed before the bar (two candles after the pivot) inside the
+    trailing `history` window are used. Evaluated in chunks to bound memory.
+    """
+    n = len(close)
+    highs, lows = pivot_masks(close)
+    high_prices = np.where(highs[0], close, np.nan)
+    low_prices = np.where(lows[0], close, np.nan)
+
+    support = np.full(n, np.nan)
+    resistance = np.full(n, np.nan)
+    span = history - 4  # pivots at positions t-history+3 .. t-2 are visible at bar t
+    if n < history:
+        return support, resistance
+
+    for start in range(history - 1, n, CHUNK):
+        stop = min(start + CHUNK, n)
+        rows = np.arange(start, stop)
+        first = rows - history + 3
+        window_low = sliding_window_view(low_prices, span)[first]
+        window_high = sliding_window_view(high_prices, span)[first]
+        price = close[rows][:, None]
+
+        with np.errstate(invalid='ignore'):
+            below = np.where(window_low < price, window_low, -np.inf).max(axis=1)
+            above = np.where(window_high > price, window_high, np.inf).min(axis=1)
+        support[rows] = np.where(np.isfinite(below), below, np.nan)
+        resistance[rows] = np.where(np.isfinite(above), above, np.nan)
+    return support, resistance
+
+def compute_features(columns):
+    """
+    Parameter-independent inputs of every rule, one array per feature
+    Computed once per series and reused for every parameter set in a sweep.
+    States: 2 strong call, 1 weak call, -1 weak put, -2 strong put, 0 none.
+    """
+    o, h, l, c, v = (np.asarray(columns[k], dtype=np.float64) for k in ('open', 'high', 'low', 'close', 'volume'))
+    n = len(c)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        # TechnicalIndicators.MACD reads past the end of its fast EMA, so its latest
+        # values are 0 for any window (see indicators.macd); the live rule takes the
+        # same branch on every candle
+        m = {k: values[0] for k, values in macd(c).items()}
+        strong_call = (m['histogram'] > 0) & (m['macd'] > m['signal'])
+        strong_put = (m['histogram'] < 0) & (m['macd'] < m['signal'])
+        macd_state = np.full(n, np.select([strong_call, strong_put, m['histogram'] > 0], [2, -2, 1], -1))
+
+        ema20 = ema(c, 20)[0]
+        ema50 = ema(c, 50)[0]
+        strong_call = (c > ema20) & (ema20 > ema50)
+        strong_put = (c < ema20) & (ema20 < ema50)
+        trend_state = np.select([strong_call, strong_put, c > ema20], [2, -2, 1], -1)
+
+        bb = {k: values[0] for k, values in bollinger_series(c, 20, 2).items()}
+        bb_position = (c - bb['lower']) / (bb['upper'] - bb['lower']) * 100
+
+        support, resistance = _nearest_levels(c)
+
+        fib = {k: values[0] for k, values in fibonacci_series(c, 50).items()}
+        levels = ('level_236', 'level_382', 'level_500', 'level_618')
+        fib_distance = np.min([np.abs(c - fib[level]) / c for level in levels], axis=0)
+
+        _, pa_signal, pa_strength = scan_patterns(o, h, l, c)
+
+        volume_ratio = volume_ratio_series(v, 20)[0]
+        rsi_values = rsi_series(c, 14)[0]
+
+        return {
+            'close': c,
+            # An RSI of 0 reads as 50 in the JS rule, as in indicators.rsi
+            'rsi': _pad(np.where(rsi_values == 0, 50.0, rsi_values), n),
+            'macd_state': macd_state.astype(np.int8),
+            'trend_state': trend_state.astype(np.int8),
+            'bb_position': bb_position,
+            'support_distance': np.abs(c - support) / c,
+            'resistance_distance': np.abs(c - resistance) / c,
+            'fib_distance': fib_distance,
+            'below_fib_500': c < fib['level_500'],
+            'price_action': (pa_signal[0] * pa_strength[0]).astype(np.int8),
+            'volume_ratio': volume_ratio
+        }
+
+def apply_rules(features, params=None):
+    """
+    Apply weights and thresholds to precomputed features
+    Returns a dict of arrays: signal (CALL/PUT/NEUTRO), confluences, call_score, put_score.
+    Bars inside the first HISTORY candles are NEUTRO.
+    """
+    p = dict(DEFAULT_PARAMS, **(params or {}))
+    n = len(features['close'])
+
+    call = np.zeros(n)
+    put = np.zeros(n)
+    confluences = np.zeros(n, dtype=np.int16)
+
+    def add(strong_call, strong_put, weak_call=None, weak_put=None, weight=0, weak_weight=0):
+        nonlocal confluences
+        call[strong_call] += weight
+        put[strong_put] += weight
+        confluences += strong_call | strong_put
+        if weak_call is not None:
+            call[weak_call] += weak_weight
+            put[weak_put] += weak_weight
+
+    def add_state(state, weight, weak_weight):
+        add(state == 2, state == -2, state == 1, state == -1, weight, weak_weight)
+
+    with np.errstate(invalid='ignore'):
+        if p['rsi_enabled']:
+            r = features['rsi']
+            strong_call = r < p['rsi_low']
+            strong_put = r > p['rsi_high']
+            neutral = (r >= 45) & (r <= 55)
+            rest = ~(strong_call | strong_put | neutral) & ~np.isnan(r)
+            add(strong_call, strong_put, rest & (r > 55), rest & (r <= 55),
+                p['rsi_weight'], p['rsi_weak_weight'])
+
+        if p['macd_enabled']:
+            add_state(features['macd_state'], p['macd_weight'], p['macd_weak_weight'])
+
+        if p['bb_enabled']:
+            position = features['bb_position']
+            add(position < p['bb_low'], position > p['bb_high'], weight=p['bb_weight'])
+
+        if p['ema_enabled']:
+            add_state(features['trend_state'], p['trend_weight'], p['trend_weak_weight'])
+
+        near_support = features['support_distance'] < p['sr_distance']
+        near_resistance = ~near_support & (features['resistance_distance'] < p['sr_distance'])
+        add(near_support, near_resistance, weight=p['sr_weight'])
+
+        near_fib = features['fib_distance'] < p['fib_distance']
+        below = features['below_fib_500']
+        add(near_fib & below, near_fib & ~below, weight=p['fib_weight'])
+
+        add_state(features['price_action'], p['price_action_weight'], p['price_action_weak_weight'])
+
+        if p['volume_enabled']:
+            high_volume = features['volume_ratio'] > p['volume_high']
+            call_leads = high_volume & (call > put)
+            put_leads = high_volume & (put > call)
+            call[call_leads] += p['volume_bonus']
+            put[put_leads] += p['volume_bonus']
+
+    gate = confluences >= p['confluence_threshold']
+    signal = np.where(gate & (call > put), CALL, np.where(gate & (put > call), PUT, NEUTRO)).astype(np.int8)
+    signal[:HISTORY - 1] = NEUTRO
+
+    return {
+        'signal': signal,
+        'confluences': confluences,
+        'call_score': call,
+        'put_score': put
+    }
+
+def score_series(columns, params=None):
+    """Score every bar of one OHLCV series; see apply_rules"""
+    return apply_rules(compute_features(columns), params)
@@ -0,0 +1,190 @@
+"""
+Parameter sweep for the confluence weights and thresholds
+Features are computed once per symbol and saved as .npy files; sweep workers
+memory-map them read-only, so every process shares the same pages and only
+the cheap rule application runs per parameter set. Parameter sets are
+generated lazily and submitted in a bounded window of batches, so a full grid
+never sits in memory.
+
+Usage:
+    python -m backtest.sweep BTCUSDT ETHUSDT --random 500 --output sweep.csv
+"""
+
+import argparse
+import csv
+import heapq
+import itertools
+import math
+import os
+import random
+import shutil
+import tempfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+from backtest.strategy import compute_features, apply_rules
+from backtest.engine import evaluate_signals, combine_results
+from market_data.kline_store import KlineStore
+
+# Search space around the hard-coded generateRealSignal values
+DEFAULT_SPACE = {
+    'rsi_weight': [15, 20, 25, 30],
+    'macd_weight': [15, 20, 25, 30],
+    'bb_weight': [10, 15, 20, 25],
+    'trend_weight': [10, 15, 20, 25],
+    'sr_weight': [10, 15, 20, 25],
+    'fib_weight': [5, 10, 15, 20],
+    'price_action_weight': [10, 15, 20, 25],
+    'volume_bonus': [0, 5, 10, 15],
+    'rsi_low': (20, 35),
+    'rsi_high': (65, 80),
+    'bb_low': (10, 30),
+    'bb_high': (70, 90),
+    'fib_distance': (0.002, 0.012),
+    'confluence_threshold': [2, 3, 4, 5],
+}
+
+METRICS = ('signals', 'win_rate', 'expectancy', 'signal_frequency', 'avg_return')
+
+def grid(space):
+    """Every combination of the listed values, generated lazily"""
+    names = sorted(space)
+    return (dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names)))
+
+def grid_size(space):
+    return math.prod(len(values) for values in space.values())
+
+def random_search(space, count, seed=None):
+    """
+    Random parameter sets, generated lazily
+    List values are sampled uniformly; (low, high) tuples are drawn from the
+    range, as integers when both bounds are integers.
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        params = {}
+        for name, values in sorted(space.items()):
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    params[name] = rng.randint(low, high)
+                else:
+                    params[name] = round(rng.uniform(low, high), 6)
+            else:
+                params[name] = rng.choice(values)
+        yield params
+
+def batched(iterable, size):
+    """Consecutive lists of up to `size` items"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+def save_features(store_root, symbol, interval, feature_dir):
+    """Compute one symbol's features and write them as .npy files"""
+    features = compute_features(KlineStore(store_root).read(symbol, interval))
+    directory = os.path.join(feature_dir, symbol)
+    os.makedirs(directory, exist_ok=True)
+    for name, values in features.items():
+        np.save(os.path.join(directory, f'{name}.npy'), np.asarray(values))
+    return symbol
+
+_features = None
+
+def _init_worker(feature_dir, symbols):
+    global _features
+    _features = {
+        symbol: {
+            name[:-4]: np.load(os.path.join(feature_dir, symbol, name), mmap_mode='r')
+            for name in os.listdir(os.path.join(feature_dir, symbol))
+        }
+        for symbol in symbols
+    }
+
+def _evaluate(batch, horizon, payout):
+    rows = []
+    for index, params in batch:
+        per_symbol = []
+        for features in _features.values():
+            signal = apply_rules(features, params)['signal']
+            per_symbol.append(evaluate_signals(features['close'], signal, horizon, payout))
+
+        total = combine_results(per_symbol, payout)
+        rows.append(dict(params, index=index, **{m: total[m] for m in METRICS}))
+    return rows
+
+def run_sweep(symbols, param_sets, output, interval='1m', horizon=1, payout=0.8,
+              store_root=None, workers=None, batch_size=8, top=100):
+    """
+    Evaluate every parameter set over all symbols and write one CSV row per set
+    param_sets may be any iterable, e.g. the grid() generator; at most a few
+    batches per worker are in flight and rows are written as they complete.
+    Returns the `top` rows by expectancy, best first.
+    """
+    store_root = store_root or KlineStore().root
+    workers = workers or os.cpu_count() or 1
+    feature_dir = tempfile.mkdtemp(prefix='sweep-features-')
+    batches = batched(enumerate(param_sets), batch_size)
+    window = workers * 4
+    best = []
+
+    def collect(future, writer):
+        nonlocal best
+        rows = future.result()
+        writer.writerows(rows)
+        best = heapq.nlargest(top, best + rows, key=lambda r: r['expectancy'])
+
+    try:
+        with ProcessPoolExecutor(max_workers=min(workers, len(symbols))) as pool:
+            list(pool.map(save_features, [store_root] * len(symbols), symbols,
+                          [interval] * len(symbols), [feature_dir] * len(symbols)))
+
+        with open(output, 'w', newline='') as f, \
+                ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                    initargs=(feature_dir, symbols)) as pool:
+            writer = None
+            pending = deque()
+            for batch in batches:
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=['index'] + sorted(batch[0][1]) + list(METRICS))
+                    writer.writeheader()
+                pending.append(pool.submit(_evaluate, batch, horizon, payout))
+                if len(pending) >= window:
+                    collect(pending.popleft(), writer)
+            while pending:
+                collect(pending.popleft(), writer)
+    finally:
+        shutil.rmtree(feature_dir, ignore_errors=True)
+
+    return best
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Sweep confluence weights and thresholds over stored klines')
+    parser.add_argument('symbols', nargs='+')
+    parser.add_argument('--interval', default='1m')
+    parser.add_argument('--horizon', type=int, default=1)
+    parser.add_argument('--payout', type=float, default=0.8)
+    parser.add_argument('--random', type=int, default=200, help='number of random parameter sets')
+    parser.add_argument('--grid', action='store_true', help='full grid over the listed values instead of random search')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--store')
+    parser.add_argument('--output', default='sweep.csv')
+    args = parser.parse_args()
+
+    if args.grid:
+        space = {k: v for k, v in DEFAULT_SPACE.items() if isinstance(v, list)}
+        param_sets, count = grid(space), grid_size(space)
+    else:
+        param_sets, count = random_search(DEFAULT_SPACE, args.random, args.seed), args.random
+
+    print(f"[Sweep] Evaluating {count} parameter sets on {len(args.symbols)} symbols")
+    best = run_sweep(args.symbols, param_sets, args.output, args.interval, args.horizon, args.payout,
+                     args.store, args.workers)
+    print(f"[Sweep] Results written to {args.output}")
+    for row in best[:5]:
+        print(f"  - #{row['index']}: expectancy {row['expectancy']}, win rate {row['win_rate']}, {row['signals']} signals")
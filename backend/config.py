@@ -1,5 +1,9 @@
 import os
 from datetime import timedelta
+from dotenv import load_dotenv
+
+# Scripts that import Config without going through app.py see the same .env
+load_dotenv()
 
 class Config:
     """Base configuration"""
@@ -11,6 +15,9 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(hours=1)
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=30)
     
+    # User tokens are stored as HMAC digests under this key (utils.token_digest)
+    TOKEN_HASH_KEY = os.environ.get('TOKEN_HASH_KEY') or 'dev-token-hash-key-change-in-production'
+    
     # Session Configuration
     SESSION_TYPE = 'filesystem'
     PERMANENT_SESSION_LIFETIME = timedelta(hours=1)
@@ -22,6 +29,23 @@ class Config:
     SUPABASE_URL = os.environ.get('SUPABASE_URL')
     SUPABASE_KEY = os.environ.get('SUPABASE_ANON_KEY')
     
+    # Market data
+    KLINE_STORE_PATH = os.environ.get('KLINE_STORE_PATH') or 'data/klines'
+    BINANCE_API_URL = os.environ.get('BINANCE_API_URL') or 'https://api.binance.com/api/v3'
+    # Opt-in: every process that enables it runs its own precompute thread
+    SIGNAL_PRECOMPUTE = os.environ.get('SIGNAL_PRECOMPUTE', 'false').lower() == 'true'
+    
+    # Password hashing (utils.password_helpers)
+    PASSWORD_HASH_METHOD = os.environ.get('PASSWORD_HASH_METHOD') or 'scrypt:32768:8:1'
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS') or min(4, os.cpu_count() or 1))
+    PASSWORD_HASH_QUEUE = int(os.environ.get('PASSWORD_HASH_QUEUE') or PASSWORD_HASH_WORKERS * 8)
+    
+    # Activity logs are bulk-inserted (utils.activity_log)
+    ACTIVITY_LOG_BATCH = int(os.environ.get('ACTIVITY_LOG_BATCH') or 500)
+    ACTIVITY_LOG_INTERVAL_MS = int(os.environ.get('ACTIVITY_LOG_INTERVAL_MS') or 250)
+    ACTIVITY_LOG_MAX_PENDING = int(os.environ.get('ACTIVITY_LOG_MAX_PENDING') or 50_000)
+    ACTIVITY_LOG_BLOCK_MS = int(os.environ.get('ACTIVITY_LOG_BLOCK_MS') or 0)
+    
     # Rate Limiting
     RATELIMIT_STORAGE_URL = 'memory://'
     
@@ -44,6 +68,7 @@ class ProductionConfig(Config):
 class TestingConfig(Config):
     """Testing configuration"""
     TESTING = True
+    SIGNAL_PRECOMPUTE = False
 
 config = {
     'development': DevelopmentConfig,
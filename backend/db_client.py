@@ -1,8 +1,19 @@
-from supabase import create_client, Client
+from supabase import create_client, Client, ClientOptions
+import httpx
+from flask import g, has_request_context
 import os
 
 _supabase_client = None
 
+def _count_round_trip(request):
+    """httpx hook: count remote calls made while serving a request"""
+    if has_request_context():
+        g.db_round_trips = g.get('db_round_trips', 0) + 1
+
+def round_trips():
+    """Blocking database round trips made so far by the current request"""
+    return g.get('db_round_trips', 0) if has_request_context() else 0
+
 def get_supabase() -> Client:
     """Get Supabase client singleton"""
     global _supabase_client
@@ -14,6 +25,13 @@ def get_supabase() -> Client:
         if not supabase_url or not supabase_key:
             raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set in environment variables")
         
-        _supabase_client = create_client(supabase_url, supabase_key)
+        # The counting hook lives on the HTTP client the library is given, so it
+        # survives the postgrest client being rebuilt (e.g. on auth changes)
+        options = ClientOptions()
+        options.httpx_client = httpx.Client(
+            timeout=options.postgrest_client_timeout,
+            event_hooks={'request': [_count_round_trip]}
+        )
+        _supabase_client = create_client(supabase_url, supabase_key, options)
     
     return _supabase_client
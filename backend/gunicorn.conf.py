@@ -0,0 +1,23 @@
+"""
+Gunicorn settings for the API
+Signal streams stay open for as long as a client watches them, so requests run
+on gevent greenlets instead of one OS thread each. The worker monkey-patches
+the standard library, which makes the stream queues, locks and sleeps yield
+to other requests while they wait.
+
+    gunicorn -c gunicorn.conf.py
+"""
+
+import os
+
+wsgi_app = 'app:create_app()'
+bind = os.getenv('BIND', '0.0.0.0:5000')
+worker_class = 'gevent'
+# The hubs, caches and background loops are per process, so prefer few workers
+workers = int(os.getenv('WEB_CONCURRENCY', '2'))
+# Open connections per worker, streams included
+worker_connections = int(os.getenv('WORKER_CONNECTIONS', '1000'))
+# A worker whose event loop is blocked this long (e.g. CPU work that never yields) is restarted
+timeout = 60
+graceful_timeout = 30
+keepalive = 5
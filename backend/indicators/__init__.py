@@ -0,0 +1,37 @@
+"""
+Server-side technical indicators
+"""
+
+from indicators.technical import (
+    sma,
+    ema,
+    rsi,
+    rsi_series,
+    macd,
+    macd_series,
+    bollinger_bands,
+    fibonacci_levels,
+    find_support_resistance,
+)
+from indicators.incremental import (
+    EMAState,
+    RSIState,
+    MACDState,
+    RollingSMAState,
+    RollingExtremaState,
+    BollingerState,
+    restore_state,
+)
+from indicators.rolling import (
+    rolling_max,
+    rolling_min,
+    rolling_sum,
+    rolling_mean,
+    rolling_var,
+    rolling_std,
+    bollinger_series,
+    fibonacci_series,
+    volume_ratio_series,
+)
+from indicators.support_resistance import detect_levels, cluster_prices, LevelSet
+from indicators.patterns import scan_patterns, detect_price_action, PATTERNS
@@ -0,0 +1,260 @@
+"""
+Stateful indicators advanced one closed candle at a time
+Each state is seeded from history once, then `update` costs O(1) per candle.
+States serialize to plain dicts so they can be checkpointed and restored.
+"""
+
+import math
+from abc import ABC, abstractmethod
+from collections import deque
+
+class IndicatorState(ABC):
+    """Base class for incremental indicators"""
+    __slots__ = ()
+
+    @classmethod
+    def from_history(cls, values, *args, **kwargs):
+        """Create a state and feed it every value in history"""
+        state = cls(*args, **kwargs)
+        for value in values:
+            state.update(value)
+        return state
+
+    @abstractmethod
+    def update(self, value):
+        """Advance the state by one closed candle and return the new value"""
+
+    def to_dict(self):
+        """Serialize the state to a JSON-compatible dict"""
+        data = {'type': type(self).__name__}
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, '__slots__', ()):
+                value = getattr(self, slot)
+                data[slot] = value.to_dict() if isinstance(value, IndicatorState) else value
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        """Restore a state produced by to_dict"""
+        state = cls.__new__(cls)
+        for klass in cls.__mro__:
+            for slot in getattr(klass, '__slots__', ()):
+                value = data[slot]
+                if isinstance(value, dict) and 'type' in value:
+                    value = restore_state(value)
+                setattr(state, slot, value)
+        return state
+
+class EMAState(IndicatorState):
+    """Exponential moving average seeded with the first value, like TechnicalIndicators.EMA"""
+    __slots__ = ('period', 'k', 'value')
+
+    def __init__(self, period):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.value = None
+
+    def update(self, value):
+        if self.value is None:
+            self.value = float(value)
+        else:
+            self.value = value * self.k + self.value * (1 - self.k)
+        return self.value
+
+class RSIState(IndicatorState):
+    """
+    Wilder RSI
+    The first `period` changes seed the averages; a value is produced from the
+    next change on, matching indicators.technical.rsi_series
+    """
+    __slots__ = ('period', 'prev_close', 'changes', 'avg_gain', 'avg_loss', 'value')
+
+    def __init__(self, period=14):
+        self.period = period
+        self.prev_close = None
+        self.changes = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value = None
+
+    def update(self, value):
+        if self.prev_close is None:
+            self.prev_close = float(value)
+            return None
+
+        change = value - self.prev_close
+        self.prev_close = float(value)
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self.changes += 1
+
+        if self.changes <= self.period:
+            # Seed window: accumulate simple averages
+            self.avg_gain += gain / self.period
+            self.avg_loss += loss / self.period
+            return None
+
+        self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+        self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        rs = 100.0 if self.avg_loss == 0 else self.avg_gain / self.avg_loss
+        self.value = 100 - 100 / (1 + rs)
+        return self.value
+
+class MACDState(IndicatorState):
+    """Aligned MACD line, signal line and histogram, like technical.macd_series (not TechnicalIndicators.MACD)"""
+    __slots__ = ('fast', 'slow', 'signal', 'macd', 'histogram')
+
+    def __init__(self, fast_period=12, slow_period=26, signal_period=9):
+        self.fast = EMAState(fast_period)
+        self.slow = EMAState(slow_period)
+        self.signal = EMAState(signal_period)
+        self.macd = None
+        self.histogram = None
+
+    def update(self, value):
+        self.macd = self.fast.update(value) - self.slow.update(value)
+        signal = self.signal.update(self.macd)
+        self.histogram = self.macd - signal
+        return {'macd': self.macd, 'signal': signal, 'histogram': self.histogram}
+
+class RollingSMAState(IndicatorState):
+    """
+    Rolling mean and variance over the last `period` values
+    Keeps a ring buffer with a running sum and a Welford sum of squared
+    deviations; both are rebuilt from the buffer once per lap so
+    floating-point drift cannot accumulate
+    """
+    __slots__ = ('period', 'window', 'index', 'count', 'total', 'm2')
+
+    def __init__(self, period=20):
+        self.period = period
+        self.window = [0.0] * period
+        self.index = 0
+        self.count = 0
+        self.total = 0.0
+        self.m2 = 0.0
+
+    def update(self, value):
+        value = float(value)
+        old = self.window[self.index]
+        self.window[self.index] = value
+        self.index = (self.index + 1) % self.period
+
+        if self.count < self.period:
+            previous_mean = self.total / self.count if self.count else 0.0
+            self.count += 1
+            self.total += value
+            self.m2 += (value - previous_mean) * (value - self.total / self.count)
+        elif self.index == 0:
+            self.total = math.fsum(self.window)
+            mean = self.total / self.period
+            self.m2 = math.fsum((v - mean) ** 2 for v in self.window)
+        else:
+            previous_mean = self.total / self.period
+            self.total += value - old
+            mean = self.total / self.period
+            self.m2 = max(self.m2 + (value - old) * (value - mean + old - previous_mean), 0.0)
+
+        return self.mean
+
+    @property
+    def ready(self):
+        return self.count == self.period
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    @property
+    def variance(self):
+        """Population variance of the window"""
+        if not self.count:
+            return None
+        return self.m2 / self.count
+
+class RollingExtremaState(IndicatorState):
+    """
+    Rolling high and low over the last `period` values
+    Monotonic queues of (index, value): each value is pushed and popped at
+    most once, so an update is amortized O(1)
+    """
+    __slots__ = ('period', 'index', 'highs', 'lows')
+
+    def __init__(self, period=50):
+        self.period = period
+        self.index = 0
+        self.highs = deque()
+        self.lows = deque()
+
+    def update(self, value):
+        value = float(value)
+        while self.highs and self.highs[-1][1] <= value:
+            self.highs.pop()
+        while self.lows and self.lows[-1][1] >= value:
+            self.lows.pop()
+        self.highs.append((self.index, value))
+        self.lows.append((self.index, value))
+
+        expired = self.index - self.period
+        if self.highs[0][0] <= expired:
+            self.highs.popleft()
+        if self.lows[0][0] <= expired:
+            self.lows.popleft()
+
+        self.index += 1
+        return self.high, self.low
+
+    @property
+    def high(self):
+        return self.highs[0][1] if self.highs else None
+
+    @property
+    def low(self):
+        return self.lows[0][1] if self.lows else None
+
+    def to_dict(self):
+        data = super().to_dict()
+        data['highs'] = [list(item) for item in self.highs]
+        data['lows'] = [list(item) for item in self.lows]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        state = super().from_dict(data)
+        state.highs = deque(tuple(item) for item in data['highs'])
+        state.lows = deque(tuple(item) for item in data['lows'])
+        return state
+
+class BollingerState(RollingSMAState):
+    """Bollinger Bands over a rolling window"""
+    __slots__ = ('std_dev', 'current')
+
+    def __init__(self, period=20, std_dev=2):
+        super().__init__(period)
+        self.std_dev = std_dev
+        self.current = None
+
+    def update(self, value):
+        super().update(value)
+        self.current = float(value)
+        return self.bands
+
+    @property
+    def bands(self):
+        if not self.count:
+            return None
+        middle = self.mean
+        std = math.sqrt(self.variance)
+        return {
+            'upper': middle + std * self.std_dev,
+            'middle': middle,
+            'lower': middle - std * self.std_dev,
+            'current': self.current
+        }
+
+STATE_TYPES = {cls.__name__: cls for cls in (EMAState, RSIState, MACDState, RollingSMAState, RollingExtremaState, BollingerState)}
+
+def restore_state(data):
+    """Rebuild any indicator state from its to_dict output"""
+    return STATE_TYPES[data['type']].from_dict(data)
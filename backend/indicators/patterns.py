@@ -0,0 +1,112 @@
+"""
+Candlestick pattern scanner
+Each pattern is a boolean mask over whole OHLC arrays, so a full history (or
+a batch of symbols) is scanned without a Python loop per bar. To add a
+pattern, append a Pattern to PATTERNS; order is priority when several match.
+"""
+
+from collections import namedtuple
+import numpy as np
+
+from indicators.technical import as_matrix
+
+Pattern = namedtuple('Pattern', ['name', 'signal', 'strength', 'mask'])
+
+STRENGTHS = {'none': 0, 'moderate': 1, 'strong': 2}
+SIGNALS = {'CALL': 1, 'PUT': -1, 'NEUTRO': 0}
+
+class Candles:
+    """
+    OHLC arrays aligned on the current bar
+    c.close is the bar itself, c.prev(1).close the bar before, and so on;
+    bars before the start of the series read as NaN so every comparison is False
+    """
+    __slots__ = ('open', 'high', 'low', 'close')
+
+    def __init__(self, open, high, low, close):
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+
+    def prev(self, n):
+        def shift(values):
+            out = np.full(values.shape, np.nan)
+            out[:, n:] = values[:, :-n]
+            return out
+        return Candles(shift(self.open), shift(self.high), shift(self.low), shift(self.close))
+
+def _bullish_engulfing(c):
+    p = c.prev(1)
+    return (p.close < p.open) & (c.close > c.open) & (c.close > p.open) & (c.open < p.close)
+
+def _hammer(c):
+    body = c.close - c.open
+    return (c.high - c.close < body * 0.3) & (c.close - c.low > body * 2) & (c.close > c.open)
+
+def _morning_star(c):
+    p, p2 = c.prev(1), c.prev(2)
+    return (p2.close < p2.open) & (p.open < p.close) & (c.close > c.open) & (c.close > p2.open)
+
+def _bearish_engulfing(c):
+    p = c.prev(1)
+    return (p.close > p.open) & (c.close < c.open) & (c.close < p.open) & (c.open > p.close)
+
+def _shooting_star(c):
+    body = c.open - c.close
+    return (c.close - c.low < body * 0.3) & (c.high - c.close > body * 2) & (c.close < c.open)
+
+def _evening_star(c):
+    p, p2 = c.prev(1), c.prev(2)
+    return (p2.close > p2.open) & (p.close < p.open) & (c.close < c.open) & (c.close < p2.close)
+
+# Same rules and priority as TechnicalIndicators.detectPriceAction
+PATTERNS = (
+    Pattern('Bullish Engulfing', 'CALL', 'strong', _bullish_engulfing),
+    Pattern('Hammer', 'CALL', 'moderate', _hammer),
+    Pattern('Morning Star', 'CALL', 'strong', _morning_star),
+    Pattern('Bearish Engulfing', 'PUT', 'strong', _bearish_engulfing),
+    Pattern('Shooting Star', 'PUT', 'moderate', _shooting_star),
+    Pattern('Evening Star', 'PUT', 'strong', _evening_star),
+)
+
+def scan_patterns(opens, highs, lows, closes, patterns=PATTERNS):
+    """
+    Pattern code for every bar of (symbols, candles) OHLC arrays
+    Returns (codes, signals, strengths) int8 arrays shaped like the input:
+    codes index into patterns starting at 1 (0 = no pattern), signals are
+    1 CALL / -1 PUT / 0, strengths 2 strong / 1 moderate / 0.
+    """
+    candles = Candles(*(as_matrix(a) for a in (opens, highs, lows, closes)))
+    codes = np.zeros(candles.close.shape, dtype=np.int8)
+
+    with np.errstate(invalid='ignore'):
+        # Reverse order so the highest-priority match is written last
+        for code in range(len(patterns), 0, -1):
+            codes[patterns[code - 1].mask(candles)] = code
+
+    signal_table = np.array([0] + [SIGNALS[p.signal] for p in patterns], dtype=np.int8)
+    strength_table = np.array([0] + [STRENGTHS[p.strength] for p in patterns], dtype=np.int8)
+    return codes, signal_table[codes], strength_table[codes]
+
+def detect_price_action(opens, highs, lows, closes):
+    """
+    Pattern on the last candle of each row
+    Returns one {'pattern', 'signal', 'strength'} dict per symbol, like TechnicalIndicators.detectPriceAction
+    """
+    closes = as_matrix(closes)
+    if closes.shape[1] < 3:
+        return [{'pattern': 'insufficient_data', 'signal': 'NEUTRO', 'strength': 'none'}
+                for _ in range(closes.shape[0])]
+
+    # Only the last three candles matter for the latest bar
+    codes, _, _ = scan_patterns(*(as_matrix(a)[:, -3:] for a in (opens, highs, lows)), closes[:, -3:])
+
+    results = []
+    for code in codes[:, -1]:
+        if code:
+            pattern = PATTERNS[code - 1]
+            results.append({'pattern': pattern.name, 'signal': pattern.signal, 'strength': pattern.strength})
+        else:
+            results.append({'pattern': 'No clear pattern', 'signal': 'NEUTRO', 'strength': 'none'})
+    return results
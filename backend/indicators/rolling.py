@@ -0,0 +1,139 @@
+"""
+Rolling-window statistics over (symbols, candles) arrays
+Every function returns an array shaped like its input, with NaN until the
+first full window, in O(n) per row whatever the window size.
+
+The series is cut into blocks of `window` candles. A window ending at t
+covers the tail of one block and the head of the next, so it is the merge of
+a suffix and a prefix accumulated inside single blocks (van Herk/Gil-Werman).
+Max/min merge with np.maximum/np.minimum; mean and variance merge the two
+parts' (count, mean, M2) with the Chan/Welford pairwise formula. Sums never
+run longer than one block, so there is no cumulative-sum drift on long series.
+"""
+
+import numpy as np
+
+from indicators.technical import as_matrix, FIBONACCI_RATIOS
+
+def _blocks(data, window, fill):
+    """data padded with fill to whole blocks, shaped (symbols, blocks, window)"""
+    rows, n = data.shape
+    blocks = -(-n // window)
+    padded = np.full((rows, blocks * window), fill)
+    padded[:, :n] = data
+    return padded.reshape(rows, blocks, window)
+
+def _flat(blocks, n):
+    return blocks.reshape(blocks.shape[0], -1)[:, :n]
+
+def _extreme(data, window, fill, accumulate, merge):
+    data = as_matrix(data)
+    n = data.shape[1]
+    out = np.full(data.shape, np.nan)
+    if n < window:
+        return out
+
+    blocks = _blocks(data, window, fill)
+    prefix = _flat(accumulate(blocks, axis=2), n)
+    suffix = _flat(accumulate(blocks[:, :, ::-1], axis=2)[:, :, ::-1], n)
+    out[:, window - 1:] = merge(suffix[:, :n - window + 1], prefix[:, window - 1:])
+    return out
+
+def rolling_max(data, window):
+    """Highest value of each trailing window"""
+    return _extreme(data, window, -np.inf, np.maximum.accumulate, np.maximum)
+
+def rolling_min(data, window):
+    """Lowest value of each trailing window"""
+    return _extreme(data, window, np.inf, np.minimum.accumulate, np.minimum)
+
+def _running_moments(blocks, shift):
+    """Running (count, mean, M2) along each block, computed on values minus shift"""
+    values = blocks - shift
+    count = np.arange(1, blocks.shape[2] + 1, dtype=np.float64)
+    s1 = np.cumsum(values, axis=2)
+    s2 = np.cumsum(values * values, axis=2)
+    mean = s1 / count
+    return count, mean + shift, np.maximum(s2 - s1 * mean, 0.0)
+
+def _window_moments(data, window):
+    """(mean, M2) of every full window, shaped (symbols, candles - window + 1)"""
+    n = data.shape[1]
+    blocks = _blocks(data, window, 0.0)
+
+    # Prefixes all contain their block's first value and suffixes its last one;
+    # shifting by it keeps the squares small on large prices
+    prefix = _running_moments(blocks, blocks[:, :, :1])
+    reverse = blocks[:, :, ::-1]
+    suffix = [part[..., ::-1] for part in _running_moments(reverse, reverse[:, :, :1])]
+
+    count_a, mean_a, m2_a = (_flat(np.broadcast_to(p, blocks.shape), n)[:, :n - window + 1] for p in suffix)
+    count_b, mean_b, m2_b = (_flat(np.broadcast_to(p, blocks.shape), n)[:, window - 1:] for p in prefix)
+
+    # A window starting on a block boundary is that whole block: the suffix alone
+    aligned = np.arange(n - window + 1) % window == 0
+    count_b = np.where(aligned, 0.0, count_b)
+    mean = np.where(aligned, mean_a, (count_a * mean_a + count_b * mean_b) / window)
+    delta = mean_b - mean_a
+    m2 = np.where(aligned, m2_a, m2_a + m2_b + delta * delta * count_a * count_b / window)
+    return mean, m2
+
+def rolling_mean(data, window):
+    """Mean of each trailing window"""
+    data = as_matrix(data)
+    out = np.full(data.shape, np.nan)
+    if data.shape[1] >= window:
+        out[:, window - 1:] = _window_moments(data, window)[0]
+    return out
+
+def rolling_sum(data, window):
+    """Sum of each trailing window"""
+    return rolling_mean(data, window) * window
+
+def rolling_var(data, window, ddof=0):
+    """Variance of each trailing window (population by default, like BollingerBands)"""
+    data = as_matrix(data)
+    out = np.full(data.shape, np.nan)
+    if data.shape[1] >= window:
+        out[:, window - 1:] = _window_moments(data, window)[1] / (window - ddof)
+    return out
+
+def rolling_std(data, window, ddof=0):
+    """Standard deviation of each trailing window"""
+    return np.sqrt(rolling_var(data, window, ddof))
+
+def bollinger_series(data, period=20, std_dev=2):
+    """Bollinger Bands at every candle, like bollinger_bands over each trailing window"""
+    data = as_matrix(data)
+    middle = rolling_mean(data, period)
+    std = rolling_std(data, period)
+    return {
+        'upper': middle + std * std_dev,
+        'middle': middle,
+        'lower': middle - std * std_dev,
+        'current': data
+    }
+
+def fibonacci_series(data, period=50):
+    """Fibonacci retracement levels of each trailing window, like fibonacci_levels"""
+    data = as_matrix(data)
+    high = rolling_max(data, period)
+    low = rolling_min(data, period)
+    diff = high - low
+
+    levels = {'level_0': high}
+    for name, ratio in FIBONACCI_RATIOS.items():
+        levels[name] = high - diff * ratio
+    levels.update({
+        'level_100': low,
+        'current': data,
+        'high': high,
+        'low': low
+    })
+    return levels
+
+def volume_ratio_series(volumes, period=20):
+    """Each volume over the average of the trailing `period` volumes, current one included"""
+    volumes = as_matrix(volumes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return volumes / rolling_mean(volumes, period)
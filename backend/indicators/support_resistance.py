@@ -0,0 +1,74 @@
+"""
+Support and resistance detection
+Pivots come from vectorized neighbour comparisons; each type's pivot prices are
+sorted and clustered in one pass, so the result does not depend on pivot
+order. Nearest-level queries are binary searches over the sorted levels.
+"""
+
+import numpy as np
+
+from indicators.technical import as_matrix, pivot_masks
+
+def cluster_prices(prices, threshold):
+    """
+    Group prices into levels in one pass over the sorted prices
+    A level starts at its lowest price and absorbs prices within `threshold`
+    of that anchor, so no level is wider than the threshold.
+    Returns (level prices, strengths), both sorted by price
+    """
+    levels = []
+    strengths = []
+    anchor = None
+    for price in np.sort(prices).tolist():
+        if anchor is not None and (price - anchor) / price < threshold:
+            levels[-1] += price
+            strengths[-1] += 1
+        else:
+            anchor = price
+            levels.append(price)
+            strengths.append(1)
+
+    strengths = np.array(strengths, dtype=np.int64)
+    return np.array(levels) / np.maximum(strengths, 1), strengths
+
+class LevelSet:
+    """Support and resistance levels of one series, sorted by price"""
+    __slots__ = ('support', 'support_strength', 'resistance', 'resistance_strength')
+
+    def __init__(self, support, support_strength, resistance, resistance_strength):
+        self.support = support
+        self.support_strength = support_strength
+        self.resistance = resistance
+        self.resistance_strength = resistance_strength
+
+    def nearest_support(self, price):
+        """Highest support level strictly below price, as (price, strength), or None"""
+        i = int(np.searchsorted(self.support, price, side='left'))
+        if i == 0:
+            return None
+        return float(self.support[i - 1]), int(self.support_strength[i - 1])
+
+    def nearest_resistance(self, price):
+        """Lowest resistance level strictly above price, as (price, strength), or None"""
+        i = int(np.searchsorted(self.resistance, price, side='right'))
+        if i == len(self.resistance):
+            return None
+        return float(self.resistance[i]), int(self.resistance_strength[i])
+
+    def to_list(self):
+        """Levels as dicts, strongest first, in the findSupportResistance format"""
+        levels = [{'price': float(p), 'type': 'support', 'strength': int(s)}
+                  for p, s in zip(self.support, self.support_strength)]
+        levels += [{'price': float(p), 'type': 'resistance', 'strength': int(s)}
+                   for p, s in zip(self.resistance, self.resistance_strength)]
+        return sorted(levels, key=lambda l: -l['strength'])
+
+def detect_levels(data, threshold=0.02):
+    """One LevelSet per row of a (symbols, candles) array"""
+    data = as_matrix(data)
+    highs, lows = pivot_masks(data)
+
+    return [
+        LevelSet(*cluster_prices(row[low_row], threshold), *cluster_prices(row[high_row], threshold))
+        for row, high_row, low_row in zip(data, highs, lows)
+    ]
@@ -0,0 +1,241 @@
+"""
+Vectorized port of technical-indicators.js
+Every function takes a 2-D array shaped (symbols, candles) and computes the
+indicator for all rows in one pass. A 1-D series is treated as a single row.
+"""
+
+import numpy as np
+
+# Below this many rows the recursive indicators (EMA, RSI) run a scalar loop per
+# row; above it, one NumPy step per candle across all rows is cheaper
+SCALAR_ROWS = 16
+
+FIBONACCI_RATIOS = {
+    'level_236': 0.236,
+    'level_382': 0.382,
+    'level_500': 0.5,
+    'level_618': 0.618,
+    'level_786': 0.786,
+}
+
+def as_matrix(data):
+    """Return data as a float64 (symbols, candles) array"""
+    return np.atleast_2d(np.asarray(data, dtype=np.float64))
+
+def sma(data, period):
+    """
+    Simple moving average
+    Returns shape (symbols, candles - period + 1), like TechnicalIndicators.SMA
+    """
+    data = as_matrix(data)
+    if data.shape[1] < period:
+        return np.empty((data.shape[0], 0))
+
+    csum = np.cumsum(data, axis=1)
+    csum = np.concatenate([np.zeros((data.shape[0], 1)), csum], axis=1)
+    return (csum[:, period:] - csum[:, :-period]) / period
+
+def ema(data, period):
+    """
+    Exponential moving average seeded with the first value
+    Returns shape (symbols, candles), like TechnicalIndicators.EMA
+    """
+    data = as_matrix(data)
+    result = np.empty_like(data)
+    if data.shape[1] == 0:
+        return result
+
+    k = 2.0 / (period + 1)
+    if data.shape[0] <= SCALAR_ROWS:
+        for row in range(data.shape[0]):
+            values = data[row].tolist()
+            prev = values[0]
+            out = [prev]
+            for value in values[1:]:
+                prev = value * k + prev * (1 - k)
+                out.append(prev)
+            result[row] = out
+        return result
+
+    result[:, 0] = data[:, 0]
+    for i in range(1, data.shape[1]):
+        result[:, i] = data[:, i] * k + result[:, i - 1] * (1 - k)
+    return result
+
+def rsi_series(data, period=14):
+    """
+    Wilder RSI for every candle after the warm-up window
+    Returns shape (symbols, candles - period - 1); the seed average covers the
+    first `period` changes and smoothing starts at change `period`, as in the JS version
+    """
+    data = as_matrix(data)
+    changes = np.diff(data, axis=1)
+    count = changes.shape[1] - period
+    if count <= 0:
+        return np.empty((data.shape[0], 0))
+
+    gains = np.where(changes > 0, changes, 0.0)
+    losses = np.where(changes < 0, -changes, 0.0)
+
+    avg_gain = gains[:, :period].sum(axis=1) / period
+    avg_loss = losses[:, :period].sum(axis=1) / period
+
+    # Smoothed averages first, then RSI for all candles at once
+    smoothed_gain = np.empty((data.shape[0], count))
+    smoothed_loss = np.empty((data.shape[0], count))
+    if data.shape[0] <= SCALAR_ROWS:
+        for row in range(data.shape[0]):
+            g, l = float(avg_gain[row]), float(avg_loss[row])
+            out_g, out_l = [], []
+            for gain, loss in zip(gains[row, period:].tolist(), losses[row, period:].tolist()):
+                g = (g * (period - 1) + gain) / period
+                l = (l * (period - 1) + loss) / period
+                out_g.append(g)
+                out_l.append(l)
+            smoothed_gain[row] = out_g
+            smoothed_loss[row] = out_l
+    else:
+        for j in range(count):
+            i = period + j
+            avg_gain = (avg_gain * (period - 1) + gains[:, i]) / period
+            avg_loss = (avg_loss * (period - 1) + losses[:, i]) / period
+            smoothed_gain[:, j] = avg_gain
+            smoothed_loss[:, j] = avg_loss
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rs = np.where(smoothed_loss == 0, 100.0, smoothed_gain / smoothed_loss)
+    return 100 - 100 / (1 + rs)
+
+def rsi(data, period=14):
+    """
+    Latest RSI per symbol, 50 when there is not enough history
+    An RSI of exactly 0 (no gains in the window) is also reported as 50, like
+    the `|| 50` fallback of the JS version.
+    """
+    series = rsi_series(data, period)
+    if series.shape[1] == 0:
+        return np.full(series.shape[0], 50.0)
+    latest = series[:, -1]
+    return np.where(latest == 0, 50.0, latest)
+
+def macd_series(data, fast_period=12, slow_period=26, signal_period=9):
+    """
+    Conventional MACD line, signal line and histogram for every candle, with both
+    EMAs aligned on the same candle
+    This is not what TechnicalIndicators.MACD returns (see macd); the signal
+    engine and backtest use macd for parity with the browser.
+    """
+    data = as_matrix(data)
+    macd_line = ema(data, fast_period) - ema(data, slow_period)
+    signal_line = ema(macd_line, signal_period)
+    return {
+        'macd': macd_line,
+        'signal': signal_line,
+        'histogram': macd_line - signal_line
+    }
+
+def macd(data, fast_period=12, slow_period=26, signal_period=9):
+    """
+    Latest MACD, signal and histogram per symbol, exactly as TechnicalIndicators.MACD
+    The JS version pairs the fast EMA at candle i + (slow_period - fast_period)
+    with the slow EMA at candle i, so the last slow_period - fast_period MACD
+    values read past the end of the array and are NaN. The NaN reaches the
+    latest MACD, signal and histogram, which `|| 0` turns into 0.
+    """
+    data = as_matrix(data)
+    rows, length = data.shape
+    offset = slow_period - fast_period
+
+    fast = ema(data, fast_period)
+    slow = ema(data, slow_period)
+    macd_line = np.full((rows, length), np.nan)
+    if offset >= 0:
+        macd_line[:, :max(length - offset, 0)] = fast[:, offset:] - slow[:, :max(length - offset, 0)]
+    else:
+        macd_line[:, -offset:] = fast[:, :length + offset] - slow[:, -offset:]
+    signal_line = ema(macd_line, signal_period)
+
+    if length == 0:
+        zeros = np.zeros(rows)
+        return {'macd': zeros, 'signal': zeros.copy(), 'histogram': zeros.copy()}
+    latest = {
+        'macd': macd_line[:, -1],
+        'signal': signal_line[:, -1],
+        'histogram': macd_line[:, -1] - signal_line[:, -1]
+    }
+    return {key: np.nan_to_num(values, nan=0.0) for key, values in latest.items()}
+
+def bollinger_bands(data, period=20, std_dev=2):
+    """Latest Bollinger Bands per symbol using the population deviation"""
+    data = as_matrix(data)
+    window = data[:, -period:]
+    middle = window.mean(axis=1)
+    std = np.sqrt(((window - middle[:, None]) ** 2).sum(axis=1) / period)
+    return {
+        'upper': middle + std * std_dev,
+        'middle': middle,
+        'lower': middle - std * std_dev,
+        'current': data[:, -1]
+    }
+
+def fibonacci_levels(data):
+    """Fibonacci retracement levels between the high and low of each row"""
+    data = as_matrix(data)
+    high = data.max(axis=1)
+    low = data.min(axis=1)
+    diff = high - low
+
+    levels = {'level_0': high}
+    for name, ratio in FIBONACCI_RATIOS.items():
+        levels[name] = high - diff * ratio
+    levels.update({
+        'level_100': low,
+        'current': data[:, -1],
+        'high': high,
+        'low': low
+    })
+    return levels
+
+def pivot_masks(data):
+    """
+    Local highs and lows that beat both neighbours on each side
+    Returns two boolean arrays shaped like data; the two edge candles on each side are never pivots
+    """
+    data = as_matrix(data)
+    highs = np.zeros(data.shape, dtype=bool)
+    lows = np.zeros(data.shape, dtype=bool)
+    if data.shape[1] < 5:
+        return highs, lows
+
+    center = data[:, 2:-2]
+    neighbours = (data[:, 1:-3], data[:, :-4], data[:, 3:-1], data[:, 4:])
+    highs[:, 2:-2] = np.logical_and.reduce([center > n for n in neighbours])
+    lows[:, 2:-2] = np.logical_and.reduce([center < n for n in neighbours])
+    return highs, lows
+
+def find_support_resistance(data, threshold=0.02):
+    """
+    Support and resistance levels per symbol, strongest first
+    Pivots are found with vectorized comparisons; clustering follows the JS rules
+    (first match in the same type absorbs the level and averages the price)
+    """
+    data = as_matrix(data)
+    highs, lows = pivot_masks(data)
+
+    results = []
+    for row, high_row, low_row in zip(data, highs, lows):
+        clustered = []
+        for i in np.flatnonzero(high_row | low_row):
+            price = float(row[i])
+            level_type = 'resistance' if high_row[i] else 'support'
+
+            existing = next((l for l in clustered
+                             if l['type'] == level_type and abs(l['price'] - price) / price < threshold), None)
+            if existing:
+                existing['strength'] += 1
+                existing['price'] = (existing['price'] + price) / 2
+            else:
+                clustered.append({'price': price, 'type': level_type, 'strength': 1})
+
+        results.append(sorted(clustered, key=lambda l: -l['strength']))
+    return results
@@ -0,0 +1,8 @@
+"""
+Candle storage and market data access
+"""
+
+from market_data.kline_store import KlineStore
+from market_data.fetcher import KlineFetcher, get_fetcher
+from market_data.resample import resample, TimeframeResampler
+from market_data.ingest import KlineIngest, get_kline_ingest
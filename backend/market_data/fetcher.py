@@ -0,0 +1,220 @@
+"""
+Backend market data client
+Replaces the browser-side BinanceAPI calls. Requests go through a keep-alive
+connection pool, concurrent identical requests share one upstream call, and
+closed klines are cached until the next candle closes. The open candle, whose
+close is the current price, is refreshed on its own short TTL.
+"""
+
+import json
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import Config
+
+INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 3 * 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 3_600_000,
+    '2h': 2 * 3_600_000,
+    '4h': 4 * 3_600_000,
+    '6h': 6 * 3_600_000,
+    '8h': 8 * 3_600_000,
+    '12h': 12 * 3_600_000,
+    '1d': 86_400_000,
+    '3d': 3 * 86_400_000,
+    '1w': 7 * 86_400_000,
+}
+
+def parse_klines(data):
+    """Raw Binance klines [openTime, open, high, low, close, volume, ...] to kline dicts"""
+    return [{
+        'time': k[0],
+        'open': float(k[1]),
+        'high': float(k[2]),
+        'low': float(k[3]),
+        'close': float(k[4]),
+        'volume': float(k[5])
+    } for k in data]
+
+class _Call:
+    """An upstream request other threads can wait on"""
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class KlineFetcher:
+    """
+    Pooled, single-flight Binance client
+    Returned values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, base_url=None, pool_size=32, timeout=10, ticker_ttl=1.0, open_candle_ttl=2.0):
+        self.base_url = (base_url or Config.BINANCE_API_URL).rstrip('/')
+        self.timeout = timeout
+        self.ticker_ttl = ticker_ttl
+        self.open_candle_ttl = open_candle_ttl
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._inflight = {}
+        self.stats = {'upstream': 0, 'cache_hits': 0, 'shared': 0}
+
+    def close(self):
+        self.session.close()
+
+    def _get(self, path, params):
+        with self._lock:
+            self.stats['upstream'] += 1
+        response = self.session.get(f'{self.base_url}{path}', params=params, timeout=self.timeout)
+        if not response.ok:
+            raise ValueError(f'Binance API error: {response.status_code}')
+        return response.json()
+
+    def _single_flight(self, key, loader, expires_at):
+        """
+        Return a cached value, join an in-flight request, or run loader
+        expires_at(value) gives the wall-clock time until which the value may be served
+        """
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] > time.time():
+                self.stats['cache_hits'] += 1
+                return cached[1]
+
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _Call()
+            else:
+                self.stats['shared'] += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = loader()
+            with self._lock:
+                self._cache[key] = (expires_at(call.result), call.result)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            call.done.set()
+
+    def _store(self, key, value, expires):
+        with self._lock:
+            cached = self._cache.get(key)
+            if not cached or cached[0] < expires:
+                self._cache[key] = (expires, value)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._cache.pop(key, None)
+
+    def prune(self):
+        """Drop expired cache entries"""
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (expires, _) in self._cache.items() if expires <= now]:
+                del self._cache[key]
+
+    def get_klines(self, symbol, interval='1h', limit=100):
+        """
+        Candles oldest first; the last one is the candle still open
+        The closed candles are cached until the open one closes. The open candle
+        is cached for open_candle_ttl seconds, so its close tracks the price.
+        """
+        step = INTERVAL_MS.get(interval)
+        if step is None:
+            def load():
+                return parse_klines(self._get('/klines', {'symbol': symbol, 'interval': interval, 'limit': limit}))
+            return self._single_flight(('klines', symbol, interval, limit), load, lambda _: time.time() + self.ticker_ttl)
+
+        open_key = ('open', symbol, interval)
+
+        def load_closed():
+            klines = parse_klines(self._get('/klines', {'symbol': symbol, 'interval': interval, 'limit': limit}))
+            if klines and klines[-1]['time'] + step > time.time() * 1000:
+                # The same response carries the open candle; seed its cache too
+                self._store(open_key, klines[-1], time.time() + self.open_candle_ttl)
+                return klines[:-1]
+            return klines
+
+        def next_close(closed):
+            # Valid until the candle after the last closed one closes
+            return (closed[-1]['time'] + 2 * step) / 1000 if closed else time.time() + self.ticker_ttl
+
+        def load_open():
+            klines = parse_klines(self._get('/klines', {'symbol': symbol, 'interval': interval, 'limit': 1}))
+            return klines[-1] if klines else None
+
+        closed_key = ('klines', symbol, interval, limit)
+        closed = self._single_flight(closed_key, load_closed, next_close)
+        current = self._single_flight(open_key, load_open, lambda _: time.time() + self.open_candle_ttl)
+
+        # The open candle moved past the cached closed ones (clock skew at a close)
+        if current and closed and current['time'] > closed[-1]['time'] + step:
+            self.invalidate(closed_key)
+            closed = self._single_flight(closed_key, load_closed, next_close)
+
+        if current and (not closed or current['time'] > closed[-1]['time']):
+            return (closed + [current])[-limit:]
+        return closed
+
+    def get_current_price(self, symbol):
+        def load():
+            return float(self._get('/ticker/price', {'symbol': symbol})['price'])
+
+        return self._single_flight(('price', symbol), load, lambda _: time.time() + self.ticker_ttl)
+
+    def get_prices(self, symbols):
+        """Latest prices for several symbols in one request, as {symbol: price}"""
+        symbols = sorted(set(symbols))
+
+        def load():
+            data = self._get('/ticker/price', {'symbols': json.dumps(symbols, separators=(',', ':'))})
+            return {item['symbol']: float(item['price']) for item in data}
+
+        return self._single_flight(('prices', tuple(symbols)), load, lambda _: time.time() + self.ticker_ttl)
+
+    def get_24h_volume(self, symbol):
+        def load():
+            data = self._get('/ticker/24hr', {'symbol': symbol})
+            return {
+                'volume': float(data['volume']),
+                'quoteVolume': float(data['quoteVolume']),
+                'priceChange': float(data['priceChangePercent'])
+            }
+
+        return self._single_flight(('24hr', symbol), load, lambda _: time.time() + self.ticker_ttl)
+
+_fetcher = None
+
+def get_fetcher():
+    """Get the shared KlineFetcher singleton"""
+    global _fetcher
+
+    if _fetcher is None:
+        _fetcher = KlineFetcher()
+
+    return _fetcher
@@ -0,0 +1,161 @@
+"""
+Candle ingest into the KlineStore
+One base-interval (1m) feed per symbol: each sync appends the candles that
+closed since the last stored one and folds them into the higher timeframes
+through TimeframeResampler, so no other interval is fetched upstream.
+`KlineIngest.klines` serves those series to SignalEngine and falls back to
+the fetcher only while the store cannot answer a request completely.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from market_data.fetcher import INTERVAL_MS, get_fetcher
+from market_data.kline_store import COLUMNS, KlineStore
+from market_data.resample import TimeframeResampler, bucket_start
+
+class KlineIngest:
+    """Keeps the stored base series and its resampled timeframes current"""
+
+    def __init__(self, fetcher, store=None, resampler=None, history=60, backfill_limit=1000):
+        self.fetcher = fetcher
+        self.store = store or KlineStore()
+        self.resampler = resampler or TimeframeResampler(self.store)
+        # Candles fetched by a regular sync, and by the first one of a symbol
+        self.history = history
+        self.backfill_limit = backfill_limit
+        self._synced = set()
+        self._open = {}
+        self._lock = threading.Lock()
+        self.stats = {'served': 0, 'fallback': 0}
+
+    def _fill(self, symbol, now_ms):
+        """
+        Fetch the closed higher-timeframe candles the resampler could not build:
+        the history before the first sync, a gap while the process was down, or
+        a bucket skipped because its first base candles were missing
+        """
+        for interval in self.resampler.intervals:
+            step = INTERVAL_MS[interval]
+            last = self.store.last_time(symbol, interval)
+            if last is not None and last >= bucket_start([now_ms], interval)[0] - step:
+                continue
+            klines = self.fetcher.get_klines(symbol, interval, self.backfill_limit)
+            self.store.append(symbol, interval, [k for k in klines if k['time'] + step <= now_ms])
+
+    def sync(self, symbol, now=None):
+        """
+        Store the base candles closed since the last sync
+        Returns [(interval, bar)] for the higher-timeframe bars that closed
+        """
+        base = self.resampler.base
+        step = INTERVAL_MS[base]
+        now_ms = (time.time() if now is None else now) * 1000
+
+        # Only this method writes, so the fetch can happen before taking the lock readers share
+        last = self.store.last_time(symbol, base)
+        missing = (now_ms - last) // step if last is not None else None
+        limit = self.history if missing is not None and missing < self.history else self.backfill_limit
+        klines = self.fetcher.get_klines(symbol, base, limit)
+        closed = [k for k in klines if k['time'] + step <= now_ms and (last is None or k['time'] > last)]
+        current = klines[-1] if klines and klines[-1]['time'] + step > now_ms else None
+
+        first = symbol not in self._synced
+        if first:
+            self._fill(symbol, now_ms)
+
+        bars = []
+        with self._lock:
+            self._open[symbol] = current
+            if first:
+                # Partial bars live in memory: rebuild them once per process from the stored series
+                self.store.append(symbol, base, closed)
+                self.resampler.backfill(symbol)
+                self._synced.add(symbol)
+            else:
+                for kline in closed:
+                    bars.extend(self.resampler.on_candle(symbol, kline))
+
+        if not first:
+            self._fill(symbol, now_ms)
+        return bars
+
+    def sync_all(self, symbols, now=None):
+        """Sync every symbol; returns {symbol: error} for the ones that failed"""
+        failed = {}
+        for symbol in dict.fromkeys(symbols):
+            try:
+                self.sync(symbol, now=now)
+            except Exception as e:
+                failed[symbol] = str(e)
+        return failed
+
+    def _stored(self, symbol, interval, limit, now_ms):
+        """Column arrays ending with the open candle, or None when the store cannot serve them"""
+        base = self.resampler.base
+        step = INTERVAL_MS[base]
+        if symbol not in self._synced or (interval != base and interval not in self.resampler.intervals):
+            return None
+
+        current = self._open.get(symbol)
+        # The open candle must be the current one (or the one that closed just before this sync)
+        if current is None or current['time'] + 2 * step <= now_ms:
+            return None
+        if self.store.last_time(symbol, base) != current['time'] - step:
+            return None
+
+        if interval == base:
+            bar = current
+        else:
+            start = float(bucket_start([current['time']], interval)[0])
+            partial = self.resampler.partial(symbol, interval)
+            if partial is None:
+                bar = dict(current, time=start)
+            elif partial['time'] == start:
+                bar = dict(partial, high=max(partial['high'], current['high']), low=min(partial['low'], current['low']),
+                           close=current['close'], volume=partial['volume'] + current['volume'])
+            else:
+                return None
+
+            # The bar still forming is complete only if every base candle since it opened is stored
+            times = self.store.read(symbol, base, start=start)['time']
+            if len(times) != (current['time'] - start) // step:
+                return None
+
+        stored = self.store.tail(symbol, interval, limit - 1) if limit > 1 else None
+        if stored is not None:
+            # Enough history, and no gap between it and the bar still forming
+            if len(stored['time']) < limit - 1 or stored['time'][-1] + INTERVAL_MS[interval] != bar['time']:
+                return None
+        return {
+            c: np.append(stored[c], bar[c]) if stored is not None else np.array([bar[c]], dtype=np.float64)
+            for c in COLUMNS
+        }
+
+    def klines(self, symbol, interval='1h', limit=100):
+        """
+        Provider for SignalEngine, shaped like KlineFetcher.get_klines
+        The stored candles with the one still open last; fetched directly while
+        the store lacks history for the interval or the last sync is stale.
+        """
+        now_ms = time.time() * 1000
+        with self._lock:
+            columns = self._stored(symbol, interval, limit, now_ms)
+            self.stats['fallback' if columns is None else 'served'] += 1
+
+        return self.fetcher.get_klines(symbol, interval, limit) if columns is None else columns
+
+_ingest = None
+_ingest_lock = threading.Lock()
+
+def get_kline_ingest():
+    """Get the shared KlineIngest singleton"""
+    global _ingest
+
+    with _ingest_lock:
+        if _ingest is None:
+            _ingest = KlineIngest(get_fetcher())
+
+    return _ingest
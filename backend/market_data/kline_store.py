@@ -0,0 +1,124 @@
+"""
+On-disk columnar candle store
+Each symbol/interval has one fixed-width float64 file per column
+(time, open, high, low, close, volume). Writers append raw bytes; readers
+memory-map the files and get zero-copy NumPy views.
+"""
+
+import os
+import threading
+import numpy as np
+
+from config import Config
+
+COLUMNS = ('time', 'open', 'high', 'low', 'close', 'volume')
+ITEM_SIZE = np.dtype(np.float64).itemsize
+
+class KlineStore:
+    """Append-only memory-mapped kline storage"""
+
+    def __init__(self, root=None):
+        self.root = root or Config.KLINE_STORE_PATH
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    def _dir(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def _path(self, symbol, interval, column):
+        return os.path.join(self._dir(symbol, interval), f'{column}.f64')
+
+    def _lock(self, symbol, interval):
+        with self._locks_guard:
+            return self._locks.setdefault((symbol.upper(), interval), threading.Lock())
+
+    def series(self):
+        """Yield every stored (symbol, interval)"""
+        if not os.path.isdir(self.root):
+            return
+        for symbol in sorted(os.listdir(self.root)):
+            symbol_dir = os.path.join(self.root, symbol)
+            if os.path.isdir(symbol_dir):
+                for interval in sorted(os.listdir(symbol_dir)):
+                    yield symbol, interval
+
+    def count(self, symbol, interval):
+        """
+        Number of complete candles stored
+        The time column is written last, so its length marks committed rows
+        """
+        try:
+            return os.path.getsize(self._path(symbol, interval, 'time')) // ITEM_SIZE
+        except OSError:
+            return 0
+
+    def last_time(self, symbol, interval):
+        """Open time of the newest stored candle, or None"""
+        n = self.count(symbol, interval)
+        if not n:
+            return None
+        with open(self._path(symbol, interval, 'time'), 'rb') as f:
+            f.seek((n - 1) * ITEM_SIZE)
+            return float(np.frombuffer(f.read(ITEM_SIZE), dtype=np.float64)[0])
+
+    def append(self, symbol, interval, klines):
+        """
+        Append candles newer than the last stored one
+        klines may be a list of kline dicts or a dict of column arrays.
+        Returns the number of candles written.
+        """
+        columns = klines if isinstance(klines, dict) else {
+            c: [k[c] for k in klines] for c in COLUMNS
+        }
+        columns = {c: np.ascontiguousarray(columns[c], dtype=np.float64) for c in COLUMNS}
+
+        with self._lock(symbol, interval):
+            last = self.last_time(symbol, interval)
+            if last is not None:
+                keep = columns['time'] > last
+                columns = {c: values[keep] for c, values in columns.items()}
+            if not len(columns['time']):
+                return 0
+
+            os.makedirs(self._dir(symbol, interval), exist_ok=True)
+            committed = self.count(symbol, interval) * ITEM_SIZE
+
+            # Data columns first, time last: a reader never sees a row whose time is committed but data is not
+            for column in COLUMNS[1:] + COLUMNS[:1]:
+                path = self._path(symbol, interval, column)
+                with open(path, 'ab') as f:
+                    # Drop bytes left behind by an interrupted append
+                    if f.tell() != committed:
+                        f.truncate(committed)
+                        f.seek(committed)
+                    f.write(columns[column].tobytes())
+
+            return len(columns['time'])
+
+    def read(self, symbol, interval, start=None, end=None):
+        """
+        Zero-copy views of the stored columns
+        start/end filter by open time (inclusive start, exclusive end).
+        Returns a dict of read-only arrays, empty when nothing is stored.
+        """
+        n = self.count(symbol, interval)
+        if not n:
+            return {c: np.empty(0) for c in COLUMNS}
+
+        views = {
+            c: np.memmap(self._path(symbol, interval, c), dtype=np.float64, mode='r', shape=(n,))
+            for c in COLUMNS
+        }
+
+        lo = 0 if start is None else int(np.searchsorted(views['time'], start, side='left'))
+        hi = n if end is None else int(np.searchsorted(views['time'], end, side='left'))
+        return {c: values[lo:hi] for c, values in views.items()}
+
+    def tail(self, symbol, interval, limit):
+        """Views of the newest `limit` candles"""
+        views = self.read(symbol, interval)
+        return {c: values[-limit:] for c, values in views.items()} if limit else views
+
+    def klines(self, symbol, interval, limit=100):
+        """Provider compatible with SignalEngine: the newest `limit` candles as column arrays"""
+        return self.tail(symbol, interval, limit)
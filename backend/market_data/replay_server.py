@@ -0,0 +1,156 @@
+"""
+Local stand-in for the Binance REST API
+Replays recorded klines so the fetcher, tests and benchmarks run offline.
+Recordings are raw Binance kline responses saved as <SYMBOL>-<interval>.json.
+By default candles are re-timed so the last one is the currently open candle.
+
+Usage:
+    python -m market_data.replay_server data/recordings --port 8765
+    BINANCE_API_URL=http://127.0.0.1:8765/api/v3 python app.py
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from market_data.fetcher import INTERVAL_MS
+
+def record(fetcher, symbol, interval, limit, directory):
+    """Save a live klines response in the format the replay server reads"""
+    data = fetcher._get('/klines', {'symbol': symbol, 'interval': interval, 'limit': limit})
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, f'{symbol}-{interval}.json'), 'w') as f:
+        json.dump(data, f)
+    return len(data)
+
+def retime(klines, interval_ms):
+    """Shift recorded candles so the last one is the candle open right now"""
+    now = int(time.time() * 1000)
+    offset = now - now % interval_ms - klines[-1][0]
+    return [[k[0] + offset] + k[1:6] + [k[6] + offset if len(k) > 6 else k[0] + offset + interval_ms - 1] + k[7:]
+            for k in klines]
+
+def load_recordings(directory):
+    """{(symbol, interval): raw klines} from a recordings directory"""
+    recordings = {}
+    for name in os.listdir(directory):
+        if name.endswith('.json') and '-' in name:
+            symbol, interval = name[:-5].rsplit('-', 1)
+            with open(os.path.join(directory, name)) as f:
+                recordings[(symbol, interval)] = json.load(f)
+    return recordings
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        self.server.request_count += 1
+
+        routes = {
+            '/api/v3/klines': self._klines,
+            '/api/v3/ticker/price': self._price,
+            '/api/v3/ticker/24hr': self._ticker_24hr,
+        }
+        route = routes.get(url.path)
+        if not route:
+            return self._send(404, {'code': -1, 'msg': 'Not found'})
+        route(params)
+
+    def _series(self, symbol, interval=None):
+        recordings = self.server.recordings
+        if interval:
+            return recordings.get((symbol, interval))
+        # Ticker endpoints use the finest recorded interval
+        for (s, _), data in sorted(recordings.items(), key=lambda item: len(item[1]), reverse=True):
+            if s == symbol:
+                return data
+        return None
+
+    def _klines(self, params):
+        data = self._series(params.get('symbol'), params.get('interval', '1h'))
+        if data is None:
+            return self._send(400, {'code': -1121, 'msg': 'Invalid symbol.'})
+        limit = int(params.get('limit', 500))
+        klines = data[-limit:]
+        if self.server.live and klines and params.get('interval') in INTERVAL_MS:
+            klines = retime(klines, INTERVAL_MS[params['interval']])
+        self._send(200, klines)
+
+    def _price(self, params):
+        if 'symbols' in params:
+            prices = []
+            for symbol in json.loads(params['symbols']):
+                data = self._series(symbol)
+                if not data:
+                    return self._send(400, {'code': -1121, 'msg': 'Invalid symbol.'})
+                prices.append({'symbol': symbol, 'price': data[-1][4]})
+            return self._send(200, prices)
+
+        data = self._series(params.get('symbol'))
+        if not data:
+            return self._send(400, {'code': -1121, 'msg': 'Invalid symbol.'})
+        self._send(200, {'symbol': params['symbol'], 'price': data[-1][4]})
+
+    def _ticker_24hr(self, params):
+        data = self._series(params.get('symbol'))
+        if not data:
+            return self._send(400, {'code': -1121, 'msg': 'Invalid symbol.'})
+        day = [k for k in data if k[0] >= data[-1][0] - 86_400_000]
+        first_open = float(day[0][1])
+        last_close = float(day[-1][4])
+        volume = sum(float(k[5]) for k in day)
+        self._send(200, {
+            'symbol': params['symbol'],
+            'volume': str(volume),
+            'quoteVolume': str(sum(float(k[5]) * float(k[4]) for k in day)),
+            'priceChangePercent': str(round((last_close - first_open) / first_open * 100, 3))
+        })
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+class ReplayServer(ThreadingHTTPServer):
+    """Threaded HTTP server serving recorded klines"""
+    daemon_threads = True
+
+    def __init__(self, recordings, host='127.0.0.1', port=0, live=True):
+        super().__init__((host, port), ReplayHandler)
+        self.recordings = recordings
+        self.live = live
+        self.request_count = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}/api/v3'
+
+    def start(self):
+        """Serve in a background thread and return the base URL"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self.base_url
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Replay recorded Binance klines')
+    parser.add_argument('directory')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--no-retime', action='store_true', help='serve the recorded timestamps unchanged')
+    args = parser.parse_args()
+
+    server = ReplayServer(load_recordings(args.directory), args.host, args.port, live=not args.no_retime)
+    print(f"[MarketData] Replaying {len(server.recordings)} series at {server.base_url}")
+    server.serve_forever()
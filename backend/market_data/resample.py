@@ -0,0 +1,144 @@
+"""
+Multi-timeframe resampling from the stored 1m series
+Higher timeframes are aggregated from 1m candles instead of being fetched
+separately. `resample` does a vectorized pass over a whole series;
+`TimeframeResampler` keeps the open higher-timeframe bars up to date as each
+1m candle closes and writes finished bars to the KlineStore.
+"""
+
+import numpy as np
+
+from market_data.fetcher import INTERVAL_MS
+from market_data.kline_store import COLUMNS
+
+# Binance weekly candles open on Monday 00:00 UTC; the epoch was a Thursday
+WEEK_OFFSET_MS = 4 * 86_400_000
+
+def bucket_start(times, interval):
+    """Open time of the `interval` candle containing each timestamp (ms)"""
+    size = INTERVAL_MS[interval]
+    offset = WEEK_OFFSET_MS if interval == '1w' else 0
+    return (np.asarray(times, dtype=np.int64) - offset) // size * size + offset
+
+def resample(columns, interval):
+    """
+    Aggregate time-sorted candles into `interval` candles
+    Returns a dict of column arrays; the last bar may still be incomplete
+    """
+    times = np.asarray(columns['time'])
+    if not len(times):
+        return {c: np.empty(0) for c in COLUMNS}
+
+    buckets = bucket_start(times, interval)
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    ends = np.append(starts[1:], len(times)) - 1
+
+    return {
+        'time': buckets[starts].astype(np.float64),
+        'open': np.asarray(columns['open'])[starts],
+        'high': np.maximum.reduceat(np.asarray(columns['high']), starts),
+        'low': np.minimum.reduceat(np.asarray(columns['low']), starts),
+        'close': np.asarray(columns['close'])[ends],
+        'volume': np.add.reduceat(np.asarray(columns['volume']), starts)
+    }
+
+class TimeframeResampler:
+    """
+    Builds every higher timeframe from one base feed per symbol
+    Closed bars are appended to the store under their own interval; the bar
+    still forming is kept in memory and served as the last candle, like the
+    exchange does.
+    """
+
+    def __init__(self, store, intervals=('5m', '15m', '1h', '4h', '1d'), base='1m'):
+        self.store = store
+        self.base = base
+        self.intervals = [i for i in intervals if i != base]
+        self._partial = {}
+        # Buckets whose first base candles are missing: not built, so never stored
+        self._skipped = {}
+
+    def backfill(self, symbol):
+        """Rebuild the higher timeframes from everything stored for the base interval"""
+        base = self.store.read(symbol, self.base)
+        if not len(base['time']):
+            return {}
+
+        data_end = base['time'][-1] + INTERVAL_MS[self.base]
+        written = {}
+        for interval in self.intervals:
+            bars = resample(base, interval)
+            # A first bar that opened before the stored data starts is incomplete
+            closed = (bars['time'] + INTERVAL_MS[interval] <= data_end) & (bars['time'] >= base['time'][0])
+            written[interval] = self.store.append(symbol, interval, {c: v[closed] for c, v in bars.items()})
+
+            key = (symbol, interval)
+            self._partial.pop(key, None)
+            self._skipped.pop(key, None)
+            if not closed[-1]:
+                start = bars['time'][-1]
+                covered = np.count_nonzero(base['time'] >= start) == (data_end - start) // INTERVAL_MS[self.base]
+                if covered:
+                    self._partial[key] = {c: float(v[-1]) for c, v in bars.items()}
+                else:
+                    self._skipped[key] = start
+        return written
+
+    def on_candle(self, symbol, kline):
+        """
+        Store one closed base candle and fold it into every higher timeframe
+        Returns [(interval, bar)] for the higher-timeframe bars it closed; a
+        candle that is already stored is ignored
+        """
+        if not self.store.append(symbol, self.base, [kline]):
+            return []
+
+        closed = []
+        candle_end = kline['time'] + INTERVAL_MS[self.base]
+        for interval in self.intervals:
+            key = (symbol, interval)
+            start = int(bucket_start([kline['time']], interval)[0])
+            if key in self._skipped:
+                if self._skipped[key] == start:
+                    continue
+                del self._skipped[key]
+            bar = self._partial.get(key)
+
+            if bar is not None and bar['time'] != start:
+                # A gap skipped the candle that would have closed this bar
+                self.store.append(symbol, interval, [bar])
+                closed.append((interval, bar))
+                bar = None
+
+            if bar is None:
+                bar = {'time': float(start), 'open': kline['open'], 'high': kline['high'],
+                       'low': kline['low'], 'close': kline['close'], 'volume': kline['volume']}
+            else:
+                bar['high'] = max(bar['high'], kline['high'])
+                bar['low'] = min(bar['low'], kline['low'])
+                bar['close'] = kline['close']
+                bar['volume'] += kline['volume']
+
+            if candle_end >= start + INTERVAL_MS[interval]:
+                self.store.append(symbol, interval, [bar])
+                closed.append((interval, bar))
+                self._partial.pop(key, None)
+            else:
+                self._partial[key] = bar
+        return closed
+
+    def partial(self, symbol, interval):
+        """The bar of interval still forming, or None"""
+        return self._partial.get((symbol, interval))
+
+    def klines(self, symbol, interval, limit=100):
+        """Provider for SignalEngine: stored bars plus the bar still forming"""
+        bar = self._partial.get((symbol, interval))
+        if bar is None:
+            return self.store.tail(symbol, interval, limit)
+
+        stored = self.store.tail(symbol, interval, limit - 1) if limit > 1 else None
+        return {
+            c: np.append(stored[c], bar[c]) if stored is not None else np.array([bar[c]])
+            for c in COLUMNS
+        }
@@ -1,5 +1,5 @@
 from flask import request, g
-from models import db, ActivityLog
+from utils.activity_log import activity_log, ActivityRecord
 from datetime import datetime
 import time
 
@@ -35,16 +35,15 @@ def log_request_middleware(app):
                 action_type = determine_action_type(request.path, request.method)
                 
                 if action_type and g.client_id:
-                    log = ActivityLog(
+                    # Queued; written to activity_logs in bulk by a background thread
+                    activity_log.put(ActivityRecord(
                         client_id=g.client_id,
                         token_id=g.token_id,
                         action_type=action_type,
                         action_details=f"{request.method} {request.path} - {response.status_code} ({duration:.2f}s)",
                         ip_address=request.remote_addr,
                         user_agent=request.headers.get('User-Agent')
-                    )
-                    db.session.add(log)
-                    db.session.commit()
+                    ))
             except Exception as e:
                 # Don't let logging errors break the response
                 print(f"[v0] Logging error: {str(e)}")
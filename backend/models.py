@@ -1,10 +1,9 @@
-from werkzeug.security import generate_password_hash, check_password_hash
+from utils.password_helpers import password_hasher
 
 def set_password_hash(password):
     """Gera o hash da senha para armazenamento."""
-    return generate_password_hash(password)
+    return password_hasher.hash(password)
 
 def check_password(password, hash):
     """Verifica se a senha corresponde ao hash armazenado."""
-    return check_password_hash(hash, password)
-
+    return password_hasher.verify(password, hash)[0]
@@ -1,12 +1,18 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity, get_jwt
 from db_client import get_supabase
-from utils.auth_helpers import log_activity, validate_token_access
-from models import check_password
+from utils.auth_helpers import log_activity, validate_token_access, load_principal, invalidate_principal
+from utils.password_helpers import password_hasher, HashingBusy
 from datetime import datetime
 
 auth_bp = Blueprint('auth', __name__)
 
+def busy_response():
+    """503 while the password hashing pool is saturated"""
+    response = jsonify({'error': 'Too many login attempts, try again shortly'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
+
 @auth_bp.route('/super-admin/login', methods=['POST'])
 def super_admin_login():
     """Super Admin login endpoint"""
@@ -25,16 +31,23 @@ def super_admin_login():
     
     admin = response.data[0]
     
-    if not check_password(data['password'], admin['password_hash']):
+    try:
+        valid, new_hash = password_hasher.verify(data['password'], admin['password_hash'])
+    except HashingBusy:
+        return busy_response()
+    
+    if not valid:
         return jsonify({'error': 'Invalid credentials'}), 401
     
     if not admin['is_active']:
         return jsonify({'error': 'Account is inactive'}), 403
     
-    # Update last login
-    supabase.table('super_admin').update({
-        'last_login': datetime.utcnow().isoformat()
-    }).eq('id', admin['id']).execute()
+    # Update last login, upgrading the stored hash to the configured KDF cost
+    updates = {'last_login': datetime.utcnow().isoformat()}
+    if new_hash:
+        updates['password_hash'] = new_hash
+    supabase.table('super_admin').update(updates).eq('id', admin['id']).execute()
+    invalidate_principal('super_admin', admin['id'])
     
     # Create JWT tokens
     additional_claims = {'role': 'super_admin'}
@@ -73,16 +86,23 @@ def client_login():
     
     client = response.data[0]
     
-    if not check_password(data['password'], client['admin_password_hash']):
+    try:
+        valid, new_hash = password_hasher.verify(data['password'], client['admin_password_hash'])
+    except HashingBusy:
+        return busy_response()
+    
+    if not valid:
         return jsonify({'error': 'Invalid credentials'}), 401
     
     if not client['is_active']:
         return jsonify({'error': 'Account is inactive'}), 403
     
-    # Update last login
-    supabase.table('white_label_clients').update({
-        'last_login': datetime.utcnow().isoformat()
-    }).eq('id', client['id']).execute()
+    # Update last login, upgrading the stored hash to the configured KDF cost
+    updates = {'last_login': datetime.utcnow().isoformat()}
+    if new_hash:
+        updates['admin_password_hash'] = new_hash
+    supabase.table('white_label_clients').update(updates).eq('id', client['id']).execute()
+    invalidate_principal('client_admin', client['id'])
     
     # Log activity
     log_activity(client['id'], None, 'login', f'Client admin {client["admin_username"]} logged in')
@@ -135,7 +155,7 @@ def token_login():
         return jsonify({'error': error}), 401
     
     # Log activity
-    log_activity(token['client_id'], token['id'], 'token_access', f'Token {token["token"]} accessed system')
+    log_activity(token['client_id'], token['id'], 'token_access', f'Token {token["token_prefix"]}... accessed system')
     
     # Create JWT tokens
     additional_claims = {
@@ -146,12 +166,11 @@ def token_login():
     access_token = create_access_token(identity=token['id'], additional_claims=additional_claims)
     refresh_token = create_refresh_token(identity=token['id'], additional_claims=additional_claims)
     
-    # Get client customization and theme
-    supabase = get_supabase()
+    # Client theme and customization come with the token record
     client = token.get('white_label_clients')
-    
-    customization_response = supabase.table('client_customization').select('*').eq('client_id', token['client_id']).execute()
-    customization = customization_response.data[0] if customization_response.data else None
+    customization = client.get('client_customization')
+    if isinstance(customization, list):
+        customization = customization[0] if customization else None
     
     return jsonify({
         'access_token': access_token,
@@ -159,7 +178,7 @@ def token_login():
         'token': {
             'id': token['id'],
             'client_id': token['client_id'],
-            'token': token['token'],
+            'token_prefix': token['token_prefix'],
             'token_name': token['token_name'],
             'is_active': token['is_active'],
             'created_at': token['created_at'],
@@ -188,65 +207,64 @@ def verify_token():
     claims = get_jwt()
     role = claims.get('role')
     
-    supabase = get_supabase()
-    
-    if role == 'super_admin':
-        response = supabase.table('super_admin').select('*').eq('id', identity).execute()
-        if response.data:
-            user = response.data[0]
-            return jsonify({
-                'valid': True,
-                'role': role,
-                'user': {
-                    'id': user['id'],
-                    'username': user['username'],
-                    'email': user['email'],
-                    'created_at': user['created_at'],
-                    'last_login': user['last_login'],
-                    'is_active': user['is_active']
-                }
-            }), 200
-    
-    elif role == 'client_admin':
-        response = supabase.table('white_label_clients').select('*').eq('id', identity).execute()
-        if response.data:
-            user = response.data[0]
-            tokens_response = supabase.table('user_tokens').select('id', count='exact').eq('client_id', user['id']).eq('is_active', True).execute()
-            active_tokens_count = tokens_response.count if tokens_response.count else 0
-            
-            return jsonify({
-                'valid': True,
-                'role': role,
-                'user': {
-                    'id': user['id'],
-                    'client_name': user['client_name'],
-                    'subdomain': user['subdomain'],
-                    'admin_username': user['admin_username'],
-                    'admin_email': user['admin_email'],
-                    'logo_url': user['logo_url'],
-                    'primary_color': user['primary_color'],
-                    'secondary_color': user['secondary_color'],
-                    'accent_color': user['accent_color'],
-                    'text_color': user['text_color'],
-                    'is_active': user['is_active'],
-                    'created_at': user['created_at'],
-                    'last_login': user['last_login'],
-                    'subscription_tier': user['subscription_tier'],
-                    'max_tokens': user['max_tokens'],
-                    'active_tokens_count': active_tokens_count
-                }
-            }), 200
-    
-    elif role == 'token_user':
-        response = supabase.table('user_tokens').select('*').eq('id', identity).execute()
-        if response.data:
-            token = response.data[0]
-            return jsonify({
-                'valid': True,
-                'role': role,
-                'token': token,
-                'client_id': token['client_id']
-            }), 200
+    # Claims-only check: the signature and expiry were verified above, no database read
+    if request.args.get('fresh', 'true').lower() in ('0', 'false'):
+        return jsonify({
+            'valid': True,
+            'role': role,
+            'identity': identity,
+            'client_id': claims.get('client_id'),
+            'token_id': claims.get('token_id'),
+            'claims_only': True
+        }), 200
+    
+    user = load_principal(role, identity)
+    
+    if role == 'super_admin' and user:
+        return jsonify({
+            'valid': True,
+            'role': role,
+            'user': {
+                'id': user['id'],
+                'username': user['username'],
+                'email': user['email'],
+                'created_at': user['created_at'],
+                'last_login': user['last_login'],
+                'is_active': user['is_active']
+            }
+        }), 200
+    
+    elif role == 'client_admin' and user:
+        return jsonify({
+            'valid': True,
+            'role': role,
+            'user': {
+                'id': user['id'],
+                'client_name': user['client_name'],
+                'subdomain': user['subdomain'],
+                'admin_username': user['admin_username'],
+                'admin_email': user['admin_email'],
+                'logo_url': user['logo_url'],
+                'primary_color': user['primary_color'],
+                'secondary_color': user['secondary_color'],
+                'accent_color': user['accent_color'],
+                'text_color': user['text_color'],
+                'is_active': user['is_active'],
+                'created_at': user['created_at'],
+                'last_login': user['last_login'],
+                'subscription_tier': user['subscription_tier'],
+                'max_tokens': user['max_tokens'],
+                'active_tokens_count': user['active_tokens_count']
+            }
+        }), 200
+    
+    elif role == 'token_user' and user:
+        return jsonify({
+            'valid': True,
+            'role': role,
+            'token': user,
+            'client_id': user['client_id']
+        }), 200
     
     return jsonify({'valid': False, 'error': 'Invalid token'}), 401
 
@@ -1,13 +1,23 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
 from db_client import get_supabase
-from utils.auth_helpers import client_admin_required, log_activity
+from utils.auth_helpers import client_admin_required, log_activity, invalidate_token_cache, invalidate_principal
 from models import set_password_hash
+from signals.service import invalidate_customization
+from signals.history import get_signal_stats
+from signals.engine import DEFAULT_CUSTOMIZATION
+from utils.token_digest import PREFIX_LENGTH, token_columns, public_token
 from datetime import datetime
+import csv
+import io
+import json
 import secrets
 
 client_bp = Blueprint('client', __name__)
 
+MAX_BULK_TOKENS = 10000
+TOKEN_EXPORT_FIELDS = ['id', 'token_name', 'token', 'expiry_date']
+
 @client_bp.route('/profile', methods=['GET'])
 @jwt_required()
 @client_admin_required()
@@ -59,6 +69,8 @@ def update_profile():
     
     if updates:
         supabase.table('white_label_clients').update(updates).eq('id', client_id).execute()
+        invalidate_token_cache(client_id=client_id)
+        invalidate_principal('client_admin', client_id)
         log_activity(client_id, None, 'settings_change', 'Profile updated')
     
     # Get updated client
@@ -94,6 +106,8 @@ def update_theme():
     
     if updates:
         supabase.table('white_label_clients').update(updates).eq('id', client_id).execute()
+        invalidate_token_cache(client_id=client_id)
+        invalidate_principal('client_admin', client_id)
         log_activity(client_id, None, 'theme_update', 'Theme colors updated')
     
     # Get updated colors
@@ -113,17 +127,7 @@ def get_customization():
     
     if not response.data:
         # Create default customization
-        default_customization = {
-            'client_id': client_id,
-            'enabled_assets': ['BTCUSDT', 'ETHUSDT', 'BNBUSDT'],
-            'enabled_timeframes': ['1m', '5m', '15m', '1h', '4h', '1d'],
-            'confluence_threshold': 3,
-            'rsi_enabled': True,
-            'macd_enabled': True,
-            'bb_enabled': True,
-            'ema_enabled': True,
-            'volume_enabled': True
-        }
+        default_customization = {'client_id': client_id, **DEFAULT_CUSTOMIZATION}
         response = supabase.table('client_customization').insert(default_customization).execute()
         return jsonify(response.data[0]), 200
     
@@ -161,11 +165,23 @@ def update_customization():
         updates['volume_enabled'] = data['volume_enabled']
     
     response = supabase.table('client_customization').update(updates).eq('client_id', client_id).execute()
+    invalidate_customization(client_id)
+    invalidate_token_cache(client_id=client_id)
     
     log_activity(client_id, None, 'settings_change', 'Customization settings updated')
     
     return jsonify(response.data[0] if response.data else {}), 200
 
+@client_bp.route('/signal-stats', methods=['GET'])
+@jwt_required()
+@client_admin_required()
+def signal_stats():
+    """Get signal win-rate statistics per asset and timeframe"""
+    claims = get_jwt()
+    client_id = claims.get('client_id')
+    
+    return jsonify(get_signal_stats(client_id)), 200
+
 @client_bp.route('/tokens', methods=['GET'])
 @jwt_required()
 @client_admin_required()
@@ -177,7 +193,8 @@ def get_tokens():
     supabase = get_supabase()
     response = supabase.table('user_tokens').select('*').eq('client_id', client_id).order('created_at', desc=True).execute()
     
-    tokens = response.data if response.data else []
+    # Only the lookup prefix is returned; tokens are shown once, when created
+    tokens = [public_token(t) for t in response.data] if response.data else []
     active_count = len([t for t in tokens if t['is_active']])
     
     return jsonify({
@@ -186,6 +203,41 @@ def get_tokens():
         'active': active_count
     }), 200
 
+def token_fields_error(token_name, expiry_date):
+    """Why token_name/expiry_date from a request cannot be stored, or None"""
+    if token_name is not None and (not isinstance(token_name, str) or not token_name.strip()):
+        return 'token_name must be a non-empty string'
+    if expiry_date is not None:
+        try:
+            datetime.fromisoformat(expiry_date)
+        except (TypeError, ValueError):
+            return 'expiry_date must be an ISO 8601 date'
+    return None
+
+def issue_tokens(client_id, names, expiry_date=None):
+    """
+    Create one token per name in a single call, after an atomic quota check
+    Returns (rows including the plaintext token, tokens still available);
+    rows is None when they do not fit, and both are None for an unknown client.
+    """
+    token_strings = [secrets.token_urlsafe(32) for _ in names]
+    payload = [{'token_name': name or f'Token-{token_string[:PREFIX_LENGTH]}',
+                'expiry_date': expiry_date, **token_columns(token_string)}
+               for name, token_string in zip(names, token_strings)]
+    
+    supabase = get_supabase()
+    result = supabase.rpc('issue_user_tokens', {'p_client_id': client_id, 'tokens': payload}).execute().data
+    
+    if not result:
+        return None, None
+    if result['tokens'] is None:
+        return None, result['available']
+    
+    plaintext = {row['token_hash']: token_string for row, token_string in zip(payload, token_strings)}
+    tokens = [{**public_token(row), 'token': plaintext[row['token_hash']]} for row in result['tokens']]
+    invalidate_principal('client_admin', client_id)
+    return tokens, result['available']
+
 @client_bp.route('/tokens', methods=['POST'])
 @jwt_required()
 @client_admin_required()
@@ -194,41 +246,79 @@ def create_token():
     claims = get_jwt()
     client_id = claims.get('client_id')
     
-    supabase = get_supabase()
+    data = request.get_json() or {}
+    
+    error = token_fields_error(data.get('token_name'), data.get('expiry_date'))
+    if error:
+        return jsonify({'error': error}), 400
     
-    # Get client to check token limit
-    client_response = supabase.table('white_label_clients').select('max_tokens').eq('id', client_id).execute()
-    client = client_response.data[0] if client_response.data else None
+    tokens, available = issue_tokens(client_id, [data.get('token_name')], data.get('expiry_date'))
     
-    if not client:
+    if available is None:
         return jsonify({'error': 'Client not found'}), 404
+    if tokens is None:
+        return jsonify({'error': 'Token limit reached'}), 400
     
-    # Check token limit
-    tokens_response = supabase.table('user_tokens').select('id', count='exact').eq('client_id', client_id).eq('is_active', True).execute()
-    active_tokens = tokens_response.count if tokens_response.count else 0
+    token = tokens[0]
+    log_activity(client_id, token['id'], 'token_created', f'Token {token["token_name"]} created')
+    return jsonify(token), 201
+
+@client_bp.route('/tokens/bulk', methods=['POST'])
+@jwt_required()
+@client_admin_required()
+def create_tokens_bulk():
+    """Create many user tokens at once, returned as a CSV or JSON download"""
+    claims = get_jwt()
+    client_id = claims.get('client_id')
     
-    if active_tokens >= client['max_tokens']:
-        return jsonify({'error': f'Token limit reached ({client["max_tokens"]})'}), 400
+    data = request.get_json() or {}
+    count = data.get('count')
+    output = request.args.get('format', data.get('format', 'csv'))
     
-    data = request.get_json()
+    # bool is an int subclass: {"count": true} must not mean one token
+    if isinstance(count, bool) or not isinstance(count, int) or not 1 <= count <= MAX_BULK_TOKENS:
+        return jsonify({'error': f'count must be between 1 and {MAX_BULK_TOKENS}'}), 400
+    if output not in ('csv', 'json'):
+        return jsonify({'error': 'format must be csv or json'}), 400
+    error = token_fields_error(data.get('token_name'), data.get('expiry_date'))
+    if error:
+        return jsonify({'error': error}), 400
     
-    # Generate unique token
-    token_string = secrets.token_urlsafe(32)
+    base_name = data.get('token_name') or 'Token'
+    names = [f'{base_name}-{i + 1}' for i in range(count)]
+    tokens, available = issue_tokens(client_id, names, data.get('expiry_date'))
     
-    new_token = {
-        'client_id': client_id,
-        'token': token_string,
-        'token_name': data.get('token_name', f'Token-{active_tokens + 1}'),
-        'expiry_date': data.get('expiry_date')
-    }
+    if available is None:
+        return jsonify({'error': 'Client not found'}), 404
+    if tokens is None:
+        return jsonify({'error': f'Token limit reached ({available} tokens available)'}), 400
     
-    response = supabase.table('user_tokens').insert(new_token).execute()
+    log_activity(client_id, None, 'token_created', f'{len(tokens)} tokens created in bulk')
     
-    if response.data:
-        log_activity(client_id, response.data[0]['id'], 'token_created', f'Token {response.data[0]["token_name"]} created')
-        return jsonify(response.data[0]), 201
+    # The only copy of the plaintext tokens: never cached
+    headers = {'Cache-Control': 'no-store', 'X-Tokens-Available': str(available)}
+    if output == 'json':
+        return Response(stream_json(tokens), mimetype='application/json', headers=headers)
     
-    return jsonify({'error': 'Failed to create token'}), 500
+    headers['Content-Disposition'] = 'attachment; filename="tokens.csv"'
+    return Response(stream_csv(tokens), mimetype='text/csv', headers=headers)
+
+def stream_csv(tokens):
+    """CSV of issued tokens, one chunk per row"""
+    line = io.StringIO()
+    writer = csv.writer(line)
+    for row in [TOKEN_EXPORT_FIELDS] + [[token[field] for field in TOKEN_EXPORT_FIELDS] for token in tokens]:
+        writer.writerow(row)
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+
+def stream_json(tokens):
+    """JSON array of issued tokens, one chunk per token"""
+    yield '{"tokens": ['
+    for i, token in enumerate(tokens):
+        yield (',' if i else '') + json.dumps({field: token[field] for field in TOKEN_EXPORT_FIELDS})
+    yield ']}'
 
 @client_bp.route('/tokens/<int:token_id>', methods=['DELETE'])
 @jwt_required()
@@ -250,6 +340,9 @@ def delete_token(token_id):
     
     # Deactivate token
     supabase.table('user_tokens').update({'is_active': False}).eq('id', token_id).execute()
+    invalidate_token_cache(token_id=token_id)
+    invalidate_principal('token_user', token_id)
+    invalidate_principal('client_admin', client_id)
     
     log_activity(client_id, token_id, 'token_deleted', f'Token {token["token_name"]} deactivated')
     
@@ -276,8 +369,11 @@ def toggle_token(token_id):
     
     # Toggle status
     update_response = supabase.table('user_tokens').update({'is_active': new_status}).eq('id', token_id).execute()
+    invalidate_token_cache(token_id=token_id)
+    invalidate_principal('token_user', token_id)
+    invalidate_principal('client_admin', client_id)
     
     status = 'activated' if new_status else 'deactivated'
     log_activity(client_id, token_id, 'settings_change', f'Token {token["token_name"]} {status}')
     
-    return jsonify(update_response.data[0] if update_response.data else {}), 200
\ No newline at end of file
+    return jsonify(public_token(update_response.data[0]) if update_response.data else {}), 200
\ No newline at end of file
@@ -0,0 +1,76 @@
+from flask import Blueprint, request, jsonify
+from flask_jwt_extended import jwt_required, get_jwt
+from utils.auth_helpers import token_required
+from market_data.fetcher import INTERVAL_MS
+from signals.engine import client_pairs
+from signals.service import get_signal_service, get_customization
+from signals.history import get_signal_history
+
+signals_bp = Blueprint('signals', __name__)
+
+def record_signal(claims, signal):
+    """Add a signal shown to a token user to the client's signal history"""
+    try:
+        get_signal_history().record(claims.get('client_id'), signal, claims.get('token_id'))
+    except Exception as e:
+        print(f"Error recording signal: {str(e)}")
+
+@signals_bp.route('/scan', methods=['GET'])
+@jwt_required()
+@token_required()
+def scan_signals():
+    """Scan every enabled asset and return the signals ranked, best setup first"""
+    claims = get_jwt()
+    customization = get_customization(claims.get('client_id'))
+    pairs = client_pairs(customization)
+
+    timeframe = request.args.get('timeframe')
+    if timeframe:
+        if timeframe not in INTERVAL_MS:
+            return jsonify({'error': f'Invalid timeframe: {timeframe}'}), 400
+        pairs = [pair for pair in pairs if pair[1] == timeframe]
+        if not pairs:
+            return jsonify({'error': 'Timeframe not enabled'}), 403
+
+    dedupe = request.args.get('dedupe', 'false').lower() == 'true'
+    signals, failed = get_signal_service().scan(pairs, customization, dedupe=dedupe)
+    best = next((s for s in signals if s['hasSignal']), None)
+    if best:
+        record_signal(claims, best)
+
+    return jsonify({
+        'best': best,
+        'signals': signals,
+        'errors': [{'symbol': symbol, 'timeframe': tf, 'error': error} for (symbol, tf), error in failed.items()]
+    }), 200
+
+@signals_bp.route('/<symbol>', methods=['GET'])
+@jwt_required()
+@token_required()
+def get_signal(symbol):
+    """Get the confluence signal for one asset, served from the shared cache"""
+    claims = get_jwt()
+    client_id = claims.get('client_id')
+    symbol = symbol.upper()
+    timeframe = request.args.get('timeframe', '1h')
+
+    if timeframe not in INTERVAL_MS:
+        return jsonify({'error': f'Invalid timeframe: {timeframe}'}), 400
+
+    customization = get_customization(client_id)
+
+    # Empty asset/timeframe lists fall back to the defaults, as in the precompute
+    pairs = client_pairs(customization)
+    if symbol not in {s for s, _ in pairs}:
+        return jsonify({'error': 'Asset not enabled'}), 403
+    if (symbol, timeframe) not in pairs:
+        return jsonify({'error': 'Timeframe not enabled'}), 403
+
+    try:
+        signal = get_signal_service().get_signal(symbol, timeframe, customization)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 502
+
+    record_signal(claims, signal)
+
+    return jsonify(signal), 200
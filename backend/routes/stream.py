@@ -0,0 +1,48 @@
+from flask import Blueprint, Response
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from utils.auth_helpers import token_required, token_session_error
+from signals.service import get_signal_service, get_customization
+from signals.stream import get_signal_hub, encode_event
+
+stream_bp = Blueprint('stream', __name__)
+
+# EventSource cannot set headers, so the JWT may also come as ?jwt=<token>
+JWT_LOCATIONS = ['headers', 'query_string']
+
+@stream_bp.route('/signals', methods=['GET'])
+@jwt_required(locations=JWT_LOCATIONS)
+@token_required(locations=JWT_LOCATIONS)
+def stream_signals():
+    """Server-sent events with signal updates and price ticks for the client's enabled assets"""
+    claims = get_jwt()
+    identity = get_jwt_identity()
+    client_id = claims.get('client_id')
+    customization = get_customization(client_id)
+
+    hub = get_signal_hub()
+    service = get_signal_service()
+
+    def check():
+        # Revoked tokens and expired JWTs end the stream; a database error does not
+        try:
+            return token_session_error(identity, claims)
+        except Exception as e:
+            print(f"[Stream] Session check failed: {e}")
+            return None
+
+    def generate():
+        subscriber = hub.subscribe(client_id, customization)
+        try:
+            yield b'retry: 3000\n\n'
+            # Current signals first, so a new connection does not wait for the next candle
+            for symbol, timeframe in sorted(subscriber.pairs):
+                try:
+                    yield encode_event('signal', service.get_signal(symbol, timeframe, customization))
+                except ValueError:
+                    pass
+            yield from subscriber.events(check=check)
+        finally:
+            hub.unsubscribe(subscriber)
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
@@ -2,7 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import (db, SuperAdmin, WhiteLabelClient, UserToken, ClientCustomization, 
                     ActivityLog, Analytics, SystemSettings, APIKey)
-from utils.auth_helpers import super_admin_required, log_activity
+from utils.auth_helpers import super_admin_required, log_activity, invalidate_token_cache, invalidate_principal
 from datetime import datetime, timedelta
 from sqlalchemy import func
 
@@ -194,6 +194,8 @@ def update_client(client_id):
         client.set_password(data['admin_password'])
     
     db.session.commit()
+    invalidate_token_cache(client_id=client_id)
+    invalidate_principal('client_admin', client_id)
     
     return jsonify(client.to_dict()), 200
 
@@ -210,6 +212,8 @@ def delete_client(client_id):
     # Soft delete - just deactivate
     client.is_active = False
     db.session.commit()
+    invalidate_token_cache(client_id=client_id)
+    invalidate_principal('client_admin', client_id)
     
     return jsonify({'message': 'Client deactivated successfully'}), 200
 
@@ -225,6 +229,8 @@ def toggle_client_status(client_id):
     
     client.is_active = not client.is_active
     db.session.commit()
+    invalidate_token_cache(client_id=client_id)
+    invalidate_principal('client_admin', client_id)
     
     return jsonify(client.to_dict()), 200
 
@@ -411,6 +417,9 @@ def bulk_update_clients():
             client.max_tokens = updates['max_tokens']
     
     db.session.commit()
+    for client in clients:
+        invalidate_token_cache(client_id=client.id)
+        invalidate_principal('client_admin', client.id)
     
     return jsonify({
         'message': f'Updated {len(clients)} clients',
@@ -449,5 +458,6 @@ def update_super_admin_profile():
         admin.set_password(data['password'])
     
     db.session.commit()
+    invalidate_principal('super_admin', admin_id)
     
     return jsonify(admin.to_dict()), 200
@@ -0,0 +1,63 @@
+-- Signal history and outcome statistics
+
+CREATE TABLE IF NOT EXISTS signal_history (
+    id BIGSERIAL PRIMARY KEY,
+    client_id INTEGER NOT NULL REFERENCES white_label_clients(id) ON DELETE CASCADE,
+    token_id INTEGER REFERENCES user_tokens(id) ON DELETE SET NULL,
+    symbol VARCHAR(20) NOT NULL,
+    timeframe VARCHAR(4) NOT NULL,
+    direction SMALLINT NOT NULL,          -- 1 CALL, -1 PUT
+    confluences SMALLINT NOT NULL,
+    probability SMALLINT NOT NULL,
+    entry_price DOUBLE PRECISION NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL,
+    outcome SMALLINT                      -- 1 win, -1 loss, 0 tie, 2 void; NULL until settled
+);
+
+CREATE INDEX IF NOT EXISTS idx_signal_history_client_created ON signal_history(client_id, created_at DESC);
+-- Only unsettled rows are indexed, so the evaluator's lookup stays small
+CREATE INDEX IF NOT EXISTS idx_signal_history_pending ON signal_history(expires_at) WHERE outcome IS NULL;
+
+CREATE TABLE IF NOT EXISTS signal_stats (
+    client_id INTEGER NOT NULL REFERENCES white_label_clients(id) ON DELETE CASCADE,
+    symbol VARCHAR(20) NOT NULL,
+    timeframe VARCHAR(4) NOT NULL,
+    wins INTEGER NOT NULL DEFAULT 0,
+    losses INTEGER NOT NULL DEFAULT 0,
+    ties INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (client_id, symbol, timeframe)
+);
+
+DROP FUNCTION IF EXISTS add_signal_outcomes(JSONB);
+
+-- Settle signals and count them in one transaction: [{id, outcome}, ...]
+-- Only rows still unsettled are claimed, so concurrent evaluators never count
+-- a signal twice; wins, losses and ties of the claimed rows are added to
+-- signal_stats. Returns {"<outcome>": settled rows, ...}
+CREATE OR REPLACE FUNCTION settle_signal_outcomes(outcomes JSONB)
+RETURNS JSONB AS $$
+    WITH claimed AS (
+        UPDATE signal_history AS h SET outcome = (o->>'outcome')::SMALLINT
+        FROM jsonb_array_elements(outcomes) AS o
+        WHERE h.id = (o->>'id')::BIGINT AND h.outcome IS NULL
+        RETURNING h.client_id, h.symbol, h.timeframe, h.outcome
+    ), counted AS (
+        INSERT INTO signal_stats (client_id, symbol, timeframe, wins, losses, ties)
+        SELECT client_id, symbol, timeframe,
+               COUNT(*) FILTER (WHERE outcome = 1),
+               COUNT(*) FILTER (WHERE outcome = -1),
+               COUNT(*) FILTER (WHERE outcome = 0)
+        FROM claimed
+        WHERE outcome IN (1, -1, 0)
+        GROUP BY client_id, symbol, timeframe
+        ON CONFLICT (client_id, symbol, timeframe) DO UPDATE SET
+            wins = signal_stats.wins + EXCLUDED.wins,
+            losses = signal_stats.losses + EXCLUDED.losses,
+            ties = signal_stats.ties + EXCLUDED.ties,
+            updated_at = NOW()
+    )
+    SELECT COALESCE(jsonb_object_agg(outcome, settled), '{}'::JSONB)
+    FROM (SELECT outcome, COUNT(*) AS settled FROM claimed GROUP BY outcome) AS c;
+$$ LANGUAGE SQL;
@@ -0,0 +1,11 @@
+-- Atomic token usage increments for the write-behind usage counters
+
+-- Add batched login counts: [{token_id, count, last_used}, ...]
+CREATE OR REPLACE FUNCTION increment_token_usage(usages JSONB)
+RETURNS VOID AS $$
+    UPDATE user_tokens AS t SET
+        usage_count = COALESCE(t.usage_count, 0) + (u->>'count')::INTEGER,
+        last_used = GREATEST(t.last_used, (u->>'last_used')::TIMESTAMP)
+    FROM jsonb_array_elements(usages) AS u
+    WHERE t.id = (u->>'token_id')::INTEGER;
+$$ LANGUAGE SQL;
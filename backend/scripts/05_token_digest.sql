@@ -0,0 +1,21 @@
+-- Keyed token digests: tokens are looked up by an indexed prefix and verified
+-- against an HMAC digest; the plaintext column is emptied by the migration
+-- (python -m utils.token_digest) and no longer written
+
+ALTER TABLE user_tokens ADD COLUMN IF NOT EXISTS token_prefix VARCHAR(8);
+ALTER TABLE user_tokens ADD COLUMN IF NOT EXISTS token_hash VARCHAR(64);
+ALTER TABLE user_tokens ALTER COLUMN token DROP NOT NULL;
+
+CREATE INDEX IF NOT EXISTS idx_user_tokens_prefix ON user_tokens (token_prefix);
+
+-- Store digests computed by the migration and clear the plaintext:
+-- [{id, token_prefix, token_hash}, ...]
+CREATE OR REPLACE FUNCTION set_token_digests(digests JSONB)
+RETURNS VOID AS $$
+    UPDATE user_tokens AS t SET
+        token_prefix = d->>'token_prefix',
+        token_hash = d->>'token_hash',
+        token = NULL
+    FROM jsonb_array_elements(digests) AS d
+    WHERE t.id = (d->>'id')::INTEGER;
+$$ LANGUAGE SQL;
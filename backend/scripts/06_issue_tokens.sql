@@ -0,0 +1,36 @@
+-- Token issuance with an atomic quota check: the client row is locked while
+-- its active tokens are counted, so parallel requests cannot exceed max_tokens
+
+-- Insert tokens for a client if they fit in its quota:
+-- tokens = [{token_name, token_prefix, token_hash, expiry_date}, ...]
+-- Returns {"available": n, "tokens": [inserted rows] | null}, with token_hash
+-- so the caller can pair rows with its plaintext tokens; nothing is inserted
+-- when the request does not fit.
+CREATE OR REPLACE FUNCTION issue_user_tokens(p_client_id INTEGER, tokens JSONB)
+RETURNS JSONB AS $$
+DECLARE
+    quota INTEGER;
+    active INTEGER;
+    issued JSONB;
+BEGIN
+    SELECT max_tokens INTO quota FROM white_label_clients WHERE id = p_client_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RETURN NULL;
+    END IF;
+
+    SELECT COUNT(*) INTO active FROM user_tokens WHERE client_id = p_client_id AND is_active;
+    IF active + jsonb_array_length(tokens) > quota THEN
+        RETURN jsonb_build_object('available', GREATEST(quota - active, 0), 'tokens', NULL);
+    END IF;
+
+    WITH inserted AS (
+        INSERT INTO user_tokens (client_id, token_name, token_prefix, token_hash, expiry_date)
+        SELECT p_client_id, t->>'token_name', t->>'token_prefix', t->>'token_hash', (t->>'expiry_date')::TIMESTAMP
+        FROM jsonb_array_elements(tokens) AS t
+        RETURNING id, client_id, token_name, token_prefix, token_hash, is_active, created_at, last_used, expiry_date, usage_count
+    )
+    SELECT jsonb_agg(to_jsonb(inserted) ORDER BY id) INTO issued FROM inserted;
+
+    RETURN jsonb_build_object('available', quota - active - jsonb_array_length(tokens), 'tokens', issued);
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,8 @@
+"""
+Server-side confluence signals
+"""
+
+from signals.engine import SignalEngine, client_pairs
+from signals.cache import SignalCache
+from signals.stream import SignalHub
+from signals.correlation import RollingCorrelation, CorrelationTracker
@@ -0,0 +1,125 @@
+"""
+Signal result cache shared across tenants
+Rule results are cached per (symbol, timeframe, last closed candle time,
+indicator config hash) with LRU eviction. The candle time in the key moves
+forward when a new candle closes, so stale entries stop matching and are
+purged; concurrent misses on the same key wait for a single computation.
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from market_data.fetcher import INTERVAL_MS
+
+def config_hash(config):
+    """Stable short hash of an indicator configuration dict"""
+    payload = json.dumps(config, sort_keys=True, default=str).encode()
+    return hashlib.sha1(payload).hexdigest()[:12]
+
+def last_closed_candle(interval, now=None):
+    """Open time (ms) of the most recent closed candle of `interval`"""
+    now_ms = int((time.time() if now is None else now) * 1000)
+    size = INTERVAL_MS[interval]
+    return now_ms - now_ms % size - size
+
+def seconds_until_close(interval, now=None, delay=1.0):
+    """Seconds until `delay` after the next candle close of interval"""
+    size = INTERVAL_MS[interval] / 1000
+    now = time.time() if now is None else now
+    return size - now % size + delay
+
+class SignalCache:
+    """Bounded LRU cache with single-flight computation"""
+
+    def __init__(self, max_entries=10_000):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        # (symbol, timeframe) -> (candle time, keys cached for that candle)
+        self._series = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._entries[key]
+        return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._store(key, value)
+
+    def _store(self, key, value):
+        series, candle_time = key[:2], key[2]
+        current = self._series.get(series)
+        if current is not None and current[0] > candle_time:
+            return
+        # Entries for an older candle of the same series can never match again
+        if current is None or current[0] < candle_time:
+            if current is not None:
+                for k in current[1]:
+                    del self._entries[k]
+            current = self._series[series] = (candle_time, set())
+
+        current[1].add(key)
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._unindex(evicted)
+            self.stats['evictions'] += 1
+
+    def _unindex(self, key):
+        keys = self._series[key[:2]][1]
+        keys.discard(key)
+        if not keys:
+            del self._series[key[:2]]
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing it once if missing"""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return self._entries[key]
+
+            event = self._inflight.get(key)
+            leader = event is None
+            if leader:
+                event = self._inflight[key] = threading.Event()
+                self.stats['misses'] += 1
+
+        if not leader:
+            event.wait()
+            value = self.get(key)
+            if value is not None:
+                return value
+            # The leader failed; compute for this caller instead
+            return compute()
+
+        try:
+            value = compute()
+            with self._lock:
+                self._store(key, value)
+            return value
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            event.set()
+
+    def invalidate(self, symbol=None, timeframe=None):
+        """Drop entries for a symbol and/or timeframe (all entries when both are None)"""
+        with self._lock:
+            for series in [s for s in self._series
+                           if (symbol is None or s[0] == symbol) and (timeframe is None or s[1] == timeframe)]:
+                for key in self._series.pop(series)[1]:
+                    del self._entries[key]
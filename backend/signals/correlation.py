@@ -0,0 +1,196 @@
+"""
+Cross-asset return correlations
+RollingCorrelation keeps the last `window` log returns of every tracked
+symbol with running sums and a running cross-product matrix, so closing
+candles update the whole matrix with two outer products instead of a full
+recompute. CorrelationTracker feeds it closed candles from a klines provider,
+and flag_correlated marks same-direction signals that move together.
+"""
+
+import threading
+import time
+
+import numpy as np
+
+from market_data.fetcher import INTERVAL_MS, get_fetcher
+from signals.engine import klines_to_arrays
+
+class RollingCorrelation:
+    """
+    Rolling correlation matrix of equally weighted return vectors
+    The sums are rebuilt from the ring buffer once per lap so floating-point
+    drift cannot accumulate
+    """
+    __slots__ = ('window', 'returns', 'index', 'count', 'total', 'cross')
+
+    def __init__(self, size, window=100):
+        self.window = window
+        self.returns = np.zeros((window, size))
+        self.index = 0
+        self.count = 0
+        self.total = np.zeros(size)
+        self.cross = np.zeros((size, size))
+
+    @property
+    def size(self):
+        return self.returns.shape[1]
+
+    def update(self, returns):
+        """Add one return vector (size,) or a batch (m, size), oldest first"""
+        returns = np.atleast_2d(np.asarray(returns, dtype=np.float64))[-self.window:]
+        m = len(returns)
+        if m == 0:
+            return
+
+        # Rows not filled yet are zero, so subtracting them is a no-op
+        positions = (self.index + np.arange(m)) % self.window
+        old = self.returns[positions]
+        self.total += returns.sum(axis=0) - old.sum(axis=0)
+        self.cross += returns.T @ returns - old.T @ old
+        self.returns[positions] = returns
+
+        wrapped = self.index + m >= self.window
+        self.index = (self.index + m) % self.window
+        self.count = min(self.count + m, self.window)
+        if wrapped:
+            self.total = self.returns.sum(axis=0)
+            self.cross = self.returns.T @ self.returns
+
+    def matrix(self):
+        """(size, size) correlation matrix; 0 where a series has no variance"""
+        if self.count < 2:
+            return np.eye(self.size)
+
+        mean = self.total / self.count
+        cov = self.cross / self.count - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(cov), 0.0, None))
+        scale = np.outer(std, std)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.where(scale > 0, cov / scale, 0.0)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, 1.0)
+        return corr
+
+class CorrelationTracker:
+    """Correlation matrix of one interval's closed candles for a growing set of symbols"""
+
+    def __init__(self, klines_provider, interval='1h', window=100):
+        self.klines_provider = klines_provider
+        self.interval = interval
+        self.window = window
+        self.symbols = []
+        self._positions = {}
+        self._last_close = None
+        self._last_time = None
+        self._matrix = RollingCorrelation(0, window)
+        self._lock = threading.Lock()
+
+    def _closed(self, symbol, limit, now):
+        arrays = klines_to_arrays(self.klines_provider(symbol, self.interval, limit))
+        closed = arrays['time'] + INTERVAL_MS[self.interval] <= now * 1000
+        return arrays['time'][closed], arrays['close'][closed]
+
+    def sync(self, symbols=(), now=None):
+        """
+        Track symbols and apply every candle closed since the last sync
+        Adding a symbol reseeds the matrix from history; otherwise only the
+        new candles are fetched and applied.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            new = {}
+            for symbol in dict.fromkeys(symbols):
+                if symbol not in self._positions:
+                    # Symbols without candles are not tracked
+                    try:
+                        new[symbol] = self._closed(symbol, self.window + 2, now)
+                    except Exception as e:
+                        print(f"[Correlation] Cannot track {symbol}: {e}")
+
+            reseed = bool(new) or self._last_time is None
+            if new:
+                self.symbols += list(new)
+                self._positions = {symbol: i for i, symbol in enumerate(self.symbols)}
+            if not self.symbols:
+                return
+
+            if reseed:
+                limit = self.window + 2
+            else:
+                elapsed = int((now * 1000 - self._last_time) // INTERVAL_MS[self.interval])
+                if elapsed < 2:
+                    return
+                limit = min(elapsed + 1, self.window + 2)
+
+            series = [new.get(symbol) or self._closed(symbol, limit, now) for symbol in self.symbols]
+
+            # Only candle times every symbol has are applied, in order
+            times = series[0][0]
+            for symbol_times, _ in series[1:]:
+                times = np.intersect1d(times, symbol_times)
+            if not reseed:
+                times = times[times > self._last_time]
+            if len(times) == 0:
+                return
+
+            closes = np.column_stack([close[np.searchsorted(t, times)] for t, close in series])
+            if reseed:
+                self._matrix = RollingCorrelation(len(self.symbols), self.window)
+                previous = closes[:1]
+                closes = closes[1:]
+            else:
+                previous = self._last_close[None, :]
+
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = np.log(closes / np.vstack([previous, closes[:-1]]))
+            self._matrix.update(np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0))
+            self._last_close = closes[-1] if len(closes) else previous[0]
+            self._last_time = times[-1]
+
+    def matrix(self, symbols=None):
+        """Correlation matrix for symbols (default: all tracked), in the given order"""
+        with self._lock:
+            corr = self._matrix.matrix()
+            if symbols is None:
+                return corr
+            index = [self._positions.get(symbol) for symbol in symbols]
+
+        out = np.eye(len(index))
+        known = [i for i, position in enumerate(index) if position is not None]
+        positions = [index[i] for i in known]
+        out[np.ix_(known, known)] = corr[np.ix_(positions, positions)]
+        return out
+
+def flag_correlated(signals, corr, threshold=0.8):
+    """
+    Mark signals that repeat a stronger same-direction signal on a correlated asset
+    signals must be ordered best first (like SignalService.scan) and corr must be
+    their correlation matrix in the same order. Each later signal whose
+    correlation with an earlier kept one of the same direction reaches threshold
+    gets correlatedWith (that signal's symbol) and correlation set.
+    Returns the signals that were kept.
+    """
+    direction = [s['signalType'] if s.get('hasSignal') else None for s in signals]
+    kept = []
+    for i, signal in enumerate(signals):
+        if direction[i] is None:
+            continue
+        leaders = [j for j in kept if direction[j] == direction[i]]
+        if leaders:
+            j = leaders[int(np.argmax(corr[i, leaders]))]
+            if corr[i, j] >= threshold:
+                signal['correlatedWith'] = signals[j]['symbol']
+                signal['correlation'] = round(float(corr[i, j]), 3)
+                continue
+        kept.append(i)
+    return [signals[i] for i in kept]
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+def get_correlation_tracker(interval='1h'):
+    """Shared CorrelationTracker for an interval, fed by the market data fetcher"""
+    with _trackers_lock:
+        if interval not in _trackers:
+            _trackers[interval] = CorrelationTracker(get_fetcher().get_klines, interval)
+        return _trackers[interval]
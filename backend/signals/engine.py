@@ -0,0 +1,438 @@
+"""
+Batch confluence scoring
+Server-side version of generateRealSignal in app.js. Indicators are computed
+once per (symbol, timeframe) for the whole batch; each tenant's
+client_customization is applied afterwards on the shared rule results.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import numpy as np
+
+from indicators import (
+    rsi,
+    macd,
+    bollinger_bands,
+    ema,
+    fibonacci_levels,
+    detect_price_action,
+    detect_levels,
+)
+
+# client_customization flag for each rule; rules without a flag are always on
+RULE_FLAGS = {
+    'RSI': 'rsi_enabled',
+    'MACD': 'macd_enabled',
+    'Bollinger Bands': 'bb_enabled',
+    'Tendência': 'ema_enabled',
+    'Volume': 'volume_enabled',
+}
+
+# Settings of a client without a client_customization row; also the row
+# created for it by GET /api/client/customization
+DEFAULT_CUSTOMIZATION = {
+    'enabled_assets': ['BTCUSDT', 'ETHUSDT', 'BNBUSDT'],
+    'enabled_timeframes': ['1m', '5m', '15m', '1h', '4h', '1d'],
+    'confluence_threshold': 3,
+    'rsi_enabled': True,
+    'macd_enabled': True,
+    'bb_enabled': True,
+    'ema_enabled': True,
+    'volume_enabled': True
+}
+
+def asset_name(symbol):
+    """BTCUSDT -> BTC/USDT"""
+    for quote in ('USDT', 'BUSD', 'USDC', 'BTC', 'ETH'):
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return f'{symbol[:-len(quote)]}/{quote}'
+    return symbol
+
+def klines_to_arrays(klines):
+    """
+    Convert a list of kline dicts (time, open, high, low, close, volume) to column arrays
+    Dicts of columns, e.g. KlineStore views, are passed through without copying
+    """
+    if isinstance(klines, dict):
+        return klines
+    return {
+        field: np.array([k[field] for k in klines], dtype=np.float64)
+        for field in ('time', 'open', 'high', 'low', 'close', 'volume')
+    }
+
+def _rule(name, call=0, put=0, confirmed=False, description='', status='neutral', missing=None):
+    return {
+        'name': name,
+        'call': call,
+        'put': put,
+        'confirmed': confirmed,
+        'analysis': {'name': name, 'description': description, 'status': status},
+        'missing': missing
+    }
+
+class SignalEngine:
+    """
+    Evaluates the confluence rules over batches of symbols and timeframes
+
+    klines_provider(symbol, interval, limit) must return candles ordered oldest
+    first, either as kline dicts like BinanceAPI.getKlines or as a dict of
+    column arrays like KlineStore.klines.
+    """
+
+    def __init__(self, klines_provider, history=100, entry_interval='1m', entry_history=60, workers=32):
+        self.klines_provider = klines_provider
+        self.history = history
+        self.entry_interval = entry_interval
+        self.entry_history = entry_history
+        self.workers = workers
+
+    # ------------------------------------------------------------------
+    # Data loading
+
+    def load(self, pairs):
+        """Fetch the candles needed for pairs; returns ({key: arrays}, {key: error})"""
+        primary = set(pairs)
+        entries = {(symbol, self.entry_interval) for symbol, _ in pairs}
+        needed = list(primary | entries)
+
+        def fetch(key):
+            symbol, interval = key
+            # A pair on the entry interval is both, so it needs the longer history
+            if key in primary:
+                limit = max(self.history, self.entry_history) if key in entries else self.history
+            else:
+                limit = self.entry_history
+            try:
+                return klines_to_arrays(self.klines_provider(symbol, interval, limit)), None
+            except Exception as e:
+                return None, str(e)
+
+        # Providers are I/O bound, so a large batch is fetched on a few threads
+        if self.workers > 1 and len(needed) > 1:
+            with ThreadPoolExecutor(max_workers=min(self.workers, len(needed))) as executor:
+                results = dict(zip(needed, executor.map(fetch, needed)))
+        else:
+            results = {key: fetch(key) for key in needed}
+
+        series = {key: arrays for key, (arrays, error) in results.items() if error is None}
+        errors = {key: error for key, (arrays, error) in results.items() if error is not None}
+        return series, errors
+
+    # ------------------------------------------------------------------
+    # Rule evaluation (shared by every tenant)
+
+    def evaluate_rules(self, series, pairs):
+        """
+        Run every rule for each pair, vectorized per group of equal-length series
+        Returns {(symbol, timeframe): [rule results]}
+        """
+        groups = {}
+        for pair in pairs:
+            if pair in series and (pair[0], self.entry_interval) in series:
+                groups.setdefault(len(series[pair]['close']), []).append(pair)
+
+        rules = {}
+        for length, group in groups.items():
+            if length == 0:
+                continue
+            closes = np.vstack([series[pair]['close'] for pair in group])
+            volumes = np.vstack([series[pair]['volume'] for pair in group])
+            entries = [series[(symbol, self.entry_interval)] for symbol, _ in group]
+
+            features = self._features(closes, volumes, entries)
+            for row, pair in enumerate(group):
+                rules[pair] = self._rules_for_row(features, row)
+        return rules
+
+    def _features(self, closes, volumes, entries):
+        # Same values as TechnicalIndicators.MACD, which are always 0, so the MACD
+        # rule gives the browser's weak PUT
+        macd_values = macd(closes)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            avg_volume = volumes[:, -20:].sum(axis=1) / 20
+            volume_ratio = volumes[:, -1] / avg_volume
+
+        price_action = []
+        for entry in entries:
+            price_action.extend(detect_price_action(entry['open'], entry['high'], entry['low'], entry['close']))
+
+        return {
+            'price': closes[:, -1],
+            'rsi': rsi(closes, 14),
+            'macd': macd_values,
+            'bb': bollinger_bands(closes, 20, 2),
+            'ema20': ema(closes, 20)[:, -1],
+            'ema50': ema(closes, 50)[:, -1],
+            'sr': detect_levels(closes, 0.015),
+            'fib': fibonacci_levels(closes[:, -50:]),
+            'price_action': price_action,
+            'volume_ratio': volume_ratio
+        }
+
+    def _rules_for_row(self, f, row):
+        price = float(f['price'][row])
+        return [
+            self._rsi_rule(float(f['rsi'][row])),
+            self._macd_rule({key: float(v[row]) for key, v in f['macd'].items()}),
+            self._bb_rule(price, float(f['bb']['lower'][row]), float(f['bb']['upper'][row])),
+            self._trend_rule(price, float(f['ema20'][row]), float(f['ema50'][row])),
+            self._sr_rule(price, f['sr'][row]),
+            self._fib_rule(price, {key: float(v[row]) for key, v in f['fib'].items()}),
+            self._price_action_rule(f['price_action'][row]),
+            self._volume_rule(float(f['volume_ratio'][row]))
+        ]
+
+    @staticmethod
+    def _rsi_rule(value):
+        if value < 30:
+            return _rule('RSI', call=25, confirmed=True, status='confirmed',
+                         description=f'RSI em sobrevenda ({value:.1f}) - Forte indicação de CALL')
+        if value > 70:
+            return _rule('RSI', put=25, confirmed=True, status='confirmed',
+                         description=f'RSI em sobrecompra ({value:.1f}) - Forte indicação de PUT')
+        if 45 <= value <= 55:
+            return _rule('RSI', description=f'RSI neutro ({value:.1f}) - Mercado equilibrado',
+                         missing=f'RSI neutro ({value:.1f}) - Sem sinal claro')
+        if value > 55:
+            return _rule('RSI', call=8, description=f'RSI em {value:.1f} - Leve força compradora',
+                         missing=f'RSI em {value:.1f} - Força insuficiente para confluência')
+        return _rule('RSI', put=8, description=f'RSI em {value:.1f} - Leve força vendedora',
+                     missing=f'RSI em {value:.1f} - Força insuficiente para confluência')
+
+    @staticmethod
+    def _macd_rule(m):
+        if m['histogram'] > 0 and m['macd'] > m['signal']:
+            return _rule('MACD', call=25, confirmed=True, status='confirmed',
+                         description='MACD positivo e acima do sinal - Momentum de alta confirmado')
+        if m['histogram'] < 0 and m['macd'] < m['signal']:
+            return _rule('MACD', put=25, confirmed=True, status='confirmed',
+                         description='MACD negativo e abaixo do sinal - Momentum de baixa confirmado')
+        if m['histogram'] > 0:
+            return _rule('MACD', call=10, description='MACD positivo mas fraco - Momentum altista moderado',
+                         missing='MACD positivo mas sem cruzamento confirmado')
+        return _rule('MACD', put=10, description='MACD negativo mas fraco - Momentum baixista moderado',
+                     missing='MACD negativo mas sem cruzamento confirmado')
+
+    @staticmethod
+    def _bb_rule(price, lower, upper):
+        width = upper - lower
+        position = (price - lower) / width * 100 if width else float('nan')
+
+        if position < 20:
+            return _rule('Bollinger Bands', call=20, confirmed=True, status='confirmed',
+                         description=f'Preço na banda inferior ({position:.0f}%) - Reversão para cima provável')
+        if position > 80:
+            return _rule('Bollinger Bands', put=20, confirmed=True, status='confirmed',
+                         description=f'Preço na banda superior ({position:.0f}%) - Reversão para baixo provável')
+        return _rule('Bollinger Bands',
+                     description=f'Preço no meio das Bollinger Bands ({position:.0f}%) - Volatilidade normal',
+                     missing=f'Preço no meio das bandas ({position:.0f}%) - Sem extremo')
+
+    @staticmethod
+    def _trend_rule(price, ema20, ema50):
+        if price > ema20 and ema20 > ema50:
+            return _rule('Tendência', call=20, confirmed=True, status='confirmed',
+                         description='Tendência de alta confirmada - Preço > EMA20 > EMA50')
+        if price < ema20 and ema20 < ema50:
+            return _rule('Tendência', put=20, confirmed=True, status='confirmed',
+                         description='Tendência de baixa confirmada - Preço < EMA20 < EMA50')
+        missing = 'Tendência de curto prazo sem confirmação de longo prazo'
+        if price > ema20:
+            return _rule('Tendência', call=10, missing=missing,
+                         description='Preço acima da EMA 20 - Tendência de curto prazo altista')
+        return _rule('Tendência', put=10, missing=missing,
+                     description='Preço abaixo da EMA 20 - Tendência de curto prazo baixista')
+
+    @staticmethod
+    def _sr_rule(price, levels):
+        support = levels.nearest_support(price)
+        resistance = levels.nearest_resistance(price)
+        support = support[0] if support else None
+        resistance = resistance[0] if resistance else None
+
+        if support is not None and abs(price - support) / price < 0.01:
+            return _rule('Suporte/Resistência', call=20, confirmed=True, status='confirmed',
+                         description=f'Preço próximo ao suporte forte ({support:.2f}) - Provável reversão')
+        if resistance is not None and abs(price - resistance) / price < 0.01:
+            return _rule('Suporte/Resistência', put=20, confirmed=True, status='confirmed',
+                         description=f'Preço próximo à resistência forte ({resistance:.2f}) - Provável reversão')
+        return _rule('Suporte/Resistência', description='Preço entre níveis de S/R - Sem sinal claro',
+                     missing='Preço distante de níveis críticos de S/R')
+
+    @staticmethod
+    def _fib_rule(price, fib):
+        levels = (('23.6%', fib['level_236']), ('38.2%', fib['level_382']),
+                  ('50%', fib['level_500']), ('61.8%', fib['level_618']))
+        near = next((name for name, level in levels if abs(price - level) / price < 0.008), None)
+
+        if near is None:
+            return _rule('Fibonacci', description='Preço fora dos níveis Fibonacci principais',
+                         missing='Preço fora dos níveis Fibonacci principais')
+        if price < fib['level_500']:
+            return _rule('Fibonacci', call=15, confirmed=True, status='confirmed',
+                         description=f'Preço no nível Fibonacci {near} - Zona de suporte')
+        return _rule('Fibonacci', put=15, confirmed=True, status='confirmed',
+                     description=f'Preço no nível Fibonacci {near} - Zona de resistência')
+
+    @staticmethod
+    def _price_action_rule(pa):
+        pattern = pa['pattern']
+        if pa['strength'] == 'strong':
+            if pa['signal'] == 'CALL':
+                return _rule('Price Action', call=20, confirmed=True, status='confirmed',
+                             description=f'Padrão {pattern} detectado - Forte sinal de alta')
+            return _rule('Price Action', put=20, confirmed=True, status='confirmed',
+                         description=f'Padrão {pattern} detectado - Forte sinal de baixa')
+        if pa['strength'] == 'moderate':
+            missing = f'Padrão {pattern} moderado - Força insuficiente'
+            if pa['signal'] == 'CALL':
+                return _rule('Price Action', call=10, missing=missing,
+                             description=f'Padrão {pattern} - Sinal moderado de alta')
+            return _rule('Price Action', put=10, missing=missing,
+                         description=f'Padrão {pattern} - Sinal moderado de baixa')
+        return _rule('Price Action', description='Sem padrão forte detectado',
+                     missing=f'{pattern} - Sem padrão forte detectado')
+
+    @staticmethod
+    def _volume_rule(ratio):
+        # The volume bonus depends on the final scores, so it is applied in combine()
+        if ratio > 1.5:
+            rule = _rule('Volume', status='confirmed',
+                         description=f'Volume {ratio * 100:.0f}% acima da média - Movimento confirmado')
+        elif ratio < 0.7:
+            rule = _rule('Volume', status='warning',
+                         description=f'Volume {ratio * 100:.0f}% da média - Baixa participação')
+        else:
+            rule = _rule('Volume', description='Volume dentro da média - Participação normal')
+        rule['bonus'] = 10 if ratio > 1.5 else 0
+        return rule
+
+    # ------------------------------------------------------------------
+    # Per-tenant combination
+
+    @staticmethod
+    def combine(symbol, timeframe, rules, customization=None):
+        """Apply a tenant's customization to shared rule results and build the signal payload"""
+        customization = customization or DEFAULT_CUSTOMIZATION
+        threshold = customization.get('confluence_threshold')
+        if threshold is None:
+            threshold = DEFAULT_CUSTOMIZATION['confluence_threshold']
+
+        call_score = 0
+        put_score = 0
+        analyses = []
+        confluences = []
+        missing = []
+        bonus = 0
+
+        for rule in rules:
+            flag = RULE_FLAGS.get(rule['name'])
+            if flag and customization.get(flag, True) is False:
+                continue
+            call_score += rule['call']
+            put_score += rule['put']
+            bonus += rule.get('bonus', 0)
+            analyses.append(rule['analysis'])
+            if rule['confirmed']:
+                confluences.append(rule['name'])
+            if rule['missing']:
+                missing.append(rule['missing'])
+
+        if bonus:
+            if call_score > put_score:
+                call_score += bonus
+            elif put_score > call_score:
+                put_score += bonus
+
+        total = len(confluences)
+        signal = {
+            'asset': asset_name(symbol),
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'probability': 50,
+            'analyses': analyses,
+            'signalType': 'NEUTRO',
+            'timestamp': datetime.utcnow().isoformat(),
+            'confluences': total,
+            'confidenceLevel': 0,
+            'hasSignal': False,
+            'callScore': call_score,
+            'putScore': put_score,
+            'detectedConfluences': confluences
+        }
+
+        if total >= threshold and call_score != put_score:
+            score = max(call_score, put_score)
+            signal.update({
+                'signalType': 'CALL' if call_score > put_score else 'PUT',
+                'probability': min(50 + score, 95),
+                'confidenceLevel': 5 if total >= 6 else 4 if total >= 5 else 3,
+                'hasSignal': True
+            })
+        else:
+            signal['missingConfluences'] = missing
+
+        return signal
+
+    # ------------------------------------------------------------------
+    # Public API
+
+    @property
+    def config(self):
+        """Settings that change rule results, used to key cached results"""
+        return {
+            'history': self.history,
+            'entry_interval': self.entry_interval,
+            'entry_history': self.entry_history
+        }
+
+    def compute_rules(self, pairs):
+        """Load candles and evaluate the shared rules; returns ({pair: rules}, {key: error})"""
+        series, errors = self.load(pairs)
+        return self.evaluate_rules(series, pairs), errors
+
+    def evaluate(self, pairs, customization=None):
+        """
+        Evaluate (symbol, timeframe) pairs for one customization
+        Returns {(symbol, timeframe): signal}; pairs whose candles could not be loaded map to {'error': ...}
+        """
+        pairs = list(dict.fromkeys(pairs))
+        rules, errors = self.compute_rules(pairs)
+        return self._build(pairs, rules, errors, customization)
+
+    def evaluate_for_clients(self, customizations):
+        """
+        Evaluate every tenant's enabled assets and timeframes in one batch
+        customizations maps client_id -> client_customization row. Pairs shared by
+        several tenants are fetched and scored once.
+        Returns {client_id: {(symbol, timeframe): signal}}
+        """
+        wanted = {client_id: client_pairs(c) for client_id, c in customizations.items()}
+        union = list(dict.fromkeys(pair for pairs in wanted.values() for pair in pairs))
+        rules, errors = self.compute_rules(union)
+
+        return {
+            client_id: self._build(pairs, rules, errors, customizations[client_id])
+            for client_id, pairs in wanted.items()
+        }
+
+    def pair_error(self, pair, errors):
+        """Why a pair has no rule results"""
+        return errors.get(pair) or errors.get((pair[0], self.entry_interval)) or 'No candles available'
+
+    def _build(self, pairs, rules, errors, customization):
+        results = {}
+        for symbol, timeframe in pairs:
+            if (symbol, timeframe) in rules:
+                results[(symbol, timeframe)] = self.combine(symbol, timeframe, rules[(symbol, timeframe)], customization)
+            else:
+                error = self.pair_error((symbol, timeframe), errors)
+                results[(symbol, timeframe)] = {'symbol': symbol, 'timeframe': timeframe, 'error': error}
+        return results
+
+def client_pairs(customization):
+    """(symbol, timeframe) pairs enabled by a client_customization row"""
+    customization = customization or DEFAULT_CUSTOMIZATION
+    assets = customization.get('enabled_assets') or DEFAULT_CUSTOMIZATION['enabled_assets']
+    timeframes = customization.get('enabled_timeframes') or DEFAULT_CUSTOMIZATION['enabled_timeframes']
+    return [(symbol, timeframe) for symbol in assets for timeframe in timeframes]
@@ -0,0 +1,266 @@
+"""
+Signal history and outcome statistics
+Signals shown to users are appended to signal_history in batches. After a
+signal expires, the evaluator marks it won, lost or tied against the 1m
+close at expiry, and adds it to the per (client, asset, timeframe) counters
+in signal_stats, so dashboards read aggregates instead of scanning history.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from db_client import get_supabase
+from market_data.fetcher import INTERVAL_MS, get_fetcher
+from signals.cache import last_closed_candle
+from signals.engine import klines_to_arrays
+
+DIRECTIONS = {'CALL': 1, 'PUT': -1}
+WIN, LOSS, TIE, VOID = 1, -1, 0, 2
+
+def _iso(ms):
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).isoformat()
+
+def _ms(value):
+    return int(datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp() * 1000)
+
+def outcome(direction, entry_price, exit_price):
+    """WIN, LOSS or TIE of a CALL (1) / PUT (-1) between two prices"""
+    move = np.sign(exit_price - entry_price) * direction
+    return WIN if move > 0 else LOSS if move < 0 else TIE
+
+class SignalHistory:
+    """
+    Buffered signal_history writer and outcome evaluator
+    record() only queues the signal; a daemon thread started on the first
+    record captures the entry prices right away and inserts the rows every
+    `max_buffer` rows or `interval` seconds.
+    """
+
+    def __init__(self, price_provider=None, klines_provider=None, max_buffer=200, interval=1.0, max_backoff=30.0):
+        self.price_provider = price_provider
+        self.klines_provider = klines_provider
+        self.max_buffer = max_buffer
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self._queued = []
+        self._buffer = []
+        # (client, asset, timeframe) -> candle, once queued and once its price is captured
+        self._pending_keys = {}
+        self._recorded = {}
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._thread = None
+
+    def record(self, client_id, signal, token_id=None, now=None):
+        """
+        Queue a signal shown to a user; only actionable signals are kept, once per
+        client, asset, timeframe and candle
+        """
+        if not signal.get('hasSignal'):
+            return False
+
+        now = time.time() if now is None else now
+        symbol, timeframe = signal['symbol'], signal['timeframe']
+        candle = last_closed_candle(timeframe, now)
+        key = (client_id, symbol, timeframe)
+        created = int(now * 1000)
+        entry = {
+            'client_id': client_id,
+            'token_id': token_id,
+            'symbol': symbol,
+            'timeframe': timeframe,
+            'direction': DIRECTIONS[signal['signalType']],
+            'confluences': signal['confluences'],
+            'probability': signal['probability'],
+            'created_at': _iso(created),
+            'expires_at': _iso(created + INTERVAL_MS[timeframe])
+        }
+
+        with self._lock:
+            if candle in (self._recorded.get(key), self._pending_keys.get(key)):
+                return False
+            self._pending_keys[key] = candle
+            self._queued.append((key, candle, entry))
+            self._ready.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='signal-history', daemon=True)
+                self._thread.start()
+        return True
+
+    def capture(self):
+        """
+        Price the queued signals and move them to the write buffer
+        Signals whose price cannot be fetched stay queued for the next attempt.
+        Returns the number captured.
+        """
+        with self._lock:
+            queued, self._queued = self._queued, []
+        if not queued:
+            return 0
+
+        # Ticker prices are cached briefly by the fetcher, so a burst costs one request per asset
+        provider = self.price_provider or get_fetcher().get_current_price
+        prices, errors = {}, []
+        for symbol in dict.fromkeys(entry['symbol'] for _, _, entry in queued):
+            try:
+                prices[symbol] = provider(symbol)
+            except Exception as e:
+                errors.append(f"{symbol}: {e}")
+
+        rows, retry = [], []
+        with self._lock:
+            for key, candle, entry in queued:
+                if entry['symbol'] not in prices:
+                    retry.append((key, candle, entry))
+                    continue
+                if self._pending_keys.get(key) == candle:
+                    del self._pending_keys[key]
+                self._recorded[key] = candle
+                rows.append(dict(entry, entry_price=prices[entry['symbol']]))
+            self._queued = retry + self._queued
+            self._buffer.extend(rows)
+
+        if errors:
+            raise ValueError(f"Cannot price signals: {'; '.join(errors)}")
+        return len(rows)
+
+    def flush(self):
+        """Insert buffered rows in one request"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+
+        try:
+            get_supabase().table('signal_history').insert(rows).execute()
+        except Exception:
+            with self._lock:
+                self._buffer = rows + self._buffer
+            raise
+        return len(rows)
+
+    def _run(self):
+        failures = 0
+        flushed = time.monotonic()
+        while True:
+            with self._lock:
+                if not self._queued:
+                    self._ready.wait(self.interval)
+
+            # A failed price fetch does not hold back rows already priced
+            error = None
+            try:
+                self.capture()
+            except Exception as e:
+                error = e
+            try:
+                if len(self._buffer) >= self.max_buffer or time.monotonic() - flushed >= self.interval:
+                    self.flush()
+                    flushed = time.monotonic()
+            except Exception as e:
+                error = e
+
+            if error is None:
+                failures = 0
+                continue
+            failures += 1
+            delay = min(self.interval * 2 ** failures, self.max_backoff)
+            print(f"[Signals] History write failed, retrying in {delay:.1f}s: {error}")
+            time.sleep(delay)
+
+    def _exit_prices(self, symbol, expiries, now):
+        """
+        1m close at each expiry (NaN while that candle is still open), and whether
+        the expiry is older than the candles that can be fetched
+        """
+        minutes = int((now * 1000 - expiries.min()) // INTERVAL_MS['1m']) + 2
+        provider = self.klines_provider or get_fetcher().get_klines
+        arrays = klines_to_arrays(provider(symbol, '1m', min(minutes, 1000)))
+
+        prices = np.full(len(expiries), np.nan)
+        if not len(arrays['time']):
+            return prices, np.zeros(len(expiries), dtype=bool)
+
+        # The first candle closing at or after the expiry
+        closes = arrays['time'] + INTERVAL_MS['1m']
+        index = np.minimum(np.searchsorted(closes, expiries, side='left'), len(closes) - 1)
+        found = (closes[index] >= expiries) & (closes[index] <= now * 1000)
+        prices[found] = arrays['close'][index[found]]
+        return prices, expiries < arrays['time'][0]
+
+    def evaluate(self, now=None, limit=500):
+        """
+        Settle expired signals and add them to signal_stats
+        Returns the number of signals this call settled: {WIN: n, LOSS: n, TIE: n, VOID: n}
+        """
+        now = time.time() if now is None else now
+        supabase = get_supabase()
+        response = supabase.table('signal_history').select('id, client_id, symbol, timeframe, direction, entry_price, expires_at') \
+            .is_('outcome', 'null').lte('expires_at', _iso(int(now * 1000))) \
+            .order('expires_at').limit(limit).execute()
+
+        by_symbol = {}
+        for row in response.data:
+            by_symbol.setdefault(row['symbol'], []).append(row)
+
+        settled = {WIN: [], LOSS: [], TIE: [], VOID: []}
+        for symbol, rows in by_symbol.items():
+            expiries = np.array([_ms(row['expires_at']) for row in rows])
+            try:
+                prices, too_old = self._exit_prices(symbol, expiries, now)
+            except Exception as e:
+                print(f"[Signals] Cannot settle {symbol}: {e}")
+                continue
+
+            for i, row in enumerate(rows):
+                if not np.isnan(prices[i]):
+                    settled[outcome(row['direction'], row['entry_price'], prices[i])].append(row)
+                elif too_old[i]:
+                    settled[VOID].append(row)
+
+        # Claim and count in one transaction, so concurrent evaluators never count a signal twice
+        counts = {result: 0 for result in settled}
+        outcomes = [{'id': row['id'], 'outcome': result} for result, rows in settled.items() for row in rows]
+        if outcomes:
+            response = supabase.rpc('settle_signal_outcomes', {'outcomes': outcomes}).execute()
+            for result, count in (response.data or {}).items():
+                counts[int(result)] = count
+
+        return counts
+
+def get_signal_stats(client_id):
+    """Win-rate aggregates of a client, per asset/timeframe and in total"""
+    supabase = get_supabase()
+    response = supabase.table('signal_stats').select('symbol, timeframe, wins, losses, ties') \
+        .eq('client_id', client_id).execute()
+
+    def summary(wins, losses, ties):
+        decided = wins + losses
+        return {
+            'wins': wins,
+            'losses': losses,
+            'ties': ties,
+            'total': wins + losses + ties,
+            'win_rate': round(wins / decided * 100, 2) if decided else None
+        }
+
+    rows = [{'symbol': r['symbol'], 'timeframe': r['timeframe'], **summary(r['wins'], r['losses'], r['ties'])}
+            for r in response.data]
+    totals = summary(*(sum(r[field] for r in rows) for field in ('wins', 'losses', 'ties')))
+    return {'total': totals, 'by_asset': rows}
+
+_history = None
+_history_lock = threading.Lock()
+
+def get_signal_history():
+    """Get the shared SignalHistory singleton"""
+    global _history
+
+    with _history_lock:
+        if _history is None:
+            _history = SignalHistory()
+
+    return _history
@@ -0,0 +1,142 @@
+"""
+Shared signal service used by the API routes
+Wires the SignalEngine to market data and the shared result cache, and
+caches client_customization rows for a short time. With SIGNAL_PRECOMPUTE the
+scheduler ingests one 1m feed per symbol and the engine reads every timeframe
+from the KlineStore; otherwise it fetches each timeframe through the pooled
+fetcher.
+"""
+
+import threading
+import time
+
+from config import Config
+from db_client import get_supabase
+from market_data.fetcher import get_fetcher, INTERVAL_MS
+from market_data.ingest import get_kline_ingest
+from signals.cache import SignalCache, config_hash, last_closed_candle
+from signals.correlation import flag_correlated, get_correlation_tracker
+from signals.engine import SignalEngine, DEFAULT_CUSTOMIZATION
+
+CUSTOMIZATION_TTL = 30
+CORRELATION_THRESHOLD = 0.8
+
+class SignalService:
+    """Serves signals from the shared cache, computing each key once"""
+
+    def __init__(self, engine, cache=None, correlation=None):
+        self.engine = engine
+        self.cache = cache or SignalCache()
+        self.correlation = correlation
+        self.config_hash = config_hash(engine.config)
+
+    def cache_key(self, symbol, timeframe, now=None):
+        # Price action reads the entry interval, so the key follows the finest candle used
+        finest = min((timeframe, self.engine.entry_interval), key=lambda i: INTERVAL_MS[i])
+        return (symbol, timeframe, last_closed_candle(finest, now), self.config_hash)
+
+    def rules(self, symbol, timeframe):
+        """Shared rule results for one pair; raises ValueError when candles are unavailable"""
+        def compute():
+            rules, errors = self.engine.compute_rules([(symbol, timeframe)])
+            if (symbol, timeframe) not in rules:
+                raise ValueError(self.engine.pair_error((symbol, timeframe), errors))
+            return rules[(symbol, timeframe)]
+
+        return self.cache.get_or_compute(self.cache_key(symbol, timeframe), compute)
+
+    def get_signal(self, symbol, timeframe, customization=None):
+        """Signal payload for one pair with a tenant's customization applied"""
+        return self.engine.combine(symbol, timeframe, self.rules(symbol, timeframe), customization)
+
+    def scan(self, pairs, customization=None, now=None, dedupe=False, threshold=CORRELATION_THRESHOLD):
+        """
+        Signals for several pairs ranked best first
+        Cache misses are fetched concurrently and scored in one vectorized batch.
+        With a correlation tracker, signals repeating a stronger same-direction
+        signal on a correlated asset are flagged, or dropped when dedupe is set.
+        The tracker is only read here; the precompute job keeps it in sync.
+        Returns (signals ranked by confluences then score, {pair: error})
+        """
+        now = time.time() if now is None else now
+        pairs = list(dict.fromkeys(pairs))
+        rules, failed = self.cached_rules(pairs, now=now)
+
+        signals = [self.engine.combine(symbol, timeframe, rules[(symbol, timeframe)], customization)
+                   for symbol, timeframe in pairs if (symbol, timeframe) in rules]
+        signals.sort(key=lambda s: (s['confluences'], max(s['callScore'], s['putScore'])), reverse=True)
+
+        if self.correlation is not None and signals:
+            symbols = [s['symbol'] for s in signals]
+            flag_correlated(signals, self.correlation.matrix(symbols), threshold)
+            if dedupe:
+                signals = [s for s in signals if 'correlatedWith' not in s]
+
+        return signals, failed
+
+    def cached_rules(self, pairs, now=None):
+        """
+        Rule results for pairs: cache hits as they are, misses computed in one batch
+        Returns ({pair: rules}, {pair: error})
+        """
+        now = time.time() if now is None else now
+        rules = {}
+        for pair in dict.fromkeys(pairs):
+            cached = self.cache.get(self.cache_key(*pair, now=now))
+            if cached is not None:
+                rules[pair] = cached
+
+        computed, failed = self.precompute([pair for pair in pairs if pair not in rules], now=now)
+        rules.update(computed)
+        return rules, failed
+
+    def precompute(self, pairs, now=None):
+        """
+        Compute rule results for pairs in one batch and store them in the cache
+        Returns ({pair: rules}, {pair: error}) for the pairs computed and the ones that failed
+        """
+        # Key on the candle that was closed when the batch started
+        now = time.time() if now is None else now
+        pairs = list(dict.fromkeys(pairs))
+        rules, errors = self.engine.compute_rules(pairs)
+
+        failed = {}
+        for pair in pairs:
+            if pair in rules:
+                self.cache.put(self.cache_key(*pair, now=now), rules[pair])
+            else:
+                failed[pair] = self.engine.pair_error(pair, errors)
+        return rules, failed
+
+_service = None
+_service_lock = threading.Lock()
+
+def get_signal_service():
+    """Get the shared SignalService singleton"""
+    global _service
+
+    with _service_lock:
+        if _service is None:
+            # Ingest runs with the precompute scheduler; the fetcher remains its fallback
+            provider = get_kline_ingest().klines if Config.SIGNAL_PRECOMPUTE else get_fetcher().get_klines
+            _service = SignalService(SignalEngine(provider), correlation=get_correlation_tracker())
+
+    return _service
+
+_customizations = {}
+
+def get_customization(client_id):
+    """client_customization row for a client, cached for CUSTOMIZATION_TTL seconds"""
+    cached = _customizations.get(client_id)
+    if cached and cached[0] > time.time():
+        return cached[1]
+
+    supabase = get_supabase()
+    response = supabase.table('client_customization').select('*').eq('client_id', client_id).execute()
+    customization = response.data[0] if response.data else DEFAULT_CUSTOMIZATION
+
+    _customizations[client_id] = (time.time() + CUSTOMIZATION_TTL, customization)
+    return customization
+
+def invalidate_customization(client_id):
+    _customizations.pop(client_id, None)
@@ -0,0 +1,203 @@
+"""
+Live signal and price fan-out for server-sent event streams
+A subscriber is a bounded queue of encoded events. The API runs on gunicorn's
+gevent worker (gunicorn.conf.py), which patches queue, threading and time, so
+a stream waiting on its queue is a parked greenlet rather than an OS thread. Each event is serialized once per audience
+(subscribers with the same rule settings) and the same bytes are queued for
+every matching subscriber.
+
+Signal updates are published after each candle close by the precompute
+scheduler when SIGNAL_PRECOMPUTE is on; otherwise the hub runs its own loop
+that computes the subscribed pairs through the shared signal service.
+"""
+
+import json
+import queue
+import threading
+import time
+from datetime import datetime
+
+from config import Config
+from market_data.fetcher import get_fetcher
+from signals.cache import config_hash, seconds_until_close
+from signals.engine import RULE_FLAGS, client_pairs
+
+HEARTBEAT = b': keep-alive\n\n'
+
+def encode_event(event, data):
+    """One SSE message as bytes"""
+    payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False)
+    return f'event: {event}\ndata: {payload}\n\n'.encode()
+
+def audience_key(customization):
+    """Hash of the customization fields that change a combined signal"""
+    customization = customization or {}
+    fields = [*RULE_FLAGS.values(), 'confluence_threshold']
+    return config_hash({field: customization.get(field) for field in fields})
+
+class Subscriber:
+    """One stream connection: its filters and pending events"""
+    __slots__ = ('client_id', 'customization', 'audience', 'pairs', 'assets', 'queue', 'dropped')
+
+    def __init__(self, client_id, customization, max_queue=100):
+        self.client_id = client_id
+        self.customization = customization
+        self.audience = audience_key(customization)
+        self.pairs = set(client_pairs(customization))
+        self.assets = {symbol for symbol, _ in self.pairs}
+        self.queue = queue.Queue(max_queue)
+        self.dropped = 0
+
+    def send(self, message):
+        # A slow reader loses its oldest events instead of blocking the publisher
+        while True:
+            try:
+                self.queue.put_nowait(message)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def events(self, heartbeat=15, check=None):
+        """
+        Yield queued events, with a comment line when idle so proxies keep the connection
+        Every `heartbeat` seconds `check()` is called, idle or not; when it
+        returns an error message an error event is sent and the stream ends.
+        """
+        checked = time.monotonic()
+        while True:
+            try:
+                message = self.queue.get(timeout=heartbeat)
+            except queue.Empty:
+                message = HEARTBEAT
+
+            if check is not None and time.monotonic() - checked >= heartbeat:
+                checked = time.monotonic()
+                error = check()
+                if error:
+                    yield encode_event('error', {'error': error})
+                    return
+            yield message
+
+class SignalHub:
+    """Registry of stream subscribers with once-per-audience serialization"""
+
+    def __init__(self, fetcher=None, price_interval=2.0, service=None, close_delay=1.0):
+        self.fetcher = fetcher
+        self.price_interval = price_interval
+        # With a service, the hub publishes signals itself after every candle close
+        self.service = service
+        self.close_delay = close_delay
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._ticker = None
+        self._signal_thread = None
+        self.stats = {'encoded': 0, 'delivered': 0}
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def subscribe(self, client_id, customization):
+        subscriber = Subscriber(client_id, customization)
+        with self._lock:
+            self._subscribers.add(subscriber)
+            if self._ticker is None:
+                self._ticker = threading.Thread(target=self._price_loop, name='signal-hub-prices', daemon=True)
+                self._ticker.start()
+            if self.service is not None and self._signal_thread is None:
+                self._signal_thread = threading.Thread(target=self._signal_loop, name='signal-hub-signals', daemon=True)
+                self._signal_thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def subscribers(self):
+        with self._lock:
+            return list(self._subscribers)
+
+    def _deliver(self, targets, event, data):
+        message = encode_event(event, data)
+        for subscriber in targets:
+            subscriber.send(message)
+        self.stats['encoded'] += 1
+        self.stats['delivered'] += len(targets)
+
+    def publish_signals(self, engine, rules):
+        """
+        Push combined signals for {(symbol, timeframe): rules}
+        Each pair is combined and encoded once per audience and sent to the
+        subscribers of that audience that have the pair enabled.
+        """
+        audiences = {}
+        for subscriber in self.subscribers():
+            audiences.setdefault(subscriber.audience, []).append(subscriber)
+
+        for group in audiences.values():
+            customization = group[0].customization
+            for (symbol, timeframe), pair_rules in rules.items():
+                targets = [s for s in group if (symbol, timeframe) in s.pairs]
+                if targets:
+                    self._deliver(targets, 'signal', engine.combine(symbol, timeframe, pair_rules, customization))
+
+    def publish_prices(self, prices):
+        """Push {symbol: price} ticks to subscribers with the asset enabled"""
+        subscribers = self.subscribers()
+        timestamp = datetime.utcnow().isoformat()
+        for symbol, price in prices.items():
+            targets = [s for s in subscribers if symbol in s.assets]
+            if targets:
+                self._deliver(targets, 'price', {'symbol': symbol, 'price': price, 'timestamp': timestamp})
+
+    def _price_loop(self):
+        # One ticker for every subscriber: a single batched request per tick
+        fetcher = self.fetcher or get_fetcher()
+        while True:
+            started = time.time()
+            assets = set().union(*(s.assets for s in self.subscribers()))
+            if assets:
+                try:
+                    self.publish_prices(fetcher.get_prices(assets))
+                except Exception as e:
+                    print(f"[Stream] Price update failed: {e}")
+            time.sleep(max(self.price_interval - (time.time() - started), 0.1))
+
+    def publish_closed(self, now=None):
+        """Compute and push the signals of every subscribed pair; returns {pair: error}"""
+        pairs = set().union(*(s.pairs for s in self.subscribers()))
+        if not pairs:
+            return {}
+        rules, failed = self.service.cached_rules(sorted(pairs), now=now)
+        self.publish_signals(self.service.engine, rules)
+        return failed
+
+    def _signal_loop(self):
+        # Signals read the entry candles, so every pair changes when one closes
+        interval = self.service.engine.entry_interval
+        while True:
+            time.sleep(seconds_until_close(interval, delay=self.close_delay))
+            try:
+                self.publish_closed()
+            except Exception as e:
+                print(f"[Stream] Signal update failed: {e}")
+
+_hub = None
+_hub_lock = threading.Lock()
+
+def get_signal_hub():
+    """Get the shared SignalHub singleton"""
+    global _hub
+
+    with _hub_lock:
+        if _hub is None:
+            if Config.SIGNAL_PRECOMPUTE:
+                _hub = SignalHub()
+            else:
+                from signals.service import get_signal_service
+                _hub = SignalHub(service=get_signal_service())
+
+    return _hub
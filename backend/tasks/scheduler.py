@@ -1,9 +1,18 @@
 """
-Background task scheduler for analytics updates
+Background task scheduler for analytics updates and signal precomputation
 Can be run via cron job or APScheduler
 """
 
+import threading
+import time
 from datetime import date
+from db_client import get_supabase
+from market_data.ingest import get_kline_ingest
+from signals.cache import seconds_until_close
+from signals.engine import DEFAULT_CUSTOMIZATION, client_pairs
+from signals.service import get_signal_service
+from signals.history import get_signal_history, WIN, LOSS, TIE, VOID
+from signals.stream import get_signal_hub
 from utils.analytics import update_all_clients_analytics
 
 def run_daily_analytics_update():
@@ -30,6 +39,130 @@ def run_daily_analytics_update():
     
     return results
 
+def get_active_customizations():
+    """client_customization rows of active clients, keyed by client_id"""
+    supabase = get_supabase()
+    clients_response = supabase.table('white_label_clients').select('id').eq('is_active', True).execute()
+    client_ids = [client['id'] for client in clients_response.data]
+    if not client_ids:
+        return {}
+
+    response = supabase.table('client_customization').select('*').in_('client_id', client_ids).execute()
+    rows = {row['client_id']: row for row in response.data}
+    return {client_id: rows.get(client_id, DEFAULT_CUSTOMIZATION) for client_id in client_ids}
+
+def run_kline_ingest(customizations=None, now=None):
+    """
+    Append the 1m candles closed since the last run to the KlineStore and
+    resample them into the higher timeframes, for every asset of an active client
+    """
+    customizations = get_active_customizations() if customizations is None else customizations
+    symbols = [symbol for c in customizations.values() for symbol, _ in client_pairs(c)]
+
+    failed = get_kline_ingest().sync_all(symbols, now=now)
+    for symbol, error in failed.items():
+        print(f"[Klines] Ingest failed for {symbol}: {error}")
+    return failed
+
+def run_signal_precompute(now=None, customizations=None):
+    """
+    Precompute signals for every (asset, timeframe) enabled by an active client
+    Results go into the shared signal cache, so GET /api/signals is a lookup,
+    and are pushed to open signal streams
+    """
+    started = time.time()
+    customizations = get_active_customizations() if customizations is None else customizations
+    pairs = list(dict.fromkeys(pair for c in customizations.values() for pair in client_pairs(c)))
+
+    service = get_signal_service()
+    rules, failed = service.precompute(pairs, now=now)
+    get_signal_hub().publish_signals(service.engine, rules)
+
+    if service.correlation is not None:
+        try:
+            service.correlation.sync([symbol for symbol, _ in pairs], now=now)
+        except Exception as e:
+            print(f"[Signals] Correlation update failed: {e}")
+
+    print(f"[Signals] Precomputed {len(pairs) - len(failed)}/{len(pairs)} pairs "
+          f"for {len(customizations)} clients in {time.time() - started:.2f}s")
+    for (symbol, timeframe), error in failed.items():
+        print(f"  - {symbol} {timeframe}: {error}")
+
+    return failed
+
+def run_signal_outcomes(now=None):
+    """Write buffered signal history and settle expired signals"""
+    history = get_signal_history()
+    written = history.flush()
+    counts = history.evaluate(now=now)
+
+    settled = sum(counts.values())
+    if written or settled:
+        print(f"[Signals] History: {written} recorded, {settled} settled "
+              f"({counts[WIN]} wins, {counts[LOSS]} losses, {counts[TIE]} ties, {counts[VOID]} void)")
+    return counts
+
+class SignalPrecomputeScheduler:
+    """
+    Daemon thread that runs run_kline_ingest, run_signal_precompute and
+    run_signal_outcomes after every candle close
+    """
+
+    def __init__(self, interval=None, delay=1.0):
+        # Signals read the entry candles, so every pair changes when one closes
+        self.interval = interval or get_signal_service().engine.entry_interval
+        self.delay = delay
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='signal-precompute', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        # Warm the cache right away, then follow the candle clock
+        while True:
+            try:
+                customizations = get_active_customizations()
+            except Exception as e:
+                print(f"[Signals] Loading active clients failed: {e}")
+                customizations = None
+
+            if customizations is not None:
+                try:
+                    run_kline_ingest(customizations)
+                except Exception as e:
+                    print(f"[Klines] Ingest failed: {e}")
+
+                try:
+                    run_signal_precompute(customizations=customizations)
+                except Exception as e:
+                    print(f"[Signals] Precompute failed: {e}")
+
+            try:
+                run_signal_outcomes()
+            except Exception as e:
+                print(f"[Signals] Outcome update failed: {e}")
+
+            if self._stop.wait(seconds_until_close(self.interval, delay=self.delay)):
+                return
+
+_scheduler = None
+
+def start_signal_precompute():
+    """Start the shared precompute thread once per process"""
+    global _scheduler
+
+    if _scheduler is None:
+        _scheduler = SignalPrecomputeScheduler().start()
+    return _scheduler
+
 if __name__ == '__main__':
     # Allow running directly for testing
     run_daily_analytics_update()
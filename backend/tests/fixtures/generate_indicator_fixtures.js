@@ -0,0 +1,49 @@
+// Regenerates indicators.json from the browser's technical-indicators.js:
+//   node tests/fixtures/generate_indicator_fixtures.js
+const fs = require("fs")
+const path = require("path")
+const vm = require("vm")
+
+const source = fs.readFileSync(path.join(__dirname, "../../../technical-indicators.js"), "utf8")
+const context = { window: {} }
+vm.runInNewContext(source, context)
+const TI = context.window.TechnicalIndicators
+
+// Deterministic pseudo-random walks so the fixtures are reproducible
+let seed = 42
+function random() {
+  seed = (seed * 1103515245 + 12345) % 2147483648
+  return seed / 2147483648
+}
+function walk(length, start, step, drift = 0) {
+  const data = [start]
+  for (let i = 1; i < length; i++) {
+    data.push(Math.max(1, data[i - 1] * (1 + drift + (random() - 0.5) * step)))
+  }
+  return data
+}
+
+const series = {}
+for (let i = 0; i < 20; i++) series[`walk_${i}`] = walk(120, 100 + i * 50, 0.02)
+series.uptrend = walk(120, 30000, 0.004, 0.002)
+series.downtrend = walk(120, 2000, 0.004, -0.002)
+series.monotonic = Array.from({ length: 60 }, (_, i) => 10 + i * 0.5)
+series.plateaus = Array.from({ length: 80 }, (_, i) => 100 + 5 * Math.sin(i / 3) + (i % 7 === 0 ? 2 : 0))
+series.short = walk(24, 50, 0.03)
+
+const cases = Object.entries(series).map(([name, data]) => ({
+  name,
+  data,
+  sma_5: TI.SMA(data, 5),
+  sma_20: TI.SMA(data, 20),
+  ema_12: TI.EMA(data, 12),
+  ema_26: TI.EMA(data, 26),
+  rsi_14: TI.RSI(data, 14),
+  macd: TI.MACD(data),
+  bollinger: TI.BollingerBands(data, 20, 2),
+  fibonacci: TI.FibonacciLevels(data),
+  support_resistance: TI.findSupportResistance(data, 0.02),
+}))
+
+fs.writeFileSync(path.join(__dirname, "indicators.json"), JSON.stringify({ cases }) + "\n")
+console.log(`[Fixtures] Wrote ${cases.length} indicator cases`)
@@ -0,0 +1,159 @@
+"""
+Invariants of the in-process caches: SignalCache (per-candle LRU with
+single-flight computation) and TTLCache (expiry, cached misses, tags).
+"""
+
+import threading
+import time
+
+import pytest
+
+from signals.cache import SignalCache, config_hash, last_closed_candle, seconds_until_close
+from utils.ttl_cache import TTLCache, MISSING
+
+def _key(symbol='BTCUSDT', timeframe='1h', candle_time=0, config='a'):
+    return (symbol, timeframe, candle_time, config)
+
+def test_config_hash_ignores_key_order():
+    assert config_hash({'a': 1, 'b': 2}) == config_hash({'b': 2, 'a': 1})
+    assert config_hash({'a': 1}) != config_hash({'a': 2})
+
+def test_candle_clock():
+    hour = 3_600
+    assert last_closed_candle('1h', now=10 * hour + 5) == 9 * hour * 1000
+    assert seconds_until_close('1h', now=10 * hour + 5, delay=1.0) == hour - 5 + 1.0
+
+def test_signal_cache_lru_eviction():
+    cache = SignalCache(max_entries=2)
+    cache.put(_key('A'), 1)
+    cache.put(_key('B'), 2)
+    assert cache.get(_key('A')) == 1
+    cache.put(_key('C'), 3)
+
+    # B was the least recently used
+    assert cache.get(_key('B')) is None
+    assert cache.get(_key('A')) == 1 and cache.get(_key('C')) == 3
+    assert cache.stats['evictions'] == 1
+
+def test_signal_cache_new_candle_purges_series():
+    cache = SignalCache()
+    cache.put(_key(candle_time=0, config='a'), 1)
+    cache.put(_key(candle_time=0, config='b'), 2)
+    cache.put(_key(timeframe='4h', candle_time=0), 3)
+    cache.put(_key(candle_time=1, config='a'), 4)
+
+    assert cache.get(_key(candle_time=0, config='b')) is None
+    assert cache.get(_key(candle_time=1, config='a')) == 4
+    # Other series keep their entries
+    assert cache.get(_key(timeframe='4h', candle_time=0)) == 3
+    assert len(cache) == 2
+
+def test_signal_cache_ignores_older_candle():
+    cache = SignalCache()
+    cache.put(_key(candle_time=1), 1)
+    cache.put(_key(candle_time=0), 0)
+    assert cache.get(_key(candle_time=0)) is None
+    assert cache.get(_key(candle_time=1)) == 1
+
+def test_signal_cache_single_flight():
+    cache = SignalCache()
+    calls = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def compute():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'value'
+
+    results = []
+    leader = threading.Thread(target=lambda: results.append(cache.get_or_compute(_key(), compute)))
+    leader.start()
+    started.wait(5)
+    followers = [threading.Thread(target=lambda: results.append(cache.get_or_compute(_key(), compute)))
+                 for _ in range(8)]
+    for t in followers:
+        t.start()
+    time.sleep(0.05)
+    release.set()
+    for t in [leader, *followers]:
+        t.join(5)
+
+    assert len(calls) == 1
+    assert results == ['value'] * 9
+    assert cache.stats['misses'] == 1
+
+def test_signal_cache_failed_leader_is_not_cached():
+    cache = SignalCache()
+
+    def fail():
+        raise ValueError('upstream down')
+
+    with pytest.raises(ValueError):
+        cache.get_or_compute(_key(), fail)
+    assert cache.get_or_compute(_key(), lambda: 'value') == 'value'
+    assert cache.get(_key()) == 'value'
+
+def test_signal_cache_invalidate():
+    cache = SignalCache()
+    cache.put(_key('A', '1h'), 1)
+    cache.put(_key('A', '4h'), 2)
+    cache.put(_key('B', '1h'), 3)
+
+    cache.invalidate(symbol='A', timeframe='1h')
+    assert cache.get(_key('A', '1h')) is None and cache.get(_key('A', '4h')) == 2
+
+    cache.invalidate(timeframe='1h')
+    assert cache.get(_key('B', '1h')) is None
+
+    cache.invalidate()
+    assert len(cache) == 0
+
+def test_ttl_cache_expiry(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(time, 'time', lambda: clock[0])
+    cache = TTLCache(ttl=60, negative_ttl=10)
+
+    cache.set('hit', {'id': 1})
+    cache.set('miss', None)
+    assert cache.get('hit') == {'id': 1}
+    assert cache.get('miss') is None
+    assert cache.get('unknown') is MISSING
+
+    clock[0] += 30
+    # A cached miss expires on its own shorter TTL
+    assert cache.get('miss') is MISSING
+    assert cache.get('hit') == {'id': 1}
+
+    clock[0] += 30
+    assert cache.get('hit') is MISSING
+    assert len(cache) == 0
+    assert cache.stats == {'hits': 2, 'misses': 3, 'negative_hits': 1}
+
+def test_ttl_cache_tags():
+    cache = TTLCache()
+    cache.set('t1', 1, tags=[('token', 1), ('client', 'c')])
+    cache.set('t2', 2, tags=[('token', 2), ('client', 'c')])
+    cache.set('t3', 3, tags=[('token', 3), ('client', 'd')])
+
+    cache.invalidate_tag(('token', 1))
+    assert cache.get('t1') is MISSING and cache.get('t2') == 2
+
+    cache.invalidate_tag(('client', 'c'))
+    assert cache.get('t2') is MISSING and cache.get('t3') == 3
+
+    # Replacing an entry drops it from its old tags
+    cache.set('t3', 4, tags=[('client', 'e')])
+    cache.invalidate_tag(('client', 'd'))
+    assert cache.get('t3') == 4
+
+def test_ttl_cache_bounded():
+    cache = TTLCache(max_entries=2)
+    cache.set('a', 1, tags=['x'])
+    cache.set('b', 2)
+    cache.set('c', 3)
+    assert cache.get('a') is MISSING
+    assert len(cache) == 2
+    # The evicted entry leaves no tag behind
+    assert 'x' not in cache._tags
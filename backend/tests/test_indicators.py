@@ -0,0 +1,75 @@
+"""
+Parity of the NumPy indicators with the browser's technical-indicators.js
+Expected values come from fixtures/indicators.json, generated by running the
+JS file under node (fixtures/generate_indicator_fixtures.js).
+"""
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from indicators import (
+    sma, ema, rsi, macd, bollinger_bands, fibonacci_levels, find_support_resistance
+)
+from indicators.technical import SCALAR_ROWS
+
+with open(os.path.join(os.path.dirname(__file__), 'fixtures', 'indicators.json')) as f:
+    CASES = json.load(f)['cases']
+
+TOLERANCE = dict(rtol=1e-9, atol=1e-9)
+
+def _ids(cases):
+    return [case['name'] for case in cases]
+
+@pytest.mark.parametrize('case', CASES, ids=_ids(CASES))
+def test_sma(case):
+    for period in (5, 20):
+        np.testing.assert_allclose(sma(case['data'], period)[0], case[f'sma_{period}'], **TOLERANCE)
+
+@pytest.mark.parametrize('case', CASES, ids=_ids(CASES))
+def test_ema(case):
+    for period in (12, 26):
+        np.testing.assert_allclose(ema(case['data'], period)[0], case[f'ema_{period}'], **TOLERANCE)
+
+@pytest.mark.parametrize('case', CASES, ids=_ids(CASES))
+def test_rsi(case):
+    np.testing.assert_allclose(rsi(case['data'], 14)[0], case['rsi_14'], **TOLERANCE)
+
+@pytest.mark.parametrize('case', CASES, ids=_ids(CASES))
+def test_macd(case):
+    values = macd(case['data'])
+    for key in ('macd', 'signal', 'histogram'):
+        np.testing.assert_allclose(values[key][0], case['macd'][key], **TOLERANCE)
+
+@pytest.mark.parametrize('case', CASES, ids=_ids(CASES))
+def test_bollinger_bands(case):
+    bands = bollinger_bands(case['data'], 20, 2)
+    for key in ('upper', 'middle', 'lower', 'current'):
+        np.testing.assert_allclose(bands[key][0], case['bollinger'][key], **TOLERANCE)
+
+@pytest.mark.parametrize('case', CASES, ids=_ids(CASES))
+def test_fibonacci_levels(case):
+    levels = fibonacci_levels(case['data'])
+    for key, expected in case['fibonacci'].items():
+        np.testing.assert_allclose(levels[key][0], expected, **TOLERANCE)
+
+@pytest.mark.parametrize('case', CASES, ids=_ids(CASES))
+def test_find_support_resistance(case):
+    levels = find_support_resistance(case['data'], 0.02)[0]
+    expected = case['support_resistance']
+    assert [(l['type'], l['strength']) for l in levels] == [(l['type'], l['strength']) for l in expected]
+    np.testing.assert_allclose([l['price'] for l in levels], [l['price'] for l in expected], **TOLERANCE)
+
+def test_batched_rows_match_js():
+    """Equal-length series computed as one matrix, on the vectorized (not per-row) path"""
+    walks = [case for case in CASES if case['name'].startswith('walk_')]
+    assert len(walks) > SCALAR_ROWS
+    data = np.array([case['data'] for case in walks])
+
+    np.testing.assert_allclose(ema(data, 26), [case['ema_26'] for case in walks], **TOLERANCE)
+    np.testing.assert_allclose(rsi(data, 14), [case['rsi_14'] for case in walks], **TOLERANCE)
+    np.testing.assert_allclose(sma(data, 20), [case['sma_20'] for case in walks], **TOLERANCE)
+    np.testing.assert_allclose(bollinger_bands(data)['upper'], [case['bollinger']['upper'] for case in walks],
+                               **TOLERANCE)
@@ -0,0 +1,171 @@
+"""
+KlineFetcher caching and single-flight, and the KlineStore/TimeframeResampler
+path that builds higher timeframes from the stored 1m series. Upstream calls
+go to a fake `_get`, so no request leaves the process.
+"""
+
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from market_data.fetcher import KlineFetcher
+from market_data.kline_store import COLUMNS, KlineStore
+from market_data.resample import TimeframeResampler, resample
+
+MINUTE = 60_000
+
+def _raw(start, count, step=MINUTE):
+    """Raw exchange klines with distinct, deterministic prices"""
+    return [[start + i * step, 100 + i, 101 + i + i % 3, 99 + i - i % 2, 100.5 + i, 10 + i]
+            for i in range(count)]
+
+def _klines(start, count):
+    return [{'time': t, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for t, o, h, l, c, v in _raw(start, count)]
+
+class FakeExchange:
+    """Stands in for KlineFetcher._get; records every upstream call"""
+
+    def __init__(self, now_ms):
+        self.now_ms = now_ms
+        self.calls = []
+        self.gate = None
+
+    def __call__(self, path, params):
+        self.calls.append((path, dict(params)))
+        if self.gate is not None:
+            self.gate.wait(5)
+        if path == '/ticker/price':
+            return {'symbol': params['symbol'], 'price': '42.0'}
+        # The last candle returned is the one still open
+        open_time = self.now_ms - self.now_ms % MINUTE
+        limit = params['limit']
+        return _raw(open_time - (limit - 1) * MINUTE, limit)
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_700_000_000.0 - 1_700_000_000.0 % 60 + 30]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    return now
+
+@pytest.fixture
+def fetcher(clock):
+    fetcher = KlineFetcher(base_url='http://exchange.test', open_candle_ttl=2.0)
+    fetcher._get = FakeExchange(clock[0] * 1000)
+    yield fetcher
+    fetcher.close()
+
+def test_closed_klines_cached_until_close(fetcher, clock):
+    first = fetcher.get_klines('BTCUSDT', '1m', 10)
+    assert len(first) == 10
+    assert first[-1]['time'] + MINUTE > clock[0] * 1000
+
+    # Within the open candle's TTL nothing goes upstream
+    assert fetcher.get_klines('BTCUSDT', '1m', 10) == first
+    assert len(fetcher._get.calls) == 1
+
+    # The open candle expires on its own; the closed ones stay cached
+    clock[0] += 3
+    fetcher.get_klines('BTCUSDT', '1m', 10)
+    assert [c[1]['limit'] for c in fetcher._get.calls] == [10, 1]
+
+    # After the close, the closed candles are fetched again
+    clock[0] += 60
+    fetcher._get.now_ms = clock[0] * 1000
+    after = fetcher.get_klines('BTCUSDT', '1m', 10)
+    assert after[-1]['time'] == first[-1]['time'] + MINUTE
+    assert fetcher._get.calls[-1][1]['limit'] == 10
+
+def test_concurrent_requests_share_one_upstream_call(fetcher):
+    fetcher._get.gate = threading.Event()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(fetcher.get_current_price('BTCUSDT')))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    while fetcher.stats['shared'] < 7:
+        time.sleep(0.001)
+    fetcher._get.gate.set()
+    for t in threads:
+        t.join(5)
+
+    assert results == [42.0] * 8
+    assert len(fetcher._get.calls) == 1
+
+def test_failed_call_is_not_cached(fetcher):
+    calls = []
+
+    def failing(path, params):
+        calls.append(path)
+        raise ValueError('Binance API error: 500')
+
+    fetcher._get = failing
+    with pytest.raises(ValueError):
+        fetcher.get_current_price('BTCUSDT')
+    with pytest.raises(ValueError):
+        fetcher.get_current_price('BTCUSDT')
+    assert len(calls) == 2
+
+def test_store_appends_only_newer_candles(tmp_path):
+    store = KlineStore(root=str(tmp_path))
+    assert store.append('BTCUSDT', '1m', _klines(0, 5)) == 5
+    assert store.append('BTCUSDT', '1m', _klines(3 * MINUTE, 5)) == 3
+    assert store.last_time('BTCUSDT', '1m') == 7 * MINUTE
+
+    stored = store.read('BTCUSDT', '1m')
+    np.testing.assert_array_equal(stored['time'], np.arange(8) * MINUTE)
+    assert len(store.tail('BTCUSDT', '1m', 3)['time']) == 3
+
+def test_on_candle_matches_vectorized_resample(tmp_path):
+    store = KlineStore(root=str(tmp_path))
+    resampler = TimeframeResampler(store, intervals=('5m', '15m'))
+    candles = _klines(0, 31)
+
+    closed = []
+    for kline in candles:
+        closed.extend(resampler.on_candle('BTCUSDT', kline))
+    assert [interval for interval, _ in closed].count('5m') == 6
+    assert [interval for interval, _ in closed].count('15m') == 2
+
+    expected = resample({c: [k[c] for k in candles] for c in COLUMNS}, '5m')
+    stored = store.read('BTCUSDT', '5m')
+    for c in COLUMNS:
+        np.testing.assert_allclose(stored[c], expected[c][:6])
+
+    # The bar still forming holds the one candle after the last close
+    partial = resampler.partial('BTCUSDT', '5m')
+    assert partial['time'] == 30 * MINUTE and partial['close'] == candles[-1]['close']
+    served = resampler.klines('BTCUSDT', '5m', limit=3)
+    np.testing.assert_array_equal(served['time'], [20 * MINUTE, 25 * MINUTE, 30 * MINUTE])
+
+def test_on_candle_ignores_duplicates(tmp_path):
+    store = KlineStore(root=str(tmp_path))
+    resampler = TimeframeResampler(store, intervals=('5m',))
+    candles = _klines(0, 5)
+    for kline in candles[:3]:
+        resampler.on_candle('BTCUSDT', kline)
+    assert resampler.on_candle('BTCUSDT', candles[2]) == []
+
+    for kline in candles[3:]:
+        resampler.on_candle('BTCUSDT', kline)
+    bar = store.read('BTCUSDT', '5m')
+    assert bar['volume'][0] == sum(k['volume'] for k in candles)
+
+def test_backfill_skips_incomplete_buckets(tmp_path):
+    store = KlineStore(root=str(tmp_path))
+    # Starts two minutes into a 5m bucket and ends inside another
+    store.append('BTCUSDT', '1m', _klines(2 * MINUTE, 11))
+    resampler = TimeframeResampler(store, intervals=('5m',))
+
+    assert resampler.backfill('BTCUSDT') == {'5m': 1}
+    np.testing.assert_array_equal(store.read('BTCUSDT', '5m')['time'], [5 * MINUTE])
+    assert resampler.partial('BTCUSDT', '5m')['time'] == 10 * MINUTE
+
+    # Later candles continue the bar rebuilt by the backfill
+    closed = []
+    for kline in _klines(13 * MINUTE, 2):
+        closed.extend(resampler.on_candle('BTCUSDT', kline))
+    assert [bar['time'] for _, bar in closed] == [10 * MINUTE]
+    assert store.read('BTCUSDT', '5m')['open'][-1] == _klines(2 * MINUTE, 11)[8]['open']
@@ -0,0 +1,215 @@
+"""
+Token digests, the cached token lookup and the quota-checked token issue path
+The database is a fake Supabase client that records every round trip and
+answers issue_user_tokens the way scripts/06_issue_tokens.sql does.
+"""
+
+import csv
+import io
+
+import pytest
+from flask import Flask
+from flask_jwt_extended import JWTManager, create_access_token
+
+import routes.client as client_routes
+import utils.auth_helpers as auth_helpers
+from utils.token_digest import (
+    PREFIX_LENGTH, match_token, public_token, token_columns, token_digest, token_prefix
+)
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+class FakeQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.filters = {}
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, column, value):
+        self.filters[column] = value
+        return self
+
+    def execute(self):
+        self.db.round_trips += 1
+        return FakeResponse([row for row in self.db.tables.get(self.table, [])
+                             if all(row.get(c) == v for c, v in self.filters.items())])
+
+class FakeRpc:
+    def __init__(self, db, name, params):
+        self.db = db
+        self.name = name
+        self.params = params
+
+    def execute(self):
+        self.db.round_trips += 1
+        return FakeResponse(getattr(self.db, self.name)(**self.params))
+
+class FakeSupabase:
+    """The table reads and RPCs the token paths use"""
+
+    def __init__(self, quotas=None):
+        self.tables = {'user_tokens': []}
+        self.quotas = quotas or {}
+        self.round_trips = 0
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+    def rpc(self, name, params):
+        return FakeRpc(self, name, params)
+
+    def issue_user_tokens(self, p_client_id, tokens):
+        if p_client_id not in self.quotas:
+            return None
+        active = sum(1 for row in self.tables['user_tokens'] if row['client_id'] == p_client_id)
+        available = self.quotas[p_client_id] - active
+        if len(tokens) > available:
+            return {'available': max(available, 0), 'tokens': None}
+
+        issued = []
+        for token in tokens:
+            row = {'id': len(self.tables['user_tokens']) + 1, 'client_id': p_client_id,
+                   'is_active': True, 'usage_count': 0, **token}
+            self.tables['user_tokens'].append(row)
+            issued.append(row)
+        return {'available': available - len(tokens), 'tokens': issued}
+
+@pytest.fixture
+def db(monkeypatch):
+    db = FakeSupabase(quotas={1: 5})
+    monkeypatch.setattr(auth_helpers, 'get_supabase', lambda: db)
+    monkeypatch.setattr(client_routes, 'get_supabase', lambda: db)
+    auth_helpers.token_cache.clear()
+    yield db
+    auth_helpers.token_cache.clear()
+
+@pytest.fixture
+def activity(monkeypatch):
+    logged = []
+    monkeypatch.setattr(client_routes, 'log_activity', lambda *args: logged.append(args))
+    return logged
+
+@pytest.fixture
+def client(db, activity):
+    app = Flask(__name__)
+    app.config['JWT_SECRET_KEY'] = 'test-jwt-secret-key-of-at-least-32-bytes'
+    app.config['TESTING'] = True
+    JWTManager(app)
+    app.register_blueprint(client_routes.client_bp, url_prefix='/api/client')
+
+    with app.app_context():
+        token = create_access_token(identity='1', additional_claims={'role': 'client_admin', 'client_id': 1})
+    test_client = app.test_client()
+    test_client.environ_base['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+    return test_client
+
+def _stored_token(db, token_string, client_id=1, **fields):
+    row = {'id': len(db.tables['user_tokens']) + 1, 'client_id': client_id, 'is_active': True,
+           'token': None, **token_columns(token_string), **fields}
+    db.tables['user_tokens'].append(row)
+    return row
+
+def test_digest_is_keyed_and_stable():
+    assert token_digest('abc') == token_digest('abc')
+    assert token_digest('abc') != token_digest('abd')
+    assert len(token_digest('abc')) == 64
+    assert token_columns('abcdefghijkl') == {'token_prefix': 'abcdefgh', 'token_hash': token_digest('abcdefghijkl')}
+    assert token_prefix('abcdefghijkl') == 'abcdefgh'
+
+def test_match_token_among_prefix_candidates():
+    # Two tokens that share a prefix: the digest decides
+    rows = [{'id': 1, **token_columns('samepfx-one')}, {'id': 2, **token_columns('samepfx-two')}, {'id': 3}]
+    assert match_token(rows, 'samepfx-two')['id'] == 2
+    assert match_token(rows, 'samepfx-three') is None
+    assert match_token([], 'samepfx-one') is None
+
+def test_public_token_drops_secrets():
+    row = {'id': 1, 'token_name': 'a', 'token': 'plain', 'token_hash': 'digest', 'token_prefix': 'plain'}
+    assert public_token(row) == {'id': 1, 'token_name': 'a', 'token_prefix': 'plain'}
+
+def test_load_token_is_cached(db):
+    _stored_token(db, 'cached-token-1')
+
+    token = auth_helpers._load_token('cached-token-1')
+    assert token['id'] == 1 and 'token_hash' not in token
+    assert auth_helpers._load_token('cached-token-1') is token
+    assert db.round_trips == 1
+
+    # The cache is keyed by digest, never by the plaintext
+    assert token_digest('cached-token-1') in auth_helpers.token_cache._entries
+    assert 'cached-token-1' not in auth_helpers.token_cache._entries
+
+def test_unknown_token_is_negatively_cached(db):
+    assert auth_helpers._load_token('unknown-token') is None
+    assert auth_helpers._load_token('unknown-token') is None
+    assert db.round_trips == 1
+
+def test_token_cache_invalidated_by_token_and_client(db):
+    _stored_token(db, 'first-token')
+    _stored_token(db, 'second-token')
+    auth_helpers._load_token('first-token')
+    auth_helpers._load_token('second-token')
+
+    auth_helpers.invalidate_token_cache(token_id=1)
+    auth_helpers._load_token('first-token')
+    auth_helpers._load_token('second-token')
+    assert db.round_trips == 3
+
+    auth_helpers.invalidate_token_cache(client_id=1)
+    auth_helpers._load_token('second-token')
+    assert db.round_trips == 4
+
+def test_issue_tokens_returns_plaintext_once(db):
+    tokens, available = client_routes.issue_tokens(1, ['a', None])
+    assert available == 3
+    assert [t['token_name'] for t in tokens] == ['a', f"Token-{tokens[1]['token'][:PREFIX_LENGTH]}"]
+    assert db.round_trips == 1
+
+    for token in tokens:
+        assert 'token_hash' not in token
+        # Only the digest is stored, and it verifies the plaintext handed out
+        assert match_token(db.tables['user_tokens'], token['token'])['id'] == token['id']
+    assert all(row.get('token') is None for row in db.tables['user_tokens'])
+
+def test_issue_tokens_over_quota_writes_nothing(db):
+    assert client_routes.issue_tokens(1, ['a'] * 6) == (None, 5)
+    assert client_routes.issue_tokens(2, ['a']) == (None, None)
+    assert db.tables['user_tokens'] == []
+
+def test_create_token_validates_fields(client, db):
+    assert client.post('/api/client/tokens', json={'token_name': '  '}).status_code == 400
+    assert client.post('/api/client/tokens', json={'expiry_date': 'soon'}).status_code == 400
+    assert db.round_trips == 0
+
+    response = client.post('/api/client/tokens', json={'token_name': 'desk', 'expiry_date': '2030-01-01'})
+    assert response.status_code == 201
+    assert response.get_json()['token_name'] == 'desk'
+
+def test_bulk_tokens_csv(client, db, activity):
+    response = client.post('/api/client/tokens/bulk', json={'count': 3, 'token_name': 'desk'})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert response.headers['X-Tokens-Available'] == '2'
+
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['token_name'] for row in rows] == ['desk-1', 'desk-2', 'desk-3']
+    assert len({row['token'] for row in rows}) == 3
+    assert db.round_trips == 1
+    assert len(activity) == 1
+
+def test_bulk_tokens_quota_and_count(client, db):
+    assert client.post('/api/client/tokens/bulk', json={'count': True}).status_code == 400
+    assert client.post('/api/client/tokens/bulk', json={'count': 0}).status_code == 400
+
+    response = client.post('/api/client/tokens/bulk?format=json', json={'count': 6})
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Token limit reached (5 tokens available)'
+    assert db.tables['user_tokens'] == []
+
+    response = client.post('/api/client/tokens/bulk?format=json', json={'count': 5})
+    assert len(response.get_json()['tokens']) == 5
@@ -0,0 +1,144 @@
+"""
+Batched activity logging
+Request handlers append compact ActivityRecord objects to a shared in-process
+queue; a daemon thread bulk-inserts them into activity_logs every
+`batch_size` records or `interval` seconds, whichever comes first.
+
+When the database is slow or down the queue is bounded by `max_pending`:
+a full queue makes producers wait up to `block_timeout` seconds for room
+(0 never blocks a request), then drops the oldest records. Failed inserts are
+put back at the front of the queue and retried with exponential backoff.
+"""
+
+import atexit
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+from config import Config
+from db_client import get_supabase
+
+class ActivityRecord:
+    """One activity_logs row"""
+    __slots__ = ('client_id', 'token_id', 'action_type', 'action_details', 'ip_address', 'user_agent', 'timestamp')
+
+    def __init__(self, client_id, token_id, action_type, action_details=None, ip_address=None, user_agent=None,
+                 timestamp=None):
+        self.client_id = client_id
+        self.token_id = token_id
+        self.action_type = action_type
+        self.action_details = action_details
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+        self.timestamp = timestamp or datetime.utcnow().isoformat()
+
+    def to_row(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+class ActivityLogQueue:
+    """Bounded queue of ActivityRecords drained by bulk inserts"""
+
+    def __init__(self, batch_size=500, interval=0.25, max_pending=50_000, block_timeout=0.0, max_backoff=30.0):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.max_pending = max_pending
+        self.block_timeout = block_timeout
+        self.max_backoff = max_backoff
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._ready = threading.Condition(self._lock)
+        self._space = threading.Condition(self._lock)
+        self._thread = None
+        self.stats = {'enqueued': 0, 'written': 0, 'dropped': 0, 'batches': 0, 'failures': 0}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def put(self, record):
+        """Queue a record; returns False if an older record had to be dropped for it"""
+        with self._lock:
+            if len(self._pending) >= self.max_pending and self.block_timeout > 0:
+                self._space.wait_for(lambda: len(self._pending) < self.max_pending, self.block_timeout)
+
+            dropped = len(self._pending) >= self.max_pending
+            if dropped:
+                self._pending.popleft()
+                self.stats['dropped'] += 1
+            self._pending.append(record)
+            self.stats['enqueued'] += 1
+
+            if len(self._pending) >= self.batch_size:
+                self._ready.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='activity-log-flush', daemon=True)
+                self._thread.start()
+        return not dropped
+
+    def flush_batch(self):
+        """Insert up to batch_size records in one request; returns the number written"""
+        with self._lock:
+            batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+            self._space.notify_all()
+        if not batch:
+            return 0
+
+        try:
+            get_supabase().table('activity_logs').insert([record.to_row() for record in batch]).execute()
+        except Exception:
+            # Back to the front for the retry; records that no longer fit are the oldest
+            with self._lock:
+                self.stats['failures'] += 1
+                room = max(self.max_pending - len(self._pending), 0)
+                keep = batch[len(batch) - min(room, len(batch)):]
+                self.stats['dropped'] += len(batch) - len(keep)
+                self._pending.extendleft(reversed(keep))
+            raise
+
+        with self._lock:
+            self.stats['written'] += len(batch)
+            self.stats['batches'] += 1
+        return len(batch)
+
+    def flush(self):
+        """Write everything queued; returns the number of records written"""
+        written = 0
+        while True:
+            count = self.flush_batch()
+            if not count:
+                return written
+            written += count
+
+    def _run(self):
+        failures = 0
+        while True:
+            with self._lock:
+                deadline = time.monotonic() + self.interval
+                while len(self._pending) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._ready.wait(remaining)
+
+            try:
+                self.flush_batch()
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(self.interval * 2 ** failures, self.max_backoff)
+                print(f"[ActivityLog] Insert failed, retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+activity_log = ActivityLogQueue(
+    batch_size=Config.ACTIVITY_LOG_BATCH,
+    interval=Config.ACTIVITY_LOG_INTERVAL_MS / 1000,
+    max_pending=Config.ACTIVITY_LOG_MAX_PENDING,
+    block_timeout=Config.ACTIVITY_LOG_BLOCK_MS / 1000
+)
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        activity_log.flush()
+    except Exception as e:
+        print(f"[ActivityLog] Final flush failed: {e}")
@@ -2,23 +2,19 @@ from functools import wraps
 from flask import request, jsonify
 from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity, get_jwt
 from db_client import get_supabase
+from utils.ttl_cache import TTLCache, MISSING
+from utils.usage_counters import usage_counters
+from utils.activity_log import activity_log, ActivityRecord
+from utils.token_digest import token_prefix, token_digest, match_token, public_token
 from datetime import datetime
+import time
 
 def log_activity(client_id, token_id, action_type, action_details=None):
-    """Helper function to log activities"""
-    try:
-        supabase = get_supabase()
-        supabase.table('activity_logs').insert({
-            'client_id': client_id,
-            'token_id': token_id,
-            'action_type': action_type,
-            'action_details': action_details,
-            'ip_address': request.remote_addr,
-            'user_agent': request.headers.get('User-Agent'),
-            'timestamp': datetime.utcnow().isoformat()
-        }).execute()
-    except Exception as e:
-        print(f"Error logging activity: {str(e)}")
+    """Helper function to log activities; the row is written in bulk by activity_log"""
+    activity_log.put(ActivityRecord(
+        client_id, token_id, action_type, action_details,
+        request.remote_addr, request.headers.get('User-Agent')
+    ))
 
 def super_admin_required():
     """Decorator to require super admin authentication"""
@@ -46,12 +42,12 @@ def client_admin_required():
         return decorator
     return wrapper
 
-def token_required():
+def token_required(locations=None):
     """Decorator to require valid user token authentication"""
     def wrapper(fn):
         @wraps(fn)
         def decorator(*args, **kwargs):
-            verify_jwt_in_request()
+            verify_jwt_in_request(locations=locations)
             claims = get_jwt()
             if claims.get('role') != 'token_user':
                 return jsonify({'error': 'Valid token required'}), 403
@@ -59,42 +55,95 @@ def token_required():
         return decorator
     return wrapper
 
+# Principal rows by (role, identity); the tables JWT identities refer to
+PRINCIPAL_TABLES = {
+    'super_admin': 'super_admin',
+    'client_admin': 'white_label_clients',
+    'token_user': 'user_tokens'
+}
+principal_cache = TTLCache(ttl=30, negative_ttl=10)
+
+def invalidate_principal(role, identity):
+    """Drop the cached row of a principal after it changed"""
+    principal_cache.invalidate((role, str(identity)))
+
+def load_principal(role, identity):
+    """
+    Principal row for JWT claims, cached for a short TTL
+    Client admins carry active_tokens_count, counted by the database when the
+    row is loaded, so the token routes invalidate it too.
+    """
+    table = PRINCIPAL_TABLES.get(role)
+    if table is None:
+        return None
+
+    key = (role, str(identity))
+    principal = principal_cache.get(key)
+    if principal is not MISSING:
+        return principal
+
+    supabase = get_supabase()
+    response = supabase.table(table).select('*').eq('id', identity).execute()
+    principal = response.data[0] if response.data else None
+    if principal and role == 'token_user':
+        principal = public_token(principal)
+
+    if principal and role == 'client_admin':
+        # Counted server-side; no token rows are transferred
+        tokens_response = supabase.table('user_tokens').select('id', count='exact', head=True) \
+            .eq('client_id', identity).eq('is_active', True).execute()
+        principal['active_tokens_count'] = tokens_response.count or 0
+
+    principal_cache.set(key, principal)
+    return principal
+
 def get_current_user():
     """Get current authenticated user based on JWT claims"""
     try:
         verify_jwt_in_request()
         identity = get_jwt_identity()
         claims = get_jwt()
-        role = claims.get('role')
-        
-        supabase = get_supabase()
         
-        if role == 'super_admin':
-            response = supabase.table('super_admin').select('*').eq('id', identity).execute()
-            return response.data[0] if response.data else None
-        elif role == 'client_admin':
-            response = supabase.table('white_label_clients').select('*').eq('id', identity).execute()
-            return response.data[0] if response.data else None
-        elif role == 'token_user':
-            response = supabase.table('user_tokens').select('*').eq('id', identity).execute()
-            return response.data[0] if response.data else None
-        
-        return None
+        return load_principal(claims.get('role'), identity)
     except:
         return None
 
+# Validated token records by token string; unknown tokens are cached as None
+token_cache = TTLCache(ttl=60, negative_ttl=30)
+
+def invalidate_token_cache(token_id=None, client_id=None):
+    """Drop cached token records of a token and/or every token of a client"""
+    if token_id is not None:
+        token_cache.invalidate_tag(('token', token_id))
+    if client_id is not None:
+        token_cache.invalidate_tag(('client', client_id))
+
+def _load_token(token_string):
+    # Keyed by digest so the cache holds no plaintext tokens
+    key = token_digest(token_string)
+    token = token_cache.get(key)
+    if token is not MISSING:
+        return token
+
+    # Token, client and client customization in one indexed prefix probe
+    supabase = get_supabase()
+    response = supabase.table('user_tokens').select('*, white_label_clients(*, client_customization(*))').eq('token_prefix', token_prefix(token_string)).execute()
+    token = match_token(response.data, token_string)
+    if token:
+        token = public_token(token)
+
+    tags = [('token', token['id']), ('client', token['client_id'])] if token else []
+    token_cache.set(key, token, tags)
+    return token
+
 def validate_token_access(token_string):
     """Validate if a token is active and update usage"""
-    supabase = get_supabase()
-    
-    # Get token with client info
-    response = supabase.table('user_tokens').select('*, white_label_clients(*)').eq('token', token_string).execute()
+    # Get token with client info (cached)
+    token = _load_token(token_string)
     
-    if not response.data:
+    if not token:
         return None, "Invalid token"
     
-    token = response.data[0]
-    
     if not token['is_active']:
         return None, "Token is inactive"
     
@@ -106,10 +155,33 @@ def validate_token_access(token_string):
     if not client or not client.get('is_active'):
         return None, "Client account is inactive"
     
-    # Update token usage
-    supabase.table('user_tokens').update({
-        'last_used': datetime.utcnow().isoformat(),
-        'usage_count': token['usage_count'] + 1
-    }).eq('id', token['id']).execute()
+    # Count the usage; it is written to user_tokens in bulk by usage_counters.
+    # The cached record is shared, so the caller gets a copy with this use applied
+    used_at = datetime.utcnow().isoformat()
+    usage_counters.add(token['id'], used_at)
+    token = dict(token, last_used=used_at, usage_count=token['usage_count'] + 1)
     
     return token, None
+
+def token_session_error(identity, claims):
+    """
+    Why a token user's session may no longer be served, or None
+    For connections that outlive the request-time checks: the JWT expiry is
+    compared with the clock and the token and client rows are reloaded through
+    the principal cache, which revocation invalidates.
+    """
+    if claims.get('exp') and claims['exp'] <= time.time():
+        return "Session expired"
+
+    token = load_principal('token_user', identity)
+    if not token:
+        return "Invalid token"
+    if not token['is_active']:
+        return "Token is inactive"
+    if token['expiry_date'] and datetime.fromisoformat(token['expiry_date']) < datetime.utcnow():
+        return "Token has expired"
+
+    client = load_principal('client_admin', token['client_id'])
+    if not client or not client.get('is_active'):
+        return "Client account is inactive"
+    return None
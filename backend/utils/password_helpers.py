@@ -0,0 +1,183 @@
+"""
+Password hashing on a bounded worker pool
+The KDF is deliberately slow, so at most `workers` hashes run at once and at
+most `max_pending` more may wait; further logins fail fast with HashingBusy
+instead of piling up until every request worker and CPU is busy hashing.
+hashlib releases the GIL inside scrypt/pbkdf2, so the pool runs in parallel.
+Under the gevent worker the pool is gevent's native thread pool, so a hash
+never blocks the event loop serving the other requests.
+
+The KDF comes from Config.PASSWORD_HASH_METHOD in Werkzeug's method syntax, e.g.
+`scrypt:32768:8:1` or `pbkdf2:sha256:600000`. Hashes made with any other
+method still verify, and verify() returns a replacement hash at the
+configured cost so the caller can store it with the login update.
+
+Benchmark:
+    python -m utils.password_helpers --methods scrypt:16384:8:1 scrypt:32768:8:1 --workers 1 2 4
+"""
+
+import argparse
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from werkzeug.security import generate_password_hash, check_password_hash
+
+from config import Config
+
+class HashingBusy(Exception):
+    """Raised when the hashing pool and its queue are full"""
+
+def _executor(workers):
+    """Pool of real OS threads, also when gevent has patched threading into greenlets"""
+    try:
+        from gevent import monkey
+    except ImportError:
+        monkey = None
+    if monkey is not None and monkey.is_module_patched('threading'):
+        from gevent.threadpool import ThreadPoolExecutor as NativeThreadPoolExecutor
+        return NativeThreadPoolExecutor(max_workers=workers)
+    return ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+class PasswordHasher:
+    """Hashes and verifies passwords on a fixed number of threads; unset arguments come from Config"""
+
+    def __init__(self, method=None, workers=None, max_pending=None):
+        self.method = method or Config.PASSWORD_HASH_METHOD
+        self.workers = workers or Config.PASSWORD_HASH_WORKERS
+        if max_pending is None:
+            max_pending = Config.PASSWORD_HASH_QUEUE
+        self.max_pending = max_pending
+        self._slots = threading.BoundedSemaphore(self.workers + max_pending)
+        self._executor = _executor(self.workers)
+        # Werkzeug writes the method with its defaults filled in, e.g. "pbkdf2" -> "pbkdf2:sha256:600000"
+        self.prefix = generate_password_hash('', self.method).split('$', 1)[0]
+        self.stats = {'hashed': 0, 'verified': 0, 'rehashed': 0, 'rejected': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, stat):
+        with self._stats_lock:
+            self.stats[stat] += 1
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self._count('rejected')
+            raise HashingBusy('Too many password checks in progress')
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def needs_rehash(self, stored):
+        return stored.split('$', 1)[0] != self.prefix
+
+    def _hash(self, password):
+        return generate_password_hash(password, self.method)
+
+    def _verify(self, password, stored):
+        if not check_password_hash(stored, password):
+            return False, None
+        # The upgrade runs in the same job, while the password is at hand
+        return True, self._hash(password) if self.needs_rehash(stored) else None
+
+    def hash(self, password):
+        """Hash at the configured cost"""
+        hashed = self._run(self._hash, password)
+        self._count('hashed')
+        return hashed
+
+    def verify(self, password, stored):
+        """(matches, new hash or None); a new hash is returned when stored uses another method"""
+        if not stored:
+            return False, None
+        matches, new_hash = self._run(self._verify, password, stored)
+        self._count('verified')
+        if new_hash:
+            self._count('rehashed')
+        return matches, new_hash
+
+password_hasher = PasswordHasher()
+
+def _percentiles(values):
+    p50, p95, p99 = np.percentile(values, [50, 95, 99]) * 1000 if len(values) else (np.nan,) * 3
+    return p50, p95, p99
+
+def benchmark(method, workers, logins=200, concurrency=32, probe_interval=0.005):
+    """
+    Run `logins` verifications from `concurrency` request threads while a probe
+    thread times a cheap request-sized task, like another API route would.
+    Returns logins/sec, login latency percentiles (ms), rejections and probe p99 (ms).
+    """
+    hasher = PasswordHasher(method, workers, max_pending=concurrency)
+    stored = hasher.hash('benchmark-password')
+    latencies, rejected = [], 0
+    lock = threading.Lock()
+    remaining = iter(range(logins))
+    done = threading.Event()
+
+    def client():
+        nonlocal rejected
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    return
+            start = time.perf_counter()
+            try:
+                hasher.verify('benchmark-password', stored)
+            except HashingBusy:
+                with lock:
+                    rejected += 1
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    probes = []
+    def probe():
+        payload = {'symbol': 'BTCUSDT', 'values': list(range(200))}
+        while not done.is_set():
+            start = time.perf_counter()
+            sorted(payload['values'], reverse=True)
+            probes.append(time.perf_counter() - start)
+            time.sleep(probe_interval)
+
+    probe_thread = threading.Thread(target=probe, daemon=True)
+    probe_thread.start()
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    probe_thread.join()
+
+    p50, p95, p99 = _percentiles(np.array(latencies))
+    return {
+        'method': hasher.prefix,
+        'workers': workers,
+        'logins_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(p50, 1),
+        'p95_ms': round(p95, 1),
+        'p99_ms': round(p99, 1),
+        'rejected': rejected,
+        'probe_p99_ms': round(_percentiles(np.array(probes))[2], 2)
+    }
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure login throughput and tail latency per KDF setting')
+    parser.add_argument('--methods', nargs='+', default=['pbkdf2:sha256:600000', 'scrypt:16384:8:1', Config.PASSWORD_HASH_METHOD])
+    parser.add_argument('--workers', nargs='+', type=int, default=[1, 2, 4])
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=32, help='simultaneous login requests')
+    args = parser.parse_args()
+
+    print(f"[Password] {args.logins} logins, {args.concurrency} concurrent, {os.cpu_count()} CPUs")
+    for method in args.methods:
+        for workers in args.workers:
+            row = benchmark(method, workers, args.logins, args.concurrency)
+            print(f"  - {row['method']:<24} workers={row['workers']}: {row['logins_per_sec']} logins/s, "
+                  f"p50 {row['p50_ms']} ms, p95 {row['p95_ms']} ms, p99 {row['p99_ms']} ms, "
+                  f"rejected {row['rejected']}, other routes p99 {row['probe_p99_ms']} ms")
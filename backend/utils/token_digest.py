@@ -0,0 +1,77 @@
+"""
+Keyed token digests
+user_tokens stores an HMAC-SHA256 of each token under Config.TOKEN_HASH_KEY
+instead of the token itself, plus the first PREFIX_LENGTH characters in an
+indexed column. A lookup is one index probe on the prefix followed by a
+constant-time digest compare, so its cost does not grow with the table and a
+leaked table does not reveal usable tokens. The plaintext is shown only
+once, in the response that creates the token.
+
+Migration of tokens stored in plain text (after scripts/05_token_digest.sql):
+    python -m utils.token_digest --batch-size 500
+"""
+
+import argparse
+import hashlib
+import hmac
+
+from config import Config
+from db_client import get_supabase
+
+PREFIX_LENGTH = 8
+SECRET_FIELDS = ('token', 'token_hash')
+
+def _key():
+    return Config.TOKEN_HASH_KEY.encode()
+
+def token_prefix(token_string):
+    return token_string[:PREFIX_LENGTH]
+
+def token_digest(token_string):
+    """Hex HMAC-SHA256 of a token under TOKEN_HASH_KEY"""
+    return hmac.new(_key(), token_string.encode(), hashlib.sha256).hexdigest()
+
+def token_columns(token_string):
+    """Columns to store for a new token"""
+    return {'token_prefix': token_prefix(token_string), 'token_hash': token_digest(token_string)}
+
+def match_token(candidates, token_string):
+    """The candidate row whose digest matches token_string, compared in constant time"""
+    digest = token_digest(token_string)
+    match = None
+    for row in candidates:
+        # Every candidate is compared, so the time does not depend on which one matches
+        if hmac.compare_digest(row.get('token_hash') or '', digest):
+            match = row
+    return match
+
+def public_token(row):
+    """Token row without the stored secret columns"""
+    return {key: value for key, value in row.items() if key not in SECRET_FIELDS}
+
+def migrate_plaintext_tokens(batch_size=500):
+    """
+    Replace plaintext tokens with prefix + digest, batch_size rows per round trip
+    Safe to rerun: only rows that still have a plaintext token are read.
+    Returns the number of tokens migrated.
+    """
+    supabase = get_supabase()
+    migrated = 0
+    while True:
+        response = supabase.table('user_tokens').select('id, token') \
+            .not_.is_('token', 'null').order('id').limit(batch_size).execute()
+        if not response.data:
+            return migrated
+
+        supabase.rpc('set_token_digests', {'digests': [
+            {'id': row['id'], **token_columns(row['token'])} for row in response.data
+        ]}).execute()
+        migrated += len(response.data)
+        print(f"[Tokens] Migrated {migrated} tokens")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Store existing plaintext user tokens as keyed digests')
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"[Tokens] Done, {migrate_plaintext_tokens(args.batch_size)} tokens migrated")
@@ -0,0 +1,78 @@
+"""
+In-process TTL cache with tag-based invalidation
+Entries expire after `ttl` seconds (`negative_ttl` for cached misses) and can
+be dropped early by any of the tags they were stored with, e.g. the token id
+or client id a record belongs to. Each process has its own cache, so the TTL
+bounds how long another worker may serve a stale entry.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+
+class TTLCache:
+    """Bounded LRU of key -> value with per-entry expiry and invalidation tags"""
+
+    def __init__(self, ttl=60, negative_ttl=30, max_entries=100_000):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._tags = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'negative_hits': 0}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Cached value, None for a cached miss, or MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.time():
+                if entry is not None:
+                    self._remove(key)
+                self.stats['misses'] += 1
+                return MISSING
+
+            self._entries.move_to_end(key)
+            self.stats['negative_hits' if entry[1] is None else 'hits'] += 1
+            return entry[1]
+
+    def set(self, key, value, tags=()):
+        """Store value (None caches a miss for negative_ttl) under tags"""
+        ttl = self.negative_ttl if value is None else self.ttl
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.time() + ttl, value, tuple(tags))
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry:
+            for tag in entry[2]:
+                keys = self._tags.get(tag)
+                if keys:
+                    keys.discard(key)
+                    if not keys:
+                        del self._tags[tag]
+
+    def invalidate(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def invalidate_tag(self, tag):
+        """Drop every entry stored with tag"""
+        with self._lock:
+            for key in list(self._tags.get(tag, ())):
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
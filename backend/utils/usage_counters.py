@@ -0,0 +1,81 @@
+"""
+Write-behind token usage counters
+Token logins add to in-memory counters instead of writing user_tokens. A
+daemon thread drains them every `interval` seconds into one
+increment_token_usage call, which adds the counts atomically in the
+database, so concurrent logins and workers never overwrite each other.
+"""
+
+import atexit
+import threading
+import time
+from datetime import datetime
+
+from db_client import get_supabase
+
+class UsageCounters:
+    """Per-token login counts and latest last_used, flushed in bulk"""
+
+    def __init__(self, interval=5.0):
+        self.interval = interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.stats = {'added': 0, 'flushed': 0, 'writes': 0}
+
+    def add(self, token_id, used_at=None):
+        used_at = used_at or datetime.utcnow().isoformat()
+        with self._lock:
+            entry = self._pending.get(token_id)
+            if entry:
+                entry[0] += 1
+                entry[1] = max(entry[1], used_at)
+            else:
+                self._pending[token_id] = [1, used_at]
+            self.stats['added'] += 1
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='token-usage-flush', daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Write every pending increment in one call; returns the number of tokens written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        usages = [{'token_id': token_id, 'count': count, 'last_used': last_used}
+                  for token_id, (count, last_used) in pending.items()]
+        try:
+            get_supabase().rpc('increment_token_usage', {'usages': usages}).execute()
+        except Exception:
+            # Put the counts back so the next flush retries them
+            with self._lock:
+                for token_id, (count, last_used) in pending.items():
+                    entry = self._pending.setdefault(token_id, [0, last_used])
+                    entry[0] += count
+                    entry[1] = max(entry[1], last_used)
+            raise
+
+        with self._lock:
+            self.stats['flushed'] += sum(count for count, _ in pending.values())
+            self.stats['writes'] += 1
+        return len(usages)
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"[Usage] Flush failed: {e}")
+
+usage_counters = UsageCounters()
+
+@atexit.register
+def _flush_on_exit():
+    try:
+        usage_counters.flush()
+    except Exception as e:
+        print(f"[Usage] Final flush failed: {e}")